@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+İçerik blokları için yaklaşık en yakın komşu (ANN) indeksi — CPU, yalnızca NumPy.
+- IVF-Flat: vektörler k-means merkezlerine (nlist) atanır; sorguda en yakın `nprobe` liste taranır.
+- Az vektör varken (eğitim eşiği altında) tam (flat) arama yapılır; eşik aşılınca kendiliğinden eğitilir,
+  veri eğitimdeki boyutun ANN_RETRAIN_FACTOR katına çıkınca merkezler yeniden hesaplanır.
+- Artımlı ekleme: yeni sayfalar tarandıkça add() / BlockIndex.add_page().
+- save()/load(): vektörler ve listeler .npz, blok bilgileri .json olarak diske yazılır.
+Tüm (sorgu × blok) matrisi yerine her sorgu için yalnızca aday listeler skorlanır.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+ANN_MIN_TRAIN = int(os.getenv("ANN_MIN_TRAIN", "2048"))
+ANN_RETRAIN_FACTOR = float(os.getenv("ANN_RETRAIN_FACTOR", "4"))
+_KMEANS_ITERS = 10
+_KMEANS_SAMPLE = 50000
+
+
+def _kmeans(x: np.ndarray, k: int, seed: int = 0) -> np.ndarray:
+    """Küresel k-means (normalize vektörlerde iç çarpım); merkezler normalize döner."""
+    rng = np.random.RandomState(seed)
+    if len(x) > _KMEANS_SAMPLE:
+        x = x[rng.choice(len(x), _KMEANS_SAMPLE, replace=False)]
+    cent = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(_KMEANS_ITERS):
+        assign = (x @ cent.T).argmax(axis=1)
+        sums = np.zeros_like(cent)
+        np.add.at(sums, assign, x)
+        empty = np.bincount(assign, minlength=k) == 0
+        sums[empty] = x[rng.choice(len(x), int(empty.sum()), replace=False)]
+        cent = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return cent.astype(np.float32)
+
+
+class IVFIndex:
+    def __init__(self, dim: int, nprobe: int = ANN_NPROBE, min_train: int = ANN_MIN_TRAIN):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self._chunks: List[np.ndarray] = []
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: Optional[List[np.ndarray]] = None
+        self.trained_size = 0
+
+    def __len__(self) -> int:
+        return len(self._vectors) + sum(len(c) for c in self._chunks)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._chunks:
+            self._vectors = np.vstack([self._vectors] + self._chunks)
+            self._chunks = []
+        return self._vectors
+
+    def train(self) -> None:
+        x = self.vectors
+        nlist = max(1, int(np.sqrt(len(x))))
+        self.centroids = _kmeans(x, nlist)
+        assign = (x @ self.centroids.T).argmax(axis=1)
+        self._lists = [[] for _ in range(nlist)]
+        for i, c in enumerate(assign):
+            self._lists[c].append(i)
+        self._list_arrays = None
+        self.trained_size = len(x)
+
+    def add(self, vectors: np.ndarray) -> np.ndarray:
+        """Normalize vektörleri ekler, atanan kimlikleri (satır numaraları) döndürür."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        start = len(self)
+        self._chunks.append(vectors)
+        n = len(self)
+        if self.centroids is None:
+            if n >= self.min_train:
+                self.train()
+        elif n >= self.trained_size * ANN_RETRAIN_FACTOR:
+            self.train()
+        else:
+            assign = (vectors @ self.centroids.T).argmax(axis=1)
+            for i, c in enumerate(assign, start):
+                self._lists[c].append(i)
+            self._list_arrays = None
+        return np.arange(start, n)
+
+    def search(self, queries: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """(skorlar, kimlikler), her ikisi (len(queries), k); eksik sonuçlar -inf / -1."""
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        x = self.vectors
+        scores = np.full((len(q), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(q), k), -1, dtype=np.int64)
+        if not len(x):
+            return scores, ids
+        if self.centroids is None:  # flat
+            sims = q @ x.T
+            kk = min(k, sims.shape[1])
+            top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+            for r in range(len(q)):
+                o = top[r][np.argsort(-sims[r, top[r]])]
+                scores[r, :kk], ids[r, :kk] = sims[r, o], o
+            return scores, ids
+        if self._list_arrays is None:
+            self._list_arrays = [np.asarray(l, dtype=np.int64) for l in self._lists]
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes = np.argpartition(-(q @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        for r in range(len(q)):
+            cand = np.concatenate([self._list_arrays[c] for c in probes[r]])
+            if not len(cand):
+                continue
+            sims = x[cand] @ q[r]
+            kk = min(k, len(cand))
+            top = np.argpartition(-sims, kk - 1)[:kk]
+            top = top[np.argsort(-sims[top])]
+            scores[r, :kk], ids[r, :kk] = sims[top], cand[top]
+        return scores, ids
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            vectors=self.vectors,
+            centroids=self.centroids if self.centroids is not None else np.zeros((0, self.dim), np.float32),
+            assign=np.concatenate([np.full(len(l), c, np.int64) for c, l in enumerate(self._lists)] or [np.zeros(0, np.int64)]),
+            order=np.concatenate([np.asarray(l, np.int64) for l in self._lists] or [np.zeros(0, np.int64)]),
+            meta=np.array([self.nprobe, self.min_train, self.trained_size]),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        z = np.load(path)
+        nprobe, min_train, trained_size = (int(v) for v in z["meta"])
+        idx = cls(z["vectors"].shape[1], nprobe=nprobe, min_train=min_train)
+        idx._vectors = z["vectors"]
+        if len(z["centroids"]):
+            idx.centroids = z["centroids"]
+            idx._lists = [[] for _ in range(len(idx.centroids))]
+            for c, i in zip(z["assign"], z["order"]):
+                idx._lists[int(c)].append(int(i))
+            idx.trained_size = trained_size
+        return idx
+
+
+class BlockIndex:
+    """Taranan sayfaların bloklarını (url, etiket, metin) embedding'leriyle indeksler."""
+
+    def __init__(self, engine=None, index: Optional[IVFIndex] = None, blocks: Optional[List[Dict]] = None):
+        if engine is None:
+            from model_registry import get_engine
+            engine = get_engine()
+        self.engine = engine
+        self.index = index
+        self.blocks: List[Dict] = blocks or []
+
+    def add_page(self, url: str, content: dict) -> int:
+        from matrix_matcher import content_blocks
+        blocks = content_blocks(content)
+        if not blocks:
+            return 0
+        vecs = self.engine.vectors([t for _, t in blocks])
+        if self.index is None:
+            self.index = IVFIndex(vecs.shape[1])
+        self.index.add(vecs)
+        self.blocks.extend({"URL": url, "HTML Bölümü": tag, "İçerik": text} for tag, text in blocks)
+        return len(blocks)
+
+    def top_k(self, queries: Sequence[str], k: int = 5, target_col: str = "Kullanıcı Sorgusu") -> pd.DataFrame:
+        """Her sorgu için en uyumlu k blok: sorgu, sıra, url, etiket, içerik, skor."""
+        cols = [target_col, "Sıra", "URL", "HTML Bölümü", "İçerik", "Benzerlik Skoru"]
+        if self.index is None or not len(queries):
+            return pd.DataFrame(columns=cols)
+        scores, ids = self.index.search(self.engine.vectors(list(queries)), k)
+        rows = []
+        for q, srow, irow in zip(queries, scores, ids):
+            for rank, (s, i) in enumerate(zip(srow, irow), 1):
+                if i >= 0:
+                    rows.append({target_col: q, "Sıra": rank, **self.blocks[i], "Benzerlik Skoru": float(s)})
+        return pd.DataFrame(rows, columns=cols)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if self.index is not None:
+            self.index.save(path + ".npz")
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            json.dump(self.blocks, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, engine=None) -> "BlockIndex":
+        if not os.path.exists(path + ".json"):
+            return cls(engine)
+        with open(path + ".json", encoding="utf-8") as f:
+            blocks = json.load(f)
+        index = IVFIndex.load(path + ".npz") if os.path.exists(path + ".npz") else None
+        return cls(engine, index=index, blocks=blocks)
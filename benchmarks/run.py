@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Çevrimdışı, tekrarlanabilir benchmark: kazıma çıkarımı, embedding, matris eşleştirme,
+icerik_sorgu aday skorlaması ve icerik_niyet LLM yeniden yazım döngüsü.
+- Veri: depodaki html_icerik_*_uyumu.csv, 1hafta.xlsx / 3ay.xlsx ve fixtures/ altındaki HTML.
+  Ölçekler (varsayılan 1×, 10×, 100×) satırları çoğaltır; kopyalar metne ek alarak tekrarsız
+  tutulur (embedding tekrar ayıklaması sonucu çarpıtmasın).
+- LLM: stub_ollama.StubOllama (ayarlanabilir gecikme), LLM önbelleği kapalı.
+- Embedding: küçük yerel bir SentenceTransformer (--model, HF_HUB_OFFLINE=1 ile yalnızca yerel
+  kopya kullanılır) ya da --model hash (bağımlılıksız, deterministik sahte model). Disk önbelleği
+  kapalıdır; her tekrar soğuk bellekle başlar. Model yükleme süresi ölçüme dahil değildir.
+- Sonuç: aşama × ölçek başına süre (min/medyan/maks), satır/sn ve ölçüm katmanının (metrics.py)
+  gecikme histogramları; JSON olarak benchmarks/sonuclar/ altına yazılır.
+Kullanım:
+    python benchmarks/run.py                                  # tüm aşamalar, 1/10/100×
+    python benchmarks/run.py --stages embed,match --scales 1,10 --model hash
+    python benchmarks/run.py --llm-latency 0.2 --karsilastir benchmarks/sonuclar/onceki.json
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KOK)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+ASAMALAR = ("scrape_extract", "embed", "match", "sorgu_candidates", "niyet_rewrite")
+BENCH_ST_MODEL = os.getenv("BENCH_ST_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+
+
+class HashModel:
+    """SentenceTransformer.encode arayüzünde kelime-hash'i embedding'i (model indirmeden ölçüm için)."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def encode(self, texts, batch_size: int = 64, normalize_embeddings: bool = True, **kwargs):
+        import numpy as np
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            for w in str(t).lower().split():
+                out[i, int(hashlib.md5(w.encode("utf-8")).hexdigest()[:8], 16) % self.dim] += 1.0
+        out += 1e-3
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out
+
+
+# ----------------------------- #
+# Veri
+# ----------------------------- #
+def _kopya(text: str, j: int) -> str:
+    return text if j == 0 else f"{text} ({j})"
+
+
+def cogalt(df, k: int, kolon: str = "İçerik"):
+    """Tabloyu k kez çoğaltır; j. kopyada `kolon` metnine "(j)" eklenir."""
+    import pandas as pd
+    parts = []
+    for j in range(k):
+        d = df.copy()
+        d[kolon] = [_kopya(str(t), j) for t in d[kolon]]
+        parts.append(d)
+    return pd.concat(parts, ignore_index=True)
+
+
+def sorgular() -> List[str]:
+    """Analizdeki varsayılan seçim (top_n) depodaki iki dönem üzerinden."""
+    from query_store import sorgulari_getir
+    return sorgulari_getir("top_n", paths=[os.path.join(KOK, "1hafta.xlsx"), os.path.join(KOK, "3ay.xlsx")])
+
+
+def bloklar() -> List[Tuple[str, str]]:
+    """Kayıtlı CSV'deki tekrarsız (etiket, içerik) blokları."""
+    import pandas as pd
+    df = pd.read_csv(os.path.join(KOK, "html_icerik_sorgu_uyumu.csv"), encoding="utf-8")
+    df = df.dropna(subset=["İçerik"]).drop_duplicates(subset=["HTML Bölümü", "İçerik"])
+    return list(zip(df["HTML Bölümü"].astype(str), df["İçerik"].astype(str)))
+
+
+def icerik(k: int) -> dict:
+    """Blokları k kez çoğaltıp extract_structured şemasında sayfa içeriği kurar."""
+    alan = {"h1": ("headings", "h1"), "h2": ("headings", "h2"), "h3": ("headings", "h3"),
+            "p": ("paragraphs", None), "div": ("div_texts", None), "li": ("lists", None),
+            "strong": ("emphasis", "strong")}
+    c: Dict = {"title": "", "meta_description": "", "headings": {"h1": [], "h2": [], "h3": []},
+               "paragraphs": [], "div_texts": [], "lists": [], "emphasis": {"strong": [], "em": []}}
+    for j in range(k):
+        for tag, text in bloklar():
+            if tag == "meta":
+                if j == 0:
+                    c["meta_description"] = text
+                continue
+            ana, alt = alan.get(tag, ("div_texts", None))
+            (c[ana][alt] if alt else c[ana]).append(_kopya(text, j))
+    return c
+
+
+def sayfa_html(k: int) -> str:
+    """fixtures/statik_sayfa.html gövdesi k kez tekrarlanmış sayfa."""
+    with open(os.path.join(KOK, "fixtures", "statik_sayfa.html"), encoding="utf-8") as f:
+        html = f.read()
+    bas, son = html.index("<body"), html.index("</body>")
+    bas = html.index(">", bas) + 1
+    govde = html[bas:son]
+    return html[:bas] + "".join(govde.replace("</p>", f" ({j})</p>") if j else govde
+                                for j in range(k)) + html[son:]
+
+
+# ----------------------------- #
+# Aşamalar: hazırla(k) -> (satır sayısı, çalıştır)
+# ----------------------------- #
+def _scrape_extract(k: int):
+    from content_normalizer import normalize_content
+    from html_extract import build_result, extract_raw
+    html = sayfa_html(k)
+    sayfa = 50  # fixture küçük: ölçek başına 50 sayfa işlenir
+    n_blok = len(build_result(extract_raw(html, "https://ornek.com/"), "https://ornek.com/")["blocks"])
+
+    def calis():
+        for _ in range(sayfa):
+            normalize_content(build_result(extract_raw(html, "https://ornek.com/"), "https://ornek.com/"))
+    return n_blok * sayfa, calis
+
+
+def _embed(k: int):
+    from embedding_engine import EmbeddingEngine
+    from model_registry import get_model
+    texts = [t for _, t in bloklar()]
+    texts = [_kopya(t, j) for j in range(k) for t in texts]
+    model = get_model()
+
+    def calis():
+        EmbeddingEngine(model).add(texts)  # önbelleksiz, boş motor: her metin encode edilir
+    return len(texts), calis
+
+
+def _match(k: int):
+    import pandas as pd
+    from matrix_matcher import content_blocks, tam_niyet_uyum_tablosu, tam_sorgu_uyum_tablosu
+    from model_registry import get_engine
+    c = icerik(k)
+    sq = sorgular()
+    niyetler = pd.read_csv(os.path.join(KOK, "html_icerik_niyet_uyumu.csv"))["Kullanıcı Niyeti"].dropna().unique().tolist()
+
+    def calis():
+        get_engine().retain([])  # soğuk başlangıç
+        tam_sorgu_uyum_tablosu(c, sq)
+        tam_niyet_uyum_tablosu(c, niyetler)
+    return len(content_blocks(c)) * (len(sq) + len(niyetler)), calis
+
+
+def _sorgu_candidates(k: int):
+    import pandas as pd
+    import icerik_sorgu_uyumu_iylestirme as sorgu_iyi
+    from model_registry import get_engine
+    df = pd.read_csv(os.path.join(KOK, "html_icerik_sorgu_uyumu.csv"), encoding="utf-8")
+    cand = cogalt(sorgu_iyi.secili_satirlar(df), k)
+
+    def calis():
+        get_engine().retain([])
+        sorgu_iyi.iyilestir(cand, workers=1)
+    return len(cand), calis
+
+
+def _niyet_rewrite(k: int, limit: int):
+    import pandas as pd
+    import icerik_niyet_iylestirme as niyet_iyi
+    from model_registry import get_engine
+    df = pd.read_csv(os.path.join(KOK, "html_icerik_niyet_uyumu.csv"), encoding="utf-8")
+    work = cogalt(niyet_iyi.secili_satirlar(df).head(limit), k)
+
+    def calis():
+        get_engine().retain([])
+        niyet_iyi.iyilestir(work)
+    return len(work), calis
+
+
+# ----------------------------- #
+# Ölçüm
+# ----------------------------- #
+def olc(ad: str, k: int, hazirla: Callable, tekrar: int, sessiz: bool) -> dict:
+    from metrics import METRICS
+    satir, calis = hazirla(k)
+    sureler = []
+    for _ in range(tekrar):
+        METRICS.sifirla()
+        out = io.StringIO() if sessiz else None
+        with contextlib.redirect_stdout(out) if out is not None else contextlib.nullcontext():
+            t0 = time.perf_counter()
+            calis()
+            sureler.append(time.perf_counter() - t0)
+    rapor = METRICS.rapor()  # son tekrarın sayaç ve histogramları
+    medyan = statistics.median(sureler)
+    return {
+        "stage": ad, "scale": k, "rows": satir, "repeat": tekrar,
+        "seconds": {"min": round(min(sureler), 6), "median": round(medyan, 6), "max": round(max(sureler), 6)},
+        "rows_per_sec": round(satir / medyan, 3) if medyan > 0 else None,
+        "ms_per_row": round(medyan * 1000 / satir, 4) if satir else None,
+        "counters": rapor["counters"],
+        "gauges": rapor["gauges"],
+        "histograms": rapor["histograms"],
+    }
+
+
+def _git_surumu() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=KOK, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def karsilastir(onceki: dict, simdiki: dict) -> None:
+    eski = {(r["stage"], r["scale"]): r for r in onceki["results"]}
+    print(f"\n{'aşama':<18}{'ölçek':>6}{'önceki sn':>12}{'şimdiki sn':>12}{'hızlanma':>10}")
+    for r in simdiki["results"]:
+        o = eski.get((r["stage"], r["scale"]))
+        if o is None:
+            continue
+        a, b = o["seconds"]["median"], r["seconds"]["median"]
+        print(f"{r['stage']:<18}{r['scale']:>5}×{a:>12.4f}{b:>12.4f}{(a / b if b else float('nan')):>9.2f}×")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Muvera çevrimdışı benchmark")
+    ap.add_argument("--stages", default=",".join(ASAMALAR), help="virgülle: " + ",".join(ASAMALAR))
+    ap.add_argument("--scales", default="1,10,100", help="satır çoğaltma katsayıları")
+    ap.add_argument("--repeat", type=int, default=3, help="her ölçüm kaç kez tekrarlanır (medyan raporlanır)")
+    ap.add_argument("--model", default=BENCH_ST_MODEL, help="yerel SentenceTransformer adı/yolu ya da 'hash'")
+    ap.add_argument("--llm-latency", type=float, default=0.05, help="stub Ollama istek gecikmesi (sn)")
+    ap.add_argument("--llm-jitter", type=float, default=0.0)
+    ap.add_argument("--llm-concurrency", type=int, default=4)
+    ap.add_argument("--llm-malformed", type=float, default=0.0, help="stub'ın bozuk JSON döndürme oranı")
+    ap.add_argument("--niyet-limit", type=int, default=20, help="niyet_rewrite için 1× satır sayısı")
+    ap.add_argument("--out", default=None, help="JSON çıktı yolu (varsayılan: benchmarks/sonuclar/<zaman>.json)")
+    ap.add_argument("--karsilastir", default=None, help="önceki sonuç JSON'u ile karşılaştır")
+    ap.add_argument("-v", "--verbose", action="store_true", help="aşamaların çıktısını da göster")
+    args = ap.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    bilinmeyen = set(stages) - set(ASAMALAR)
+    if bilinmeyen:
+        ap.error(f"bilinmeyen aşama: {sorted(bilinmeyen)}")
+    scales = [int(s) for s in args.scales.split(",")]
+
+    from stub_ollama import StubOllama
+    stub = StubOllama(latency=args.llm_latency, jitter=args.llm_jitter,
+                      malformed_rate=args.llm_malformed).start()
+    # Depo modülleri ortam değişkenlerini import anında okur: ayarlar importlardan önce yapılır
+    os.environ.update({
+        "OLLAMA_HOST": stub.host, "LLM_CACHE": "0", "EMBED_CACHE": "0", "HF_HUB_OFFLINE": "1",
+        "ST_MODEL_NAME": args.model, "LLM_CONCURRENCY": str(args.llm_concurrency), "METRICS": "1",
+    })
+    import model_registry
+    if args.model == "hash":
+        model_registry.register_model("hash", HashModel())
+    t0 = time.perf_counter()
+    model_registry.get_model()
+    model_yukleme = time.perf_counter() - t0
+
+    hazirlayicilar = {
+        "scrape_extract": _scrape_extract, "embed": _embed, "match": _match,
+        "sorgu_candidates": _sorgu_candidates,
+        "niyet_rewrite": lambda k: _niyet_rewrite(k, args.niyet_limit),
+    }
+    sonuc = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": _git_surumu(),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "model": args.model, "model_load_sec": round(model_yukleme, 3),
+            "llm_latency": args.llm_latency, "llm_jitter": args.llm_jitter,
+            "llm_concurrency": args.llm_concurrency, "llm_malformed": args.llm_malformed, "niyet_limit": args.niyet_limit,
+            "scales": scales, "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    try:
+        for ad in stages:
+            for k in scales:
+                r = olc(ad, k, hazirlayicilar[ad], args.repeat, sessiz=not args.verbose)
+                sonuc["results"].append(r)
+                print(f"{ad:<18}{k:>5}×  {r['rows']:>8} satır  {r['seconds']['median']:>9.4f} sn  "
+                      f"{r['rows_per_sec']:>12} satır/sn")
+    finally:
+        stub.stop()
+    sonuc["meta"]["stub_requests"] = stub.requests
+
+    out = args.out or os.path.join(KOK, "benchmarks", "sonuclar", time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(sonuc, f, ensure_ascii=False, indent=2)
+    print(f"\nSonuçlar: {out}")
+    if args.karsilastir:
+        with open(args.karsilastir, encoding="utf-8") as f:
+            karsilastir(json.load(f), sonuc)
+
+
+if __name__ == "__main__":
+    main()
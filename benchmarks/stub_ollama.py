@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark için sahte (stub) Ollama sunucusu: gerçek model yerine ayarlanabilir gecikmeyle
+deterministik cevaplar döner, ağ/GPU gerekmez.
+- POST /api/generate: niyet_prompt girdisinden (Kullanıcı Niyeti / Mevcut İçerik / HTML Bölümü)
+  geçerli JSON üretir; stream=true ise NDJSON parçaları halinde akıtır.
+- POST /api/chat: intent_classifier için sorgudan kısa bir niyet ifadesi.
+- GET /api/tags, /api/version: istemci sağlık kontrolleri.
+Gecikme: latency + [0, jitter) arası rastgele ek (seed ile tekrarlanabilir); error_rate oranında 503.
+malformed_rate oranında /api/generate cevabı bozulur (kod bloğu + açıklama, sondaki virgül ya da
+yarıda kesilme); llm_json onarım yolunu ölçmek içindir. İstek `format` alanı yok sayılır.
+Kullanım:
+    python benchmarks/stub_ollama.py --port 11435 --latency 0.2
+    OLLAMA_HOST=http://127.0.0.1:11435 python icerik_niyet_iylestirme.py
+    with StubOllama(latency=0.05) as stub: os.environ["OLLAMA_HOST"] = stub.host
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+_ALAN = r'{}: "(.*?)"\n'
+
+
+def _alan(prompt: str, ad: str) -> Optional[str]:
+    m = re.search(_ALAN.format(re.escape(ad)), prompt, flags=re.S)
+    return m.group(1) if m else None
+
+
+def yeniden_yaz(prompt: str) -> str:
+    """niyet_prompt çıktı biçiminde JSON; geliştirilmiş içerik = mevcut içerik + niyet ifadesi."""
+    niyet = _alan(prompt, "Kullanıcı Niyeti")
+    icerik = _alan(prompt, "Mevcut İçerik")
+    if niyet is None or icerik is None:
+        return "Tamam."
+    return json.dumps({
+        "Kullanıcı Niyeti": niyet,
+        "Mevcut İçerik": icerik,
+        "Geliştirilmiş İçerik": f"{icerik.rstrip('.')}; {niyet} için kısa bir yanıt sunar.",
+        "HTML Bölümü": _alan(prompt, "HTML Bölümü") or "p",
+    }, ensure_ascii=False)
+
+
+def boz(text: str, rng: random.Random) -> str:
+    """Modellerin tipik JSON hataları."""
+    tur = rng.randrange(3)
+    if tur == 0:
+        return f"Tabii, işte sonuç:\n```json\n{text}\n```\nUmarım yardımcı olur."
+    if tur == 1:
+        return text[:-1].rstrip() + ",\n}"
+    return text[: max(1, int(len(text) * 0.9))]
+
+
+def niyet_ifadesi(prompt: str) -> str:
+    m = re.search(r'arama sorgusunu yazdı: "(.*?)"', prompt)
+    kelimeler = (m.group(1) if m else prompt).split()[:4]
+    return " ".join(kelimeler + ["bilgisi"])
+
+
+class StubOllama:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0, seed: int = 0, malformed_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.malformed = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        h, p = self._server.server_address[:2]
+        return f"http://{h}:{p}"
+
+    def _gecikme(self) -> Optional[float]:
+        """Bu istek için bekleme süresi; None ise istek 503 ile reddedilir."""
+        with self._lock:
+            self.requests += 1
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.errors += 1
+                return None
+            return self.latency + (self._rng.random() * self.jitter if self.jitter else 0.0)
+
+    def _bozulsun_mu(self, text: str) -> str:
+        with self._lock:
+            if not self.malformed_rate or self._rng.random() >= self.malformed_rate:
+                return text
+            self.malformed += 1
+            return boz(text, self._rng)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _json(self, body: dict, status: int = 200) -> None:
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _ndjson(self, parcalar, son: dict) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for p in list(parcalar) + [son]:
+                    line = (json.dumps(p, ensure_ascii=False) + "\n").encode("utf-8")
+                    self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def do_GET(self) -> None:
+                if self.path == "/api/tags":
+                    self._json({"models": [{"name": "stub:latest", "model": "stub:latest"}]})
+                elif self.path == "/api/version":
+                    self._json({"version": "0.0.0-stub"})
+                else:
+                    self._json({"error": "not found"}, 404)
+
+            def do_POST(self) -> None:
+                n = int(self.headers.get("Content-Length") or 0)
+                req = json.loads(self.rfile.read(n) or b"{}")
+                bekle = stub._gecikme()
+                if bekle is None:
+                    self._json({"error": "stub: geçici hata"}, 503)
+                    return
+                time.sleep(bekle)
+                model = req.get("model", "stub")
+                if self.path == "/api/generate":
+                    text = stub._bozulsun_mu(yeniden_yaz(req.get("prompt", "")))
+                    tamam = {"model": model, "created_at": "", "response": "", "done": True,
+                             "done_reason": "stop", "eval_count": len(text.split()),
+                             "total_duration": int(bekle * 1e9)}
+                    if req.get("stream", True):
+                        parcalar = [{"model": model, "created_at": "", "response": t, "done": False}
+                                    for t in re.findall(r"\S+\s*", text)]
+                        self._ndjson(parcalar, tamam)
+                    else:
+                        self._json({**tamam, "response": text})
+                elif self.path == "/api/chat":
+                    messages = req.get("messages") or [{}]
+                    text = niyet_ifadesi(messages[-1].get("content", ""))
+                    body = {"model": model, "created_at": "", "done": True, "done_reason": "stop",
+                            "message": {"role": "assistant", "content": text}}
+                    if req.get("stream", False):
+                        self._ndjson([], body)
+                    else:
+                        self._json(body)
+                else:
+                    self._json({"error": "not found"}, 404)
+
+        return Handler
+
+    def start(self) -> "StubOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubOllama":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Sahte Ollama sunucusu (benchmark)")
+    ap.add_argument("--port", type=int, default=11435)
+    ap.add_argument("--latency", type=float, default=0.05, help="istek başına sabit gecikme (sn)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="ek rastgele gecikme üst sınırı (sn)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="503 dönen isteklerin oranı")
+    ap.add_argument("--malformed-rate", type=float, default=0.0, help="bozuk JSON dönen isteklerin oranı")
+    args = ap.parse_args()
+    stub = StubOllama(args.latency, args.jitter, args.error_rate, port=args.port,
+                      malformed_rate=args.malformed_rate).start()
+    print(f"Stub Ollama: {stub.host} (gecikme {args.latency}+{args.jitter} sn)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
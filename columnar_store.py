@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Ara sonuçlar için sütunlu (Parquet) depolama; CSV yalnızca dışa aktarım biçimidir.
+- Her tablo "<ad>.csv" yolunun yanında "<ad>.parquet/" klasörüdür (part-00000.parquet, ...):
+  sayfa / parça sonuçları yeni part dosyası olarak eklenir, tarama kaldığı yerden sürdürülebilir.
+- Skor kolonları (Benzerlik Skoru, Eski/Yeni Skor, Yüzde Değişim) float32, metinler string tiplidir;
+  zstd ile sıkıştırılır. İsteğe bağlı "Vektör" kolonu float32 sabit boyutlu listedir.
+- Bir tablonun tüm parçaları ilk parçanın şemasıyla yazılır (bir parçada int, diğerinde NaN'lı
+  float ya da tamamen boş kolon olsa da parçalar birleştirilebilir kalır).
+- Okuma bellek eşlemeli (memory_map) yapılır; vektörler kopyasız NumPy görünümü olarak alınır.
+- Parquet yoksa ya da CSV daha yeniyse (elle düzenlenmiş) CSV okunur ve sayısal temizlik
+  (%, virgül) yalnızca burada, bir kez yapılır; tüketiciler tipli kolonlar alır.
+Kullanım:
+    tablo_yaz(df, "html_icerik_sorgu_uyumu.csv")    # parquet + CSV dışa aktarımı
+    df = tablo_oku("html_icerik_sorgu_uyumu.csv")   # tipli DataFrame
+"""
+
+import glob
+import os
+import shutil
+from typing import AbstractSet, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from metrics import say, span
+
+# STORE_CSV_EXPORT=0: yalnızca Parquet yazılır (CSV dışa aktarımı atlanır)
+STORE_CSV_EXPORT = os.getenv("STORE_CSV_EXPORT", "1") == "1"
+# STORE_EMBEDDINGS=1: akışlı hatta blok vektörleri de "icerik_bloklari" tablosuna yazılır
+STORE_EMBEDDINGS = os.getenv("STORE_EMBEDDINGS", "0") == "1"
+STORE_COMPRESSION = os.getenv("STORE_COMPRESSION", "zstd")
+
+SKOR_KOLONLARI = ("Benzerlik Skoru", "Eski Skor", "Yeni Skor", "Yüzde Değişim")
+VEKTOR_KOLONU = "Vektör"
+
+
+def parquet_yolu(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def _parcalar(path: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(path, "part-*.parquet")))
+
+
+def sayisal(s: pd.Series) -> pd.Series:
+    """Metin skorları ("%71,2", "0.65") float32'ye çevirir; sayı içermeyenler NaN olur."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype(np.float32)
+    raw = (s.astype(str)
+           .str.replace("%", "", regex=False)
+           .str.replace(",", ".", regex=False)
+           .str.extract(r"([-+]?\d*\.?\d+)", expand=False))
+    return pd.to_numeric(raw, errors="coerce").astype(np.float32)
+
+
+def _arrow_tablosu(df: pd.DataFrame, vectors: Optional[np.ndarray] = None) -> pa.Table:
+    arrays, names = [], []
+    for col in df.columns:
+        s = df[col]
+        if col in SKOR_KOLONLARI:
+            arr = pa.array(sayisal(s).to_numpy(), type=pa.float32())
+        elif pd.api.types.is_integer_dtype(s):
+            arr = pa.array(s.to_numpy(), type=pa.int64())
+        elif pd.api.types.is_float_dtype(s):
+            arr = pa.array(s.to_numpy(), type=pa.float64(), from_pandas=True)  # NaN -> null
+        else:
+            arr = pa.array([None if pd.isna(v) else str(v) for v in s], type=pa.string())
+        arrays.append(arr)
+        names.append(str(col))
+    if vectors is not None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        dim = vectors.shape[1] if vectors.ndim == 2 else 0
+        arrays.append(pa.FixedSizeListArray.from_arrays(pa.array(vectors.ravel(), type=pa.float32()), dim))
+        names.append(VEKTOR_KOLONU)
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def _semaya_cevir(table: pa.Table, sema: pa.Schema) -> pa.Table:
+    """Parçayı tablonun sabit şemasına çevirir; eksik kolonlar null, fazlalar sonda kalır."""
+    arrays, names = [], []
+    for field in sema:
+        if field.name in table.column_names:
+            col = table[field.name]
+            if col.type != field.type:
+                try:
+                    col = col.cast(field.type)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                    raise ValueError(f"{field.name}: {col.type} -> {field.type} dönüştürülemedi ({e})") from e
+        else:
+            col = pa.nulls(table.num_rows, type=field.type)
+        arrays.append(col)
+        names.append(field.name)
+    for name in table.column_names:
+        if name not in sema.names:
+            arrays.append(table[name])
+            names.append(name)
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+class TabloYazici:
+    """Bir tabloya parça parça yazar: her yaz() yeni bir part dosyası (+ CSV'ye ekleme) üretir."""
+
+    def __init__(self, csv_path: str, yeni: bool = True, csv_export: bool = STORE_CSV_EXPORT):
+        self.csv_path = csv_path
+        self.path = parquet_yolu(csv_path)
+        self.csv_export = csv_export
+        self.yeni = yeni
+        self.satir = 0
+        self.sema: Optional[pa.Schema] = None  # ilk dolu parçanın şeması; sonraki parçalar buna çevrilir
+        self._bos = False  # şu ana kadar yalnızca boş parça yazıldı (tipler henüz belli değil)
+
+    def yaz(self, df: pd.DataFrame, vectors: Optional[np.ndarray] = None) -> None:
+        if df.empty and not self.yeni:
+            return
+        if self.yeni and os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        os.makedirs(self.path, exist_ok=True)
+        mevcut = _parcalar(self.path)
+        if self.sema is None and mevcut:  # var olan tabloya ekleme (ör. devam eden tarama)
+            self.sema = pq.read_schema(mevcut[0])
+            self._bos = all(pq.read_metadata(p).num_rows == 0 for p in mevcut)
+        table = _arrow_tablosu(df, vectors)
+        if self.sema is None or (self._bos and table.num_rows):
+            for p in mevcut:  # önceki boş parçalar bu şemayla yeniden yazılır
+                pq.write_table(table.schema.empty_table(), p, compression=STORE_COMPRESSION)
+            self.sema = table.schema
+            self._bos = table.num_rows == 0
+        else:
+            table = _semaya_cevir(table, self.sema)
+        # CSV önce yazılır: parquet her zaman CSV'den yeni kalır (bkz. tablo_oku)
+        if self.csv_export:
+            with span("io.write.csv"):
+                df.to_csv(self.csv_path, index=False, mode="w" if self.yeni else "a",
+                          header=self.yeni, encoding="utf-8")
+        part = os.path.join(self.path, f"part-{len(mevcut):05d}.parquet")
+        with span("io.write.parquet"):
+            pq.write_table(table, part, compression=STORE_COMPRESSION)
+        say("io.rows_written", len(df))
+        self.yeni = False
+        self.satir += len(df)
+
+
+def tablo_yaz(df: pd.DataFrame, csv_path: str, vectors: Optional[np.ndarray] = None,
+              csv_export: bool = STORE_CSV_EXPORT) -> None:
+    """Tabloyu baştan yazar (parquet + isteğe bağlı CSV)."""
+    TabloYazici(csv_path, yeni=True, csv_export=csv_export).yaz(df, vectors)
+
+
+def satir_ayikla(csv_path: str, kolon: str, tut: AbstractSet[str]) -> int:
+    """
+    `kolon` değeri `tut` içinde olmayan satırları siler (ör. devam eden taramada yarıda kalmış sayfalar);
+    yalnızca etkilenen parçalar yeniden yazılır. Silinen satır sayısını döndürür.
+    """
+    parts = _parcalar(parquet_yolu(csv_path))
+    degerler = pa.array(sorted(tut), type=pa.string())
+    yeni = {}
+    for p in parts:
+        table = pq.read_table(p)
+        if kolon not in table.column_names or not table.num_rows:
+            continue
+        maske = pc.is_in(table[kolon], value_set=degerler)
+        if pc.all(maske).as_py():
+            continue
+        yeni[p] = table.filter(maske)
+    silinen = sum(pq.read_metadata(p).num_rows - t.num_rows for p, t in yeni.items())
+    # CSV önce yazılır: parquet her zaman CSV'den yeni kalır (bkz. tablo_oku). CSV ayrıca süzülür:
+    # yaz() CSV'ye ekleyip parquet parçasını yazamadan kesilmiş olabilir
+    if os.path.exists(csv_path):
+        df = pd.read_csv(csv_path, dtype=str, keep_default_na=False, encoding="utf-8")
+        if kolon in df.columns and not df[kolon].isin(tut).all():
+            df[df[kolon].isin(tut)].to_csv(csv_path, index=False, encoding="utf-8")
+            if parts and not yeni:  # en az bir parça CSV'den sonra yazılır
+                yeni[parts[-1]] = pq.read_table(parts[-1])
+    for p, table in yeni.items():
+        tmp = p + ".tmp"
+        pq.write_table(table, tmp, compression=STORE_COMPRESSION)
+        os.replace(tmp, p)
+    say("io.rows_dropped", silinen)
+    return silinen
+
+
+def _guncel_parquet(csv_path: str) -> Optional[List[str]]:
+    parts = _parcalar(parquet_yolu(csv_path))
+    if not parts:
+        return None
+    if os.path.exists(csv_path) and os.path.getmtime(csv_path) > max(os.path.getmtime(p) for p in parts):
+        return None  # CSV sonradan değişmiş
+    return parts
+
+
+def tablo_surumu(csv_path: str) -> Optional[str]:
+    """Tablonun sürümü (en yeni mtime + toplam boyut; parquet parçaları ve CSV); tablo yoksa None."""
+    files = _parcalar(parquet_yolu(csv_path)) + ([csv_path] if os.path.exists(csv_path) else [])
+    if not files:
+        return None
+    st = [os.stat(f) for f in files]
+    return f"{max(s.st_mtime_ns for s in st)}-{sum(s.st_size for s in st)}"
+
+
+def arrow_oku(csv_path: str, columns: Optional[Sequence[str]] = None) -> Optional[pa.Table]:
+    """Parquet parçalarını bellek eşlemeli okur; güncel parquet yoksa None."""
+    parts = _guncel_parquet(csv_path)
+    if parts is None:
+        return None
+    tables = [pq.read_table(p, columns=list(columns) if columns else None, memory_map=True) for p in parts]
+    # Sabit şemadan önce yazılmış tablolar için: int/float ve null kolonlar ortak tipe yükseltilir
+    return pa.concat_tables(tables, promote_options="permissive") if len(tables) > 1 else tables[0]
+
+
+def tablo_oku(csv_path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Tipli DataFrame: skor kolonları float32. Vektör kolonu için vektorler() kullanın."""
+    with span("io.read"):
+        return _tablo_oku(csv_path, columns)
+
+
+def _tablo_oku(csv_path: str, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    table = arrow_oku(csv_path, columns)
+    if table is not None:
+        if VEKTOR_KOLONU in table.column_names:
+            table = table.drop([VEKTOR_KOLONU])
+        return table.to_pandas()
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Tablo bulunamadı: {csv_path} / {parquet_yolu(csv_path)}")
+    df = pd.read_csv(csv_path, encoding="utf-8", usecols=list(columns) if columns else None)
+    for col in SKOR_KOLONLARI:
+        if col in df.columns:
+            df[col] = sayisal(df[col])
+    return df
+
+
+def vektorler(csv_path: str) -> Optional[np.ndarray]:
+    """"Vektör" kolonu (satır, boyut) float32 olarak; tek parça varsa kopyasız görünümdür."""
+    parts = _guncel_parquet(csv_path)
+    if parts is None or VEKTOR_KOLONU not in pq.read_schema(parts[0]).names:
+        return None
+    table = arrow_oku(csv_path, [VEKTOR_KOLONU])
+    col = table.column(VEKTOR_KOLONU)
+    arr = col.chunk(0) if col.num_chunks == 1 else col.combine_chunks()
+    dim = arr.type.list_size
+    flat = arr.values.to_numpy(zero_copy_only=False)  # null'suz float32: kopyasız
+    return flat[arr.offset * dim:(arr.offset + len(arr)) * dim].reshape(-1, dim)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Tarama ile eşleştirme arasındaki içerik normalizasyonu.
+get_elements_text("div") iç içe her <div>'in metnini verdiği için aynı paragraflar defalarca tekrar eder.
+Bu aşama content["blocks"] (etiket + DOM yolu + metin) üzerinden:
+  1) Kapsayıcıları sadeleştirir: bir div/li'nin metni alt bloklarının metinleriyle tamamen
+     karşılanıyorsa atılır; kendi metni varsa yalnızca o artık (residual) metin tutulur.
+  2) Birebir tekrarları (normalize metin hash'i) atar.
+  3) Neredeyse aynı blokları (kelime shingle'ları üzerinde MinHash + LSH) atar.
+Tekrarlarda daha özgül etiket (h1 > h2 > h3 > p > li > div) ve belge sırasında önce gelen korunur.
+normalize_content(content) aynı şemada yeni bir sözlük döndürür; embedding ve LLM işi
+DOM iç içeliğiyle değil benzersiz içerikle ölçeklenir.
+"""
+
+import hashlib
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+NORM_MIN_RESIDUAL_WORDS = int(os.getenv("NORM_MIN_RESIDUAL_WORDS", "3"))
+NORM_NEAR_DUP_THRESHOLD = float(os.getenv("NORM_NEAR_DUP_THRESHOLD", "0.85"))
+
+_PRIORITY = {"h1": 0, "h2": 1, "h3": 2, "p": 3, "li": 4, "div": 5}
+_CONTAINERS = {"div", "li"}
+_NUM_PERM = 64
+_BANDS = 16  # 16 bant × 4 satır: J≈0.85 çiftleri yüksek olasılıkla aday olur
+_MERSENNE = (1 << 61) - 1
+_rng = np.random.RandomState(1234)
+_PERM_A = _rng.randint(1, 1 << 31, size=_NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=_NUM_PERM).astype(np.uint64)
+
+
+def _norm(text: str) -> str:
+    return " ".join((text or "").casefold().split())
+
+
+def _residual(text: str, child_texts: List[str]) -> str:
+    """Kapsayıcı metninden alt blok metinlerini (ilk geçişleri) çıkarır, kalanı döndürür."""
+    rest = text
+    for ct in child_texts:
+        i = rest.find(ct)
+        if i >= 0:
+            rest = rest[:i] + "\n" + rest[i + len(ct):]
+    lines = (" ".join(l.split()) for l in rest.split("\n"))
+    return "\n".join(l for l in lines if l)
+
+
+def _parent_path(path: str, index: Dict[str, dict]) -> Optional[str]:
+    """DOM yolunda yukarı çıkarak en yakın blok atasını bulur."""
+    while "/" in path:
+        path = path.rsplit("/", 1)[0]
+        if path in index:
+            return path
+    return None
+
+
+def _minhash(text: str) -> np.ndarray:
+    words = text.split()
+    shingles = {" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+    hv = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") & 0xFFFFFFFF
+         for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    # (a*x + b) mod p; x < 2^32, a,b < 2^31 → taşma yok
+    return ((np.outer(_PERM_A, hv) + _PERM_B[:, None]) % _MERSENNE).min(axis=1)
+
+
+def _collapse_containers(blocks: List[dict], min_words: int) -> List[dict]:
+    index = {b["path"]: b for b in blocks}
+    children: Dict[str, List[str]] = {}
+    for b in blocks:
+        parent = _parent_path(b["path"], index)
+        if parent is not None:
+            children.setdefault(parent, []).append(b["text"])
+
+    out = []
+    for b in blocks:
+        kids = children.get(b["path"])
+        if not kids or b["tag"] not in _CONTAINERS:
+            out.append(b)
+            continue
+        rest = _residual(b["text"], kids)
+        if len(rest.split()) >= min_words:
+            out.append(dict(b, text=rest))
+    return out
+
+
+def _dedupe(blocks: List[dict], threshold: float) -> List[dict]:
+    order = sorted(range(len(blocks)), key=lambda i: (_PRIORITY.get(blocks[i]["tag"], 9), i))
+    seen_hash = set()
+    buckets: Dict[tuple, List[int]] = {}
+    sigs: Dict[int, np.ndarray] = {}
+    keep = []
+    rows = _NUM_PERM // _BANDS
+    for i in order:
+        norm = _norm(blocks[i]["text"])
+        h = hashlib.blake2b(norm.encode("utf-8"), digest_size=16).digest()
+        if h in seen_hash:
+            continue
+        seen_hash.add(h)
+        sig = _minhash(norm)
+        bands = [(band, sig[band * rows:(band + 1) * rows].tobytes()) for band in range(_BANDS)]
+        cands = {j for key in bands for j in buckets.get(key, ())}
+        if any(np.mean(sigs[j] == sig) >= threshold for j in cands):
+            continue
+        sigs[i] = sig
+        for key in bands:
+            buckets.setdefault(key, []).append(i)
+        keep.append(i)
+    return [blocks[i] for i in sorted(keep)]
+
+
+def normalize_blocks(blocks: List[dict], min_residual_words: int = NORM_MIN_RESIDUAL_WORDS,
+                     near_threshold: float = NORM_NEAR_DUP_THRESHOLD) -> List[dict]:
+    """[{"tag","path","text"}] → kapsayıcıları sadeleşmiş, tekrarsız bloklar (belge sırasında)."""
+    return _dedupe(_collapse_containers(blocks, min_residual_words), near_threshold)
+
+
+def normalize_content(content: dict) -> dict:
+    """
+    content["blocks"] normalize edilir; headings/paragraphs/div_texts/lists bu bloklardan yeniden
+    kurulur. title, meta, emphasis, tablolar, görseller ve linkler aynen kalır.
+    "blocks" yoksa (eski çıktılar) yalnızca div_texts üzerinde tekrar ayıklaması yapılır.
+    """
+    out = dict(content)
+    if not content.get("blocks"):
+        divs = [{"tag": "div", "path": str(i), "text": t} for i, t in enumerate(content.get("div_texts", []))]
+        out["div_texts"] = [b["text"] for b in _dedupe(divs, NORM_NEAR_DUP_THRESHOLD)]
+        return out
+
+    blocks = normalize_blocks(content["blocks"])
+    by_tag: Dict[str, List[str]] = {t: [] for t in _PRIORITY}
+    for b in blocks:
+        by_tag.setdefault(b["tag"], []).append(b["text"])
+    out["headings"] = {"h1": by_tag["h1"], "h2": by_tag["h2"], "h3": by_tag["h3"]}
+    out["paragraphs"] = by_tag["p"]
+    out["div_texts"] = by_tag["div"]
+    out["lists"] = by_tag["li"]
+    out["blocks"] = blocks
+    logging.info(f"İçerik normalizasyonu: {len(content['blocks'])} blok → {len(blocks)} benzersiz blok "
+                 f"(div {len(content.get('div_texts', []))} → {len(by_tag['div'])}).")
+    return out
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Site geneli tarama (crawl).
+- Başlangıç URL'sinden itibaren result["links"]["internal"] bağlantıları genişlik öncelikli (BFS) izlenir.
+- Derinlik (max_depth) ve sayfa (max_pages) sınırları; eşzamanlılık `workers` ile sınırlıdır.
+- URL'ler kanonikleştirilir (şema/host küçük harf, fragment ve takip parametreleri atılır,
+  sondaki "/" sadeleştirilir) ve tekrar ziyaret edilmez.
+- Her sayfanın yapısal içeriği hazır oldukça (url, content) olarak dışarı akıtılır.
+- Kontrol noktası (JSON) ile kesinti sonrası kaldığı yerden devam edilebilir. Tüketiciye verilmiş ama
+  tamamlanmamış sayfalar kontrol noktasında sırada görünür; devamda yeniden taranır.
+- Sayfa, varsayılan olarak tüketici üreteci devam ettirince tamamlanır. Tüketici sayfayı başka bir
+  thread'de yazıyorsa (ör. pipeline'ın arka plan kuyrukları) `onay=Onay()` verilir ve sayfa ancak
+  yazan taraf onay(url) çağırınca tamamlanmış sayılır.
+Kullanım:
+    for url, content in crawl("https://site.com", max_pages=200, checkpoint="output/crawl.json"):
+        ...
+"""
+
+import json
+import logging
+import os
+import queue
+import re
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "100"))
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "3"))
+CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS", "4"))
+
+_TRACKING = re.compile(r"^(utm_\w+|gclid|fbclid|yclid|msclkid|_ga|mc_(cid|eid))$", re.I)
+_SKIP_EXT = re.compile(
+    r"\.(jpe?g|png|gif|webp|svg|ico|pdf|zip|rar|gz|mp4|mp3|avi|mov|docx?|xlsx?|pptx?|css|js|xml|json)$", re.I
+)
+
+
+def canonicalize(url: str) -> Optional[str]:
+    """Karşılaştırma ve tekrar ayıklama için URL'yi tek biçime indirger; taranmayacaksa None."""
+    p = urlparse((url or "").strip())
+    if p.scheme not in ("http", "https") or not p.netloc:
+        return None
+    if _SKIP_EXT.search(p.path):
+        return None
+    host = p.netloc.lower()
+    if (p.scheme == "http" and host.endswith(":80")) or (p.scheme == "https" and host.endswith(":443")):
+        host = host.rsplit(":", 1)[0]
+    path = re.sub(r"/{2,}", "/", p.path or "/")
+    if len(path) > 1 and path.endswith("/"):
+        path = path[:-1]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(p.query, keep_blank_values=True) if not _TRACKING.match(k)))
+    return urlunparse((p.scheme.lower(), host, path, "", query, ""))
+
+
+def _same_site(url: str, root_host: str) -> bool:
+    host = urlparse(url).netloc.lower()
+    strip = lambda h: h[4:] if h.startswith("www.") else h
+    return strip(host) == strip(root_host)
+
+
+class CrawlState:
+    """Sınır (frontier) ve ziyaret edilmiş URL kümesi; JSON kontrol noktasına yazılabilir."""
+
+    def __init__(self, start_url: str):
+        self.start_url = canonicalize(start_url) or start_url
+        self.frontier: Deque[Tuple[str, int]] = deque([(self.start_url, 0)])
+        self.seen: Set[str] = {self.start_url}
+        self.done: Set[str] = set()
+        self.failed: Dict[str, str] = {}
+        self.teslimde: Dict[str, int] = {}  # tüketiciye verilmiş, tamamlanmamış sayfalar -> derinlik
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = {
+            "start_url": self.start_url,
+            "frontier": list(self.teslimde.items()) + list(self.frontier),
+            "seen": sorted(self.seen),
+            "done": sorted(self.done),
+            "failed": self.failed,
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, start_url: str) -> "CrawlState":
+        state = cls(start_url)
+        if not path or not os.path.exists(path):
+            return state
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("start_url") != state.start_url:
+            logging.warning("Kontrol noktası farklı bir başlangıç URL'sine ait, sıfırdan başlanıyor.")
+            return state
+        state.done = set(data["done"])
+        state.failed = dict(data.get("failed", {}))
+        state.seen = set(data["seen"])
+        state.frontier = deque((u, int(d)) for u, d in data["frontier"])
+        logging.info(f"Kontrol noktasından devam: {len(state.done)} sayfa tamam, {len(state.frontier)} sırada.")
+        return state
+
+
+def tamamlananlar(path: Optional[str], start_url: str) -> Set[str]:
+    """Kontrol noktası bu başlangıç URL'sine aitse tamamlanmış sayfalar, değilse (ya da yoksa) boş küme."""
+    if not path or not os.path.exists(path):
+        return set()
+    return CrawlState.load(path, start_url).done
+
+
+class Onay:
+    """
+    Tüm satırları yazılan sayfaları crawl'a bildirir; herhangi bir thread'den çağrılabilir.
+    Onaylar crawl thread'inde uygulanır; crawl bittikten sonra gelenler (tüketici kuyruklarda geride
+    kalır) devret() ile verilen fonksiyonla doğrudan uygulanır.
+    """
+
+    def __init__(self):
+        self._q: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+        self._kilit = threading.Lock()
+        self._sonra: Optional[Callable[[str], None]] = None
+
+    def __call__(self, url: str) -> None:
+        with self._kilit:
+            if self._sonra is None:
+                self._q.put(url)
+            else:
+                self._sonra(url)
+
+    def devret(self, fn: Callable[[str], None]) -> None:
+        with self._kilit:
+            for url in self.al():
+                fn(url)
+            self._sonra = fn
+
+    def al(self) -> List[str]:
+        out = []
+        while True:
+            try:
+                out.append(self._q.get_nowait())
+            except queue.Empty:
+                return out
+
+
+def crawl(
+    start_url: str,
+    max_pages: int = CRAWL_MAX_PAGES,
+    max_depth: int = CRAWL_MAX_DEPTH,
+    workers: int = CRAWL_WORKERS,
+    checkpoint: Optional[str] = None,
+    fetch: Optional[Callable[[str], dict]] = None,
+    onay: Optional[Onay] = None,
+) -> Iterator[Tuple[str, dict]]:
+    """
+    BFS sırasıyla (url, content) üretir. Aynı anda en fazla `workers` sayfa taranır.
+    `fetch` verilmezse webScraping.get_structured_web_content kullanılır.
+    Kesintide (Ctrl+C dahil) kontrol noktası yazılır; aynı `checkpoint` ile tekrar çağrılınca devam eder.
+    `onay` verilirse sayfalar yalnızca onay(url) ile tamamlanır (bkz. Onay).
+    """
+    if fetch is None:
+        from webScraping import get_structured_web_content as fetch  # Selenium/requests importu gerektiğinde
+
+    state = CrawlState.load(checkpoint, start_url)
+    root_host = urlparse(state.start_url).netloc.lower()
+    running: Dict = {}
+
+    def tamamla(url: str) -> bool:
+        if state.teslimde.pop(url, None) is None:
+            return False
+        state.done.add(url)
+        return True
+
+    def onaylananlar() -> None:
+        for u in onay.al() if onay is not None else ():
+            tamamla(u)
+
+    def submit(pool: ThreadPoolExecutor) -> None:
+        while state.frontier and len(running) < workers \
+                and len(state.done) + len(state.teslimde) + len(running) < max_pages:
+            url, depth = state.frontier.popleft()
+            if url in state.done:
+                continue
+            running[pool.submit(fetch, url)] = (url, depth)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="crawl") as pool:
+            submit(pool)
+            while running:
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    url, depth = running.pop(fut)
+                    try:
+                        content = fut.result()
+                    except Exception as e:
+                        logging.warning(f"Taranamadı: {url} ({e})")
+                        state.failed[url] = str(e)
+                        state.done.add(url)
+                        continue
+                    if depth < max_depth:
+                        for link in content.get("links", {}).get("internal", []):
+                            c = canonicalize(link.get("url", ""))
+                            if c and c not in state.seen and _same_site(c, root_host):
+                                state.seen.add(c)
+                                state.frontier.append((c, depth + 1))
+                    logging.info(f"[{len(state.done) + len(state.teslimde) + 1}/{max_pages}] d={depth} {url}")
+                    state.teslimde[url] = depth
+                    yield url, content
+                    if onay is None:
+                        # Tüketici satırlarını yazıp üreteci devam ettirdi: sayfa tamam
+                        del state.teslimde[url]
+                        state.done.add(url)
+                onaylananlar()
+                if checkpoint:
+                    state.save(checkpoint)
+                submit(pool)
+    finally:
+        # Yarıda kalan sayfalar tekrar sıraya alınır (tüketicidekiler save() ile zaten sıradadır)
+        onaylananlar()
+        for url, depth in running.values():
+            state.frontier.appendleft((url, depth))
+        if checkpoint:
+            state.save(checkpoint)
+            if onay is not None:
+                onay.devret(lambda u: tamamla(u) and state.save(checkpoint))
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Yeniden kullanılabilir headless Chrome havuzu.
+- chromedriver yolu (ChromeDriverManager().install()) süreç başına bir kez çözülür.
+- En fazla `size` tarayıcı açık tutulur; eşzamanlı işler session() ile sırayla tarayıcı alır.
+- Bir tarayıcı `max_pages` sayfadan sonra ya da WebDriverException (çökme/bağlantı kopması)
+  sonrasında kapatılır, yerine gerektiğinde yenisi açılır.
+Kullanım:
+    pool = DriverPool(size=4)
+    with pool.session() as driver:
+        driver.get(url)
+"""
+
+import atexit
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+
+from selenium import webdriver # type: ignore
+from selenium.common.exceptions import WebDriverException # type: ignore
+from selenium.webdriver.chrome.options import Options # type: ignore
+from selenium.webdriver.chrome.service import Service # type: ignore
+from webdriver_manager.chrome import ChromeDriverManager # type: ignore
+
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))
+DRIVER_MAX_PAGES = int(os.getenv("DRIVER_MAX_PAGES", "50"))
+DRIVER_PAGE_LOAD_TIMEOUT = int(os.getenv("DRIVER_PAGE_LOAD_TIMEOUT", "30"))
+
+_driver_path: Optional[str] = None
+_path_lock = threading.Lock()
+
+
+def _resolve_driver_path() -> str:
+    """ChromeDriverManager ağ/disk kontrolünü süreçte yalnızca bir kez yapar."""
+    global _driver_path
+    with _path_lock:
+        if _driver_path is None:
+            _driver_path = os.getenv("CHROMEDRIVER_PATH") or ChromeDriverManager().install()
+            logging.info(f"chromedriver: {_driver_path}")
+        return _driver_path
+
+
+def _chrome_options() -> Options:
+    options = Options()
+    options.add_argument("--headless")  # Arka planda çalıştır
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return options
+
+
+class _Browser:
+    __slots__ = ("driver", "pages")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class DriverPool:
+    def __init__(self, size: int = DRIVER_POOL_SIZE, max_pages: int = DRIVER_MAX_PAGES):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle: List[_Browser] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.launched = 0
+        self.recycled = 0
+        self.crashed = 0
+
+    def _launch(self) -> _Browser:
+        driver = webdriver.Chrome(service=Service(_resolve_driver_path()), options=_chrome_options())
+        driver.set_page_load_timeout(DRIVER_PAGE_LOAD_TIMEOUT)
+        with self._lock:
+            self.launched += 1
+        logging.info(f"Chrome başlatıldı (toplam {self.launched}).")
+        return _Browser(driver)
+
+    @staticmethod
+    def _quit(browser: _Browser) -> None:
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+
+    def warm(self, n: Optional[int] = None) -> None:
+        """`n` (varsayılan: size) tarayıcıyı önceden açıp boşta bekletir."""
+        n = min(self.size, n or self.size)
+        with self._lock:
+            missing = n - len(self._idle)
+        for _ in range(max(0, missing)):
+            browser = self._launch()
+            with self._lock:
+                self._idle.append(browser)
+
+    @contextmanager
+    def session(self):
+        """Havuzdan bir tarayıcı verir; iş bitince geri alır ya da gerekirse geri dönüştürür."""
+        if self._closed:
+            raise RuntimeError("DriverPool kapatıldı")
+        self._slots.acquire()
+        browser = None
+        try:
+            with self._lock:
+                browser = self._idle.pop() if self._idle else None
+            if browser is None:
+                browser = self._launch()
+            try:
+                yield browser.driver
+            except WebDriverException:
+                self.crashed += 1
+                logging.warning("Tarayıcı hata verdi, kapatılıp yenisiyle değiştirilecek.")
+                self._quit(browser)
+                browser = None
+                raise
+            browser.pages += 1
+            if browser.pages >= self.max_pages or self._closed:
+                self.recycled += 1
+                self._quit(browser)
+                browser = None
+        finally:
+            if browser is not None:
+                with self._lock:
+                    self._idle.append(browser)
+            self._slots.release()
+
+    def close(self) -> None:
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for browser in idle:
+            self._quit(browser)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "launched": self.launched,
+            "recycled": self.recycled,
+            "crashed": self.crashed,
+        }
+
+
+_default_pool: Optional[DriverPool] = None
+
+
+def get_default_pool() -> DriverPool:
+    """Süreç genelinde paylaşılan havuz; süreç çıkışında tarayıcılar kapatılır."""
+    global _default_pool
+    with _path_lock:
+        if _default_pool is None:
+            _default_pool = DriverPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
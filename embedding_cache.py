@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Diskte kalıcı embedding önbelleği.
+- Anahtar: model adı + normalize edilmiş metnin hash'i (NFC + boşluk sadeleştirme).
+- Vektörler memory-mapped float32 bir matriste (vectors.f32), satır indeksleri index.json'da tutulur.
+- Boyut sınırlıdır: kapasite dolunca en uzun süre kullanılmayan (LRU) satır yeniden kullanılır.
+- hits / misses sayaçları ile değişmemiş bir sitede yeniden çalıştırmanın maliyeti izlenebilir.
+Tek yazar süreç varsayılır (aynı dizini iki süreç birlikte kullanmamalı); süreç içindeki thread'ler
+(server iş thread'leri, akışlı hat) tüm işlemleri bir kilit altında yapar.
+index çıkışta (atexit) ya da flush() ile diske yazılır; LRU tahliyesinde ise tahliye edilen satırlar
+yeniden yazılmadan ÖNCE index (geçici dosya + os.replace) kaydedilir: çökme/SIGKILL sonrasında
+index hiçbir zaman başka bir metnin vektörünü tutan satırı göstermez.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", os.path.join(".cache", "embeddings"))
+EMBED_CACHE_MAX = int(os.getenv("EMBED_CACHE_MAX", "200000"))
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE", "1") != "0"
+
+_INITIAL_ROWS = 1024
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def text_key(model_name: str, text: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalize_text(text).encode("utf-8"))
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, model_name: str, cache_dir: str = EMBED_CACHE_DIR, max_entries: int = EMBED_CACHE_MAX):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.dir = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name))
+        self.index_path = os.path.join(self.dir, "index.json")
+        self.vectors_path = os.path.join(self.dir, "vectors.f32")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self._lru: "OrderedDict[str, int]" = OrderedDict()  # anahtar -> satır (eski → yeni)
+        self._free: List[int] = []
+        self._mm: Optional[np.memmap] = None
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._load()
+        atexit.register(self.flush)
+
+    # ---- Disk ----
+    def _load(self) -> None:
+        if not os.path.exists(self.index_path) or not os.path.exists(self.vectors_path):
+            return
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        if meta.get("model") != self.model_name:
+            return
+        self.dim = int(meta["dim"])
+        self.capacity = int(meta["capacity"])
+        self._lru = OrderedDict((k, int(r)) for k, r in meta["entries"])
+        used = set(self._lru.values())
+        self._free = [r for r in range(self.capacity) if r not in used]
+        self._mm = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+
+    def _grow(self, need: int) -> None:
+        new_cap = max(self.capacity, _INITIAL_ROWS)
+        while new_cap - len(self._lru) < need and new_cap < self.max_entries:
+            new_cap *= 2
+        new_cap = min(new_cap, self.max_entries)
+        if new_cap <= self.capacity:
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        if self._mm is not None:
+            self._mm.flush()
+            del self._mm
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(new_cap * self.dim * 4)
+        self._mm = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(new_cap, self.dim))
+        self._free.extend(range(self.capacity, new_cap))
+        self.capacity = new_cap
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty or self._mm is None:
+                return
+            self._mm.flush()
+            self._index_yaz()
+            self._dirty = False
+
+    def _index_yaz(self) -> None:
+        meta = {
+            "model": self.model_name,
+            "dim": self.dim,
+            "capacity": self.capacity,
+            "entries": list(self._lru.items()),
+        }
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.index_path)
+
+    # ---- Okuma / yazma ----
+    def get_many(self, texts: Sequence[str]) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        """Önbellekte bulunanları {metin: vektör} olarak, bulunmayanları liste olarak döndürür."""
+        found: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+        with self._lock:
+            for t in texts:
+                k = text_key(self.model_name, t)
+                row = self._lru.get(k)
+                if row is None or self._mm is None:
+                    self.misses += 1
+                    missing.append(t)
+                    continue
+                self._lru.move_to_end(k)
+                self.hits += 1
+                found[t] = np.array(self._mm[row])
+            if found:
+                self._dirty = True  # LRU sırası değişti
+        return found, missing
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        if not len(texts) or self.max_entries <= 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding boyutu uyuşmuyor: {vectors.shape[1]} != {self.dim}")
+            self._grow(len(texts))
+            keys = [text_key(self.model_name, t) for t in texts]
+            # Batch'teki mevcut anahtarlar önce tazelenir: aynı batch'in yeni satırları onları tahliye etmez
+            for k in keys:
+                if k in self._lru:
+                    self._lru.move_to_end(k)
+            yeni: Dict[str, int] = {}
+            tahliye = False
+            for k in keys:
+                if k in self._lru or k in yeni:
+                    continue
+                if self._free:
+                    yeni[k] = self._free.pop()
+                else:
+                    _, yeni[k] = self._lru.popitem(last=False)  # LRU tahliye
+                    self.evictions += 1
+                    tahliye = True
+            if tahliye:
+                # Tahliye edilen anahtarlar index'ten çıkmadan satırları ezilmez (yeni anahtarlar henüz yok)
+                self._index_yaz()
+            self._lru.update(yeni)
+            for k, v in zip(keys, vectors):
+                self._mm[self._lru[k]] = v
+            self._dirty = True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._lru),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def open_cache(model_name: str) -> Optional[EmbeddingCache]:
+    """EMBED_CACHE=0 ise None döner (önbellek kapalı)."""
+    return EmbeddingCache(model_name) if EMBED_CACHE_ENABLED else None
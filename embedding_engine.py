@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Toplu (batch) embedding ve kosinüs skor motoru.
+- Bir çalıştırmadaki metinler toplanır, tekrar edenler tek kez encode edilir.
+- Encode işlemi büyük batch'lerle yapılır; vektörler normalize tek bir float32 matriste tutulur.
+- Skorlar tek matris çarpımıyla hesaplanır (normalize vektörlerde iç çarpım = kosinüs).
+- İsteğe bağlı kalıcı önbellek (embedding_cache.EmbeddingCache): encode öncesi diske bakılır.
+Kullanım:
+    engine = EmbeddingEngine(st_model)            # ya da model_registry.get_engine()
+    engine.add(tum_metinler)                      # önceden topla + encode et
+    engine.similarity_matrix(sorgular, icerikler) # (len(sorgular), len(icerikler))
+    engine.pair_scores(sol, sag)                  # satır bazında eşleşmiş çiftler
+    engine.score(a, b)                            # tek çift (önbellekten)
+    engine.encode(parca)                          # bellekte tutmadan (akış işleme)
+    engine.retain(hedefler)                       # bellekteki matrisi hedeflere indir
+Metotlar thread'ler arasında güvenle paylaşılabilir (tek kilit; encode sırayla yapılır).
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from metrics import say, span
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+
+class EmbeddingEngine:
+    def __init__(self, model=None, batch_size: int = EMBED_BATCH_SIZE, cache=None, loader=None):
+        if model is None and loader is None:
+            raise ValueError("model ya da loader verilmeli")
+        self._model = model
+        self._loader = loader  # tembel yükleme: model ilk encode'da oluşturulur
+        self.batch_size = batch_size
+        self.cache = cache
+        self._index: Dict[str, int] = {}
+        self._chunks: List[np.ndarray] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.RLock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self._loader()
+        return self._model
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, text: str) -> bool:
+        return text in self._index
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        model = self.model  # tembel model yüklemesi encode süresine sayılmaz
+        with span("embed.encode"):
+            emb = model.encode(
+                texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            )
+        say("embed.texts", len(texts))
+        return np.asarray(emb, dtype=np.float32)
+
+    def _lookup(self, new: List[str]) -> np.ndarray:
+        """Tekrarsız metinlerin vektörleri: önce disk önbelleği, eksikler encode edilir."""
+        if self.cache is None:
+            return self._encode(new)
+        found, missing = self.cache.get_many(new)
+        say("embed.cache_hits", len(found))
+        say("embed.cache_misses", len(missing))
+        if missing:
+            enc = self._encode(missing)
+            self.cache.put_many(missing, enc)
+            found.update(zip(missing, enc))
+        return np.stack([found[t] for t in new]).astype(np.float32, copy=False)
+
+    def add(self, texts: Iterable[str]) -> None:
+        """Henüz görülmemiş metinleri tekrarsız olarak tek seferde encode eder."""
+        with self._lock:
+            new: List[str] = []
+            seen = set()
+            for t in texts:
+                t = "" if t is None else str(t)
+                if t in self._index or t in seen:
+                    continue
+                seen.add(t)
+                new.append(t)
+            if not new:
+                return
+            emb = self._lookup(new)
+            start = len(self._index)
+            for i, t in enumerate(new):
+                self._index[t] = start + i
+            self._chunks.append(emb)
+            self._matrix = None
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """vectors() gibi, ancak yeni metinler bellekteki matrise eklenmez (bellek sabit kalır)."""
+        texts = ["" if t is None else str(t) for t in texts]
+        with self._lock:
+            if not texts:
+                return np.zeros((0, 0), dtype=np.float32)
+            new = list(dict.fromkeys(t for t in texts if t not in self._index))
+            fresh = dict(zip(new, self._lookup(new))) if new else {}
+            m = self.matrix
+            return np.stack([fresh[t] if t in fresh else m[self._index[t]] for t in texts])
+
+    def retain(self, texts: Iterable[str]) -> None:
+        """Bellekte yalnızca verilen metinlerin vektörlerini bırakır (disk önbelleği etkilenmez)."""
+        with self._lock:
+            keep = [t for t in dict.fromkeys("" if t is None else str(t) for t in texts) if t in self._index]
+            if len(keep) == len(self._index):
+                return
+            m = self.matrix[[self._index[t] for t in keep]] if keep else None
+            self._index = {t: i for i, t in enumerate(keep)}
+            self._chunks = [m] if m is not None else []
+            self._matrix = None
+
+    @property
+    def matrix(self) -> np.ndarray:
+        with self._lock:
+            if self._matrix is None:
+                if not self._chunks:
+                    return np.zeros((0, 0), dtype=np.float32)
+                self._matrix = np.vstack(self._chunks) if len(self._chunks) > 1 else self._chunks[0]
+                self._chunks = [self._matrix]
+            return self._matrix
+
+    def vectors(self, texts: Sequence[str]) -> np.ndarray:
+        """Metinlerin normalize vektörlerini (len(texts), dim) döndürür; eksikleri encode eder."""
+        texts = ["" if t is None else str(t) for t in texts]
+        with self._lock:
+            self.add(texts)
+            idx = np.fromiter((self._index[t] for t in texts), dtype=np.int64, count=len(texts))
+            return self.matrix[idx]
+
+    def similarity_matrix(self, left: Sequence[str], right: Sequence[str]) -> np.ndarray:
+        """Tüm (left × right) kosinüs skorları, tek matris çarpımı."""
+        with self._lock:
+            self.add(list(left) + list(right))
+            return self.vectors(left) @ self.vectors(right).T
+
+    def pair_scores(self, left: Sequence[str], right: Sequence[str]) -> np.ndarray:
+        """left[i] ile right[i] arasındaki skorlar (aynı uzunlukta diziler)."""
+        if len(left) != len(right):
+            raise ValueError(f"Uzunluklar farklı: {len(left)} != {len(right)}")
+        with self._lock:
+            self.add(list(left) + list(right))
+            return np.einsum("ij,ij->i", self.vectors(left), self.vectors(right))
+
+    def score(self, a: str, b: str) -> float:
+        return float(self.pair_scores([a], [b])[0])
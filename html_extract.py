@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+HTML'den yapısal içerik çıkarımı (tarayıcısız).
+- extract_raw(html, url): lxml ile ayrıştırır, webScraping._EXTRACT_JS ile aynı "ham" sözlüğü üretir.
+- build_result(raw, url): ham sözlüğü get_structured_web_content_selenium şemasına dönüştürür
+  (hem Selenium hem statik yol bunu kullanır).
+- raw["blocks"]: BLOCK_TAGS elemanları [etiket, XPath, metin] olarak (içerik normalizasyonu için).
+- looks_js_rendered(raw): içerik JS ile mi üretiliyor (boş body / çok az metin düğümü) sezgisi.
+Selenium gerektirmez; kayıtlı HTML fixture'ları (fixtures/*.html) üzerinde çevrimdışı denenebilir.
+"""
+
+import logging
+import os
+import re
+from typing import Dict, List
+from urllib.parse import urljoin, urlparse
+
+import lxml.etree  # type: ignore
+import lxml.html  # type: ignore
+
+STATIC_MIN_WORDS = int(os.getenv("STATIC_MIN_WORDS", "50"))
+STATIC_MIN_BLOCKS = int(os.getenv("STATIC_MIN_BLOCKS", "3"))
+
+# innerText'te görünmeyen / metin üretmeyen etiketler
+_SKIP = {"script", "style", "noscript", "template", "head", "svg", "iframe", "object"}
+# innerText'te satır sonu üreten blok etiketler
+_BLOCK = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tr", "ul",
+}
+_CELL = {"td", "th"}
+# DOM yolu (XPath) ile birlikte "blok" olarak kaydedilen etiketler (bkz. content_normalizer)
+BLOCK_TAGS = ("h1", "h2", "h3", "p", "div", "li")
+_HIDDEN_STYLE = re.compile(r"(display\s*:\s*none|visibility\s*:\s*hidden)", re.I)
+
+
+def _is_hidden(el) -> bool:
+    return (
+        el.get("hidden") is not None
+        or el.get("aria-hidden") == "true"
+        or (el.tag == "input" and (el.get("type") or "").lower() == "hidden")
+        or bool(_HIDDEN_STYLE.search(el.get("style") or ""))
+    )
+
+
+class _TextIndex:
+    """Her elemanın innerText benzeri metnini bir kez hesaplar (iç içe div'lerde tekrar yok)."""
+
+    def __init__(self):
+        # Anahtar elemanın kendisi: sözlük referansı tuttuğu için lxml proxy kimliği sabit kalır
+        self._memo: Dict[object, str] = {}
+
+    def raw(self, el) -> str:
+        cached = self._memo.get(el)
+        if cached is not None:
+            return cached
+        tag = el.tag if isinstance(el.tag, str) else None
+        if tag is None or tag in _SKIP or _is_hidden(el):  # yorum / işlem talimatı / gizli
+            out = ""
+        else:
+            parts: List[str] = [el.text or ""]
+            for child in el:
+                ctag = child.tag if isinstance(child.tag, str) else ""
+                if ctag in _BLOCK:
+                    parts.append("\n" + self.raw(child) + "\n")
+                elif ctag in _CELL:
+                    parts.append(self.raw(child) + "\t")
+                else:
+                    parts.append(self.raw(child))
+                parts.append(child.tail or "")
+            out = "".join(parts)
+        self._memo[el] = out
+        return out
+
+    def text(self, el) -> str:
+        lines = (" ".join(line.replace("\t", " ").split()) for line in self.raw(el).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+
+# lxml, kodlama bildirimi içeren str girdiyi reddeder (XHTML: <?xml ... encoding="..."?>)
+_XML_BILDIRIMI = re.compile(r"^\s*<\?xml[^>]*\?>")
+# Ayrıştırılamayan belge (boş / yalnızca yorum vb.); çağıran Selenium'a düşebilir
+AYRISTIRMA_HATALARI = (ValueError, lxml.etree.ParserError)
+
+
+def extract_raw(html, url: str) -> dict:
+    """HTML metninden (str ya da bytes) _EXTRACT_JS ile aynı anahtarlara sahip ham sözlük üretir.
+    Belge ayrıştırılamazsa AYRISTIRMA_HATALARI'ndan biri yükselir."""
+    if isinstance(html, str):
+        html = _XML_BILDIRIMI.sub("", html, count=1)
+    doc = lxml.html.fromstring(html or "<html></html>")
+    tree = doc.getroottree()
+    idx = _TextIndex()
+
+    def texts(tag: str) -> List[str]:
+        return [t for t in (idx.text(el) for el in doc.iter(tag)) if t]
+
+    def lists(tag: str) -> List[str]:
+        return [t for l in doc.iter(tag) for t in (idx.text(li) for li in l.iter("li")) if t]
+
+    base = url
+    base_el = doc.find(".//base[@href]")
+    if base_el is not None:
+        base = urljoin(url, base_el.get("href"))
+
+    title_el = doc.find(".//title")
+    meta = doc.xpath("//meta[@name='description']")
+    return {
+        "title": " ".join((title_el.text_content() if title_el is not None else "").split()),
+        "meta_description": meta[0].get("content") if meta else None,
+        "h1": texts("h1"), "h2": texts("h2"), "h3": texts("h3"),
+        "p": texts("p"), "div": texts("div"),
+        "strong": texts("strong"), "em": texts("em"),
+        "ul": lists("ul"), "ol": lists("ol"),
+        "tables": [idx.text(t) for t in doc.iter("table")],
+        "images_alt": [img.get("alt") for img in doc.iter("img")],
+        "links": [
+            [urljoin(base, a.get("href").strip()) if a.get("href") else None, idx.text(a)]
+            for a in doc.iter("a")
+        ],
+        "blocks": [
+            [el.tag, tree.getpath(el), t]
+            for el in doc.iter(*BLOCK_TAGS)
+            for t in (idx.text(el),) if t
+        ],
+        "body_text": idx.text(doc.body) if doc.find(".//body") is not None else "",
+    }
+
+
+def looks_js_rendered(raw: dict) -> bool:
+    """Statik HTML yetersizse (boş body, çok az kelime ya da metin bloğu) True döner."""
+    words = len((raw.get("body_text") or "").split())
+    blocks = sum(len(raw[k]) for k in ("h1", "h2", "h3", "p", "ul", "ol"))
+    return words < STATIC_MIN_WORDS or blocks < STATIC_MIN_BLOCKS
+
+
+def build_result(raw: dict, url: str) -> dict:
+    """Ham sözlüğü get_structured_web_content_selenium şemasına dönüştürür."""
+    domain = urlparse(url).netloc
+
+    result = {
+        "title": raw.get("title") or "",
+        "meta_description": "",
+        "headings": {
+            "h1": raw["h1"],
+            "h2": raw["h2"],
+            "h3": raw["h3"],
+        },
+        "paragraphs": raw["p"],
+        "div_texts": raw["div"],
+        "lists": [],
+        "tables": [],
+        "emphasis": {
+            "strong": raw["strong"],
+            "em": raw["em"]
+        },
+        "images_alt": [],
+        "links": {
+            "internal": [],
+            "external": []
+        },
+        # Metin blokları DOM yollarıyla: [{"tag", "path", "text"}] (belge sırasında)
+        "blocks": [{"tag": t, "path": p, "text": x} for t, p, x in raw.get("blocks", [])],
+    }
+    for tag in ["h1", "h2", "h3", "p", "div", "strong", "em"]:
+        logging.info(f"<{tag}> etiketlerinden {len(raw[tag])} adet içerik bulundu.")
+
+    # Meta description
+    if raw.get("meta_description") is not None:
+        result["meta_description"] = raw["meta_description"]
+        logging.info(f"Meta description bulundu: {result['meta_description'][:80]}...")
+    else:
+        logging.warning("Meta description bulunamadı.")
+
+    # Listeler
+    for tag in ["ul", "ol"]:
+        result["lists"].extend(raw[tag])
+        logging.info(f"<{tag}> listelerinden toplam {len(raw[tag])} madde bulundu.")
+
+    # Tablolar
+    result["tables"] = [t for t in raw["tables"] if t]
+    logging.info(f"{len(raw['tables'])} adet <table> bulundu, {len(result['tables'])} tanesi dolu.")
+
+    # Görsel alt metinleri
+    result["images_alt"] = [alt.strip() for alt in raw["images_alt"] if alt]
+    logging.info(f"{len(result['images_alt'])} adet <img alt='...'> bulundu.")
+
+    # Linkler (internal vs external)
+    for href, text in raw["links"]:
+        if href:
+            full_url = urljoin(url, href)
+            link_info = {"text": text, "url": full_url}
+            if domain in urlparse(full_url).netloc:
+                result["links"]["internal"].append(link_info)
+            else:
+                result["links"]["external"].append(link_info)
+    logging.info(f"{len(result['links']['internal'])} iç link, {len(result['links']['external'])} dış link bulundu.")
+    return result
+
+
+def extract_structured(html: str, url: str) -> dict:
+    """HTML metninden doğrudan get_structured_web_content_selenium şemasında sonuç üretir."""
+    return build_result(extract_raw(html, url), url)
@@ -1,141 +1,237 @@
-import os, re, json, subprocess, sys
+import os, sys, asyncio
 import pandas as pd
-from typing import Optional, Dict, Tuple
+from typing import Optional, Tuple
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "prompts"))
-from niyet_prompt import build_prompt  # type: ignore
+from niyet_prompt import HEDEF_ALAN, OUTPUT_SCHEMA, PROMPT_VERSION, SYSTEM_PROMPT, build_user_prompt  # type: ignore
+from llm_scheduler import LLMScheduler
+from llm_cache import get_llm_cache
+from llm_json import cozumle
+from columnar_store import sayisal, tablo_oku, tablo_yaz
+from incremental import INCREMENTAL, IZ_KOLONU, onceki_cikti, yeniden_kullanarak
+from metrics import ayarla, baslat, say
 
 # ======= Ayarlar =======
 CSV_PATH = os.getenv("CSV_PATH", "html_icerik_niyet_uyumu.csv")
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 OUTPUT_PATH = os.path.join(OUTPUT_DIR, "niyet_iyilestirme_sonuc.csv")
 
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3:4b")
-MAX_RETRIES = int(os.getenv("MAX_RETRIES", "5"))  # Artırıldı
+# Onarılamayan (geçersiz) cevaplar için yeniden üretim sayısı; şema kısıtı + onarımla nadirdir
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "2"))
+# 1: Ollama `format` ile şema kısıtlı akışlı üretim; 0: serbest metin (format desteklemeyen sunucular)
+LLM_STRUCTURED = os.getenv("LLM_STRUCTURED", "1") == "1"
 TIMEOUT_SEC = int(os.getenv("OLLAMA_TIMEOUT", "120"))
-MAX_IMPROVEMENT_ATTEMPTS = 3  # Pozitif skor için maksimum deneme
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))  # Aynı anda işlenen satır/istek sayısı
+MAX_IMPROVEMENT_ATTEMPTS = int(os.getenv("MAX_IMPROVEMENT_ATTEMPTS", "3"))  # Satır başına maksimum tur
+# Her turda eşzamanlı istenen aday sayısı; adaylar tek batch'te skorlanır
+IMPROVE_CANDIDATES = int(os.getenv("IMPROVE_CANDIDATES", "3"))
+IMPROVE_TEMPERATURE = float(os.getenv("IMPROVE_TEMPERATURE", "0.9"))  # ilk tur/ilk aday dışındaki istekler
+# Skor artışı bu değere ulaşınca (ve pozitifse) arama durur; 0 = ilk pozitif iyileşmede dur
+IMPROVE_TARGET_DELTA = float(os.getenv("IMPROVE_TARGET_DELTA", "0.0"))
+# Bütçeler LLM süresi (sn) ve token (prompt + üretim) cinsindendir; 0 = sınırsız.
+# Tur başlamadan kontrol edilir, yani bir tur bütçeyi en fazla bir tur kadar aşabilir.
+ROW_TIME_BUDGET = float(os.getenv("IMPROVE_ROW_TIME_BUDGET", "0"))
+ROW_TOKEN_BUDGET = int(os.getenv("IMPROVE_ROW_TOKEN_BUDGET", "0"))
+RUN_TIME_BUDGET = float(os.getenv("IMPROVE_RUN_TIME_BUDGET", "0"))
+RUN_TOKEN_BUDGET = int(os.getenv("IMPROVE_RUN_TOKEN_BUDGET", "0"))
 
 # ======= Skor modeli =======
-from sentence_transformers import SentenceTransformer, util
-ST_MODEL_NAME = os.getenv("ST_MODEL_NAME", "emrecan/bert-base-turkish-cased-mean-nli-stsb-tr")
-st_model = SentenceTransformer(ST_MODEL_NAME)
+# Model ilk encode'da yüklenir ve süreç içinde paylaşılır (bkz. model_registry)
+from model_registry import ST_PREWARM, get_engine, prewarm
+engine = get_engine()
 
 # ======= Yardımcılar =======
-def _extract_first_json(text: str) -> Optional[Dict]:
-    m = re.search(r"\{.*?\}", text, flags=re.S)
-    if not m:
-        return None
-    try:
-        return json.loads(m.group(0))
-    except Exception:
-        return None
-
-def _similarity(a: str, b: str) -> float:
-    a_emb = st_model.encode(a, convert_to_tensor=True, normalize_embeddings=True)
-    b_emb = st_model.encode(b, convert_to_tensor=True, normalize_embeddings=True)
-    return float(util.cos_sim(a_emb, b_emb).item())
-
-def _run_llm_with_improvement(kullanici_niyeti: str, mevcut_icerik: str, html_bolumu: str, eski_skor: float) -> Tuple[str, float]:
+class Butce:
+    """LLM süresi (sn) ve token harcaması; sınır 0 ise o boyut sınırsızdır."""
+
+    def __init__(self, sure: float = 0.0, token: int = 0):
+        self.sure_siniri = sure
+        self.token_siniri = token
+        self.sure = 0.0
+        self.token = 0
+        self.kazanc = 0.0  # yalnızca çalışma bütçesinde: toplam skor artışı
+
+    def harca(self, sure: float, token: int) -> None:
+        self.sure += sure
+        self.token += token
+
+    def bitti(self) -> bool:
+        return bool((self.sure_siniri and self.sure >= self.sure_siniri)
+                    or (self.token_siniri and self.token >= self.token_siniri))
+
+
+def _sonuc_anahtari(kullanici_niyeti: str, mevcut_icerik: str, html_bolumu: str, eski_skor: float) -> str:
+    """Satırın arama sonucunun önbellek anahtarı: ilk turun prompt'u + sonucu belirleyen arama ayarları."""
+    prompt = build_user_prompt(kullanici_niyeti, mevcut_icerik, html_bolumu, eski_skor)
+    return (f"{prompt}\n#sonuc tur={MAX_IMPROVEMENT_ATTEMPTS} aday={IMPROVE_CANDIDATES} "
+            f"hedef={IMPROVE_TARGET_DELTA} sicaklik={IMPROVE_TEMPERATURE}")
+
+
+async def _run_llm_with_improvement(llm: LLMScheduler, kullanici_niyeti: str, mevcut_icerik: str, html_bolumu: str, eski_skor: float, etiket: str = "", calisma: Optional[Butce] = None) -> Tuple[str, float, Butce]:
     """
-    Pozitif skor elde edene kadar metni günceller.
+    Bütçeli iyileştirme araması: her turda IMPROVE_CANDIDATES aday eşzamanlı istenir ve
+    tek batch'te skorlanır; skor artışı IMPROVE_TARGET_DELTA'ya ulaşınca ya da satır/çalışma
+    bütçesi bitince durulur. (en iyi içerik, skoru, satırın harcaması) döndürür.
+    Kendiliğinden biten (bütçe ya da LLM hatasıyla kesilmeyen) aramanın sonucu, iyileşme olmasa da
+    önbelleğe yazılır: değişmemiş satır yeniden çalıştırmada LLM'e gitmez.
     """
     best_candidate = mevcut_icerik
     best_score = eski_skor
-    
+    satir = Butce(ROW_TIME_BUDGET, ROW_TOKEN_BUDGET)
+    cache = get_llm_cache()
+    sonuc_key = _sonuc_anahtari(kullanici_niyeti, mevcut_icerik, html_bolumu, eski_skor)
+    if cache is not None:
+        onceki = cache.get(OLLAMA_MODEL, PROMPT_VERSION, sonuc_key)
+        if onceki is not None:
+            say("improve.niyet.outcome_cache_hits")
+            print(f"{etiket}[INFO] Önceki arama sonucu önbellekten alındı")
+            if onceki == mevcut_icerik:  # iyileşme bulunamamıştı
+                return mevcut_icerik, eski_skor, satir
+            return onceki, float(engine.pair_scores([kullanici_niyeti], [onceki])[0]), satir
+    tamamlandi = False   # arama kendiliğinden bitti (hedef, tekrar ya da tur sınırı)
+    hata = False         # bir aday LLM hatası / onarılamayan cevap nedeniyle üretilemedi
+    gorulen = set()          # mevcut prompt için üretilmiş aday metinleri
+    prompt_degisti = True    # önceki turda best_candidate değişti mi (ilk tur için True)
+
     for improvement_attempt in range(MAX_IMPROVEMENT_ATTEMPTS):
-        print(f"[INFO] İyileştirme denemesi {improvement_attempt + 1}/{MAX_IMPROVEMENT_ATTEMPTS}")
-        
-        # LLM ile içerik üret
-        candidate = _run_llm_single_attempt(kullanici_niyeti, best_candidate, html_bolumu, best_score)
-        
-        # Yeni skoru hesapla
-        new_score = _similarity(kullanici_niyeti, candidate)
-        
-        # Skor iyileşti mi kontrol et
+        if satir.bitti() or (calisma is not None and calisma.bitti()):
+            print(f"{etiket}[UYARI] Bütçe doldu ({satir.sure:.2f} sn, {satir.token} token), en iyi aday kullanılıyor")
+            say("improve.niyet.budget_stops")
+            break
+        if not prompt_degisti and IMPROVE_TEMPERATURE <= 0:
+            # Açgözlü örneklemede seed etkisizdir: aynı prompt aynı adayları üretir
+            print(f"{etiket}[INFO] Prompt değişmedi, tur tekrar olurdu; arama durduruluyor")
+            say("improve.niyet.repeat_stops")
+            tamamlandi = True
+            break
+        print(f"{etiket}[INFO] İyileştirme turu {improvement_attempt + 1}/{MAX_IMPROVEMENT_ATTEMPTS} ({IMPROVE_CANDIDATES} aday)")
+
+        # Adaylar aynı prompt'tan farklı seed ile (tur ve aday başına tekil) eşzamanlı üretilir
+        sonuclar = await asyncio.gather(*(
+            _run_llm_single_attempt(llm, kullanici_niyeti, best_candidate, html_bolumu, best_score, etiket,
+                                    tur=improvement_attempt, aday=k)
+            for k in range(IMPROVE_CANDIDATES)
+        ))
+        for _, token, sure, key in sonuclar:
+            hata = hata or key is None
+            satir.harca(sure, token)
+            if calisma is not None:
+                calisma.harca(sure, token)
+        anahtarlar = {}  # aday -> önbellek anahtarı (aynı metni üreten ilk istek)
+        for c, _, _, key in sonuclar:
+            if key is not None and c != best_candidate:
+                anahtarlar.setdefault(c, key)
+        adaylar = list(anahtarlar)
+        say("improve.niyet.attempts", len(sonuclar))
+        if all(key is None for _, _, _, key in sonuclar):
+            # Hiç metin üretilemedi (LLM hatası / onarılamayan cevap): tekrar değil, sonraki tur yeni seed'lerle denenir
+            print(f"{etiket}[UYARI] Turdaki tüm adaylar başarısız oldu, sonraki tura geçiliyor")
+            say("improve.niyet.failed_rounds")
+            continue
+        yeni = [c for c in adaylar if c not in gorulen]
+        gorulen.update(adaylar)
+        if not yeni:
+            # Üretilen metinlerin hepsi daha önce görülmüş (ya da mevcut metin): sonraki turlar da tekrar olur
+            print(f"{etiket}[BAŞARISIZ] Yeni aday üretilemedi, arama durduruluyor")
+            if not prompt_degisti:
+                say("improve.niyet.repeat_stops")
+            tamamlandi = True
+            break
+
+        # Tüm adaylar tek encode batch'inde skorlanır
+        skorlar = engine.pair_scores([kullanici_niyeti] * len(adaylar), adaylar)
+        i = int(skorlar.argmax())
+        new_score = float(skorlar[i])
+
         if new_score > best_score:
-            print(f"[BAŞARILI] Skor iyileşti: {best_score:.6f} -> {new_score:.6f}")
-            best_candidate = candidate
+            print(f"{etiket}[BAŞARILI] Skor iyileşti: {best_score:.6f} -> {new_score:.6f}")
+            best_candidate = adaylar[i]
             best_score = new_score
-            
-            # Pozitif değişim elde edildi, döngüden çık
-            if best_score > eski_skor:
+            gorulen = set()
+            prompt_degisti = True
+            say("improve.niyet.improved")
+            # Adaylardan önbelleğe yalnızca kabul edilen iyileştirme yazılır
+            if cache is not None:
+                cache.put(OLLAMA_MODEL, PROMPT_VERSION, anahtarlar[best_candidate], best_candidate)
+            if best_score - eski_skor >= IMPROVE_TARGET_DELTA:
+                tamamlandi = True
                 break
         else:
-            print(f"[BAŞARISIZ] Skor iyileşmedi: {best_score:.6f} -> {new_score:.6f}")
-            
-            # Son denemede bile iyileşme olmadı, mevcut en iyi adayı kullan
-            if improvement_attempt == MAX_IMPROVEMENT_ATTEMPTS - 1:
-                print(f"[UYARI] Maksimum deneme sayısına ulaşıldı, en iyi aday kullanılıyor")
-    
-    return best_candidate, best_score
-
-def _run_llm_single_attempt(kullanici_niyeti: str, mevcut_icerik: str, html_bolumu: str, eski_skor: float) -> str:
+            print(f"{etiket}[BAŞARISIZ] Skor iyileşmedi: {best_score:.6f} -> {new_score:.6f}")
+            prompt_degisti = False
+    else:
+        if best_score <= eski_skor:
+            print(f"{etiket}[UYARI] Maksimum tur sayısına ulaşıldı, en iyi aday kullanılıyor")
+        tamamlandi = True
+
+    if cache is not None and tamamlandi and not hata:
+        cache.put(OLLAMA_MODEL, PROMPT_VERSION, sonuc_key, best_candidate)
+    return best_candidate, best_score, satir
+
+async def _run_llm_single_attempt(llm: LLMScheduler, kullanici_niyeti: str, mevcut_icerik: str, html_bolumu: str, eski_skor: float, etiket: str = "", tur: int = 0, aday: int = 0) -> Tuple[str, int, float, str]:
     """
-    Tek bir LLM çağrısı yapar ve içeriği döndürür.
+    Tek bir aday üretir; (içerik, harcanan token, LLM süresi sn, önbellek anahtarı) döndürür.
+    Bağlantı/zaman aşımı hatalarının yeniden denenmesi LLMScheduler'dadır; bozuk JSON önce
+    onarılır (llm_json), yalnızca onarılamayan cevaplar yeniden üretilir.
+    seed = tur * IMPROVE_CANDIDATES + aday; seed > 0 ise IMPROVE_TEMPERATURE ile örneklenir.
+    Önbellek anahtarı seed'i içerir (iyileşmeyen turdan sonra aynı prompt önbellekteki ya da
+    aynı seed'li cevabı geri getirmez);
+    önbelleğe yazma, aday kabul edilince _run_llm_with_improvement'ta yapılır.
+    Aday üretilemezse mevcut içerik ve None anahtar döner.
     """
-    prompt = build_prompt(kullanici_niyeti, mevcut_icerik, html_bolumu, eski_skor)
-    
+    # Sabit sistem prompt'u ayrı gönderilir (önek önbelleği); önbellek anahtarı satıra özgü kısımdır
+    prompt = build_user_prompt(kullanici_niyeti, mevcut_icerik, html_bolumu, eski_skor)
+    kwargs = {"system": SYSTEM_PROMPT}
+    seed = tur * IMPROVE_CANDIDATES + aday
+    if seed:
+        kwargs["options"] = {"seed": seed, "temperature": IMPROVE_TEMPERATURE}
+    cache_key = f"{prompt}\n#seed={seed}" if seed else prompt
+    cache = get_llm_cache()
+    if cache is not None:
+        cached = cache.get(OLLAMA_MODEL, PROMPT_VERSION, cache_key)
+        if cached is not None:
+            return cached, 0, 0.0, cache_key
+
+    # Şemadaki yankı alanları eksikse onarımda bunlarla tamamlanır
+    girdiler = {"Kullanıcı Niyeti": kullanici_niyeti, "Mevcut İçerik": mevcut_icerik, "HTML Bölümü": html_bolumu}
+    token, sure = 0, 0.0
     for attempt in range(MAX_RETRIES):
-        completed = subprocess.run(
-            ["ollama", "run", OLLAMA_MODEL],
-            input=prompt.encode("utf-8"),
-            capture_output=True,
-            timeout=TIMEOUT_SEC,
-        )
-        
-        if completed.returncode == 0:
-            raw_output = completed.stdout.decode("utf-8", "ignore").strip()
-            parsed = _extract_first_json(raw_output)
-            if parsed and "Geliştirilmiş İçerik" in parsed:
-                return parsed["Geliştirilmiş İçerik"]
-        print(f"[UYARI] LLM cevabı alınamadı, deneme {attempt+1}/{MAX_RETRIES}")
-    
-    return mevcut_icerik  # Başarısızsa mevcut içeriği döndür
-
-# ======= Veri =======
-if not os.path.exists(CSV_PATH):
-    raise FileNotFoundError(f"CSV bulunamadı: {CSV_PATH}")
-
-df = pd.read_csv(CSV_PATH, encoding="utf-8")
-need = {"HTML Bölümü", "İçerik", "Kullanıcı Niyeti", "Benzerlik Skoru", "Uyum Durumu"}
-miss = need - set(df.columns)
-if miss:
-    raise KeyError(f"Eksik kolonlar: {miss}")
-
-df2 = df.copy()
-uyum = df2["Uyum Durumu"].astype(str).str.strip().str.lower().str.replace(r"\s+", " ", regex=True)
-score_raw = (df2["Benzerlik Skoru"].astype(str)
-    .str.replace("%", "", regex=False)
-    .str.replace(",", ".", regex=False)
-    .str.extract(r"([-+]?\d*\.?\d+)", expand=False))
-df2["Benzerlik Skoru"] = pd.to_numeric(score_raw, errors="coerce")
-
-# Tüm uyumlu içerikleri ve 0.65-0.85 arası skorları işle
-work = df2.loc[
-    (uyum.eq("uyumlu")) | 
-    (df2["Benzerlik Skoru"].between(0.65, 0.85, inclusive="both"))
-].copy()
-
-rows = []
-for _, r in work.iterrows():
-    intent = str(r["Kullanıcı Niyeti"]) if pd.notna(r["Kullanıcı Niyeti"]) else ""
-    current = str(r["İçerik"]) if pd.notna(r["İçerik"]) else ""
-    tag = (str(r["HTML Bölümü"]) if pd.notna(r["HTML Bölümü"]) else "p").lower()
-    old = float(r["Benzerlik Skoru"]) if pd.notna(r["Benzerlik Skoru"]) else 0.0
-
-    print(f"\n[İŞLENİYOR] Niyet: {intent}")
-    print(f"[MEVCUT] Skor: {old:.6f}")
-    
-    # Pozitif skor elde edene kadar iyileştir
-    cand, new_score = _run_llm_with_improvement(intent, current, tag, old)
-    
+        try:
+            if LLM_STRUCTURED:
+                raw_output, t, s = await llm.generate_json(prompt, OUTPUT_SCHEMA, **kwargs)
+            else:
+                raw_output, t, s = await llm.generate_with_usage(prompt, **kwargs)
+        except Exception as e:
+            print(f"{etiket}[UYARI] LLM isteği başarısız: {type(e).__name__}: {e}")
+            break
+        token += t
+        sure += s
+        parsed, durum = cozumle(raw_output, OUTPUT_SCHEMA, girdiler, HEDEF_ALAN)
+        if parsed is not None:
+            return parsed[HEDEF_ALAN], token, sure, cache_key
+        say("llm.json.wasted_tokens", t)
+        print(f"{etiket}[UYARI] LLM cevabı onarılamadı, deneme {attempt+1}/{MAX_RETRIES}")
+
+    return mevcut_icerik, token, sure, None  # Başarısızsa mevcut içeriği döndür
+
+async def _process_row(llm: LLMScheduler, calisma: Butce, i: int, intent: str, current: str, tag: str, old: float) -> dict:
+    etiket = f"[#{i}] "
+    print(f"\n{etiket}[İŞLENİYOR] Niyet: {intent}")
+    print(f"{etiket}[MEVCUT] Skor: {old:.6f}")
+
+    # Hedef artışa ya da bütçe sınırına kadar iyileştir
+    cand, new_score, harcama = await _run_llm_with_improvement(llm, intent, current, tag, old, etiket, calisma)
+    say("improve.niyet.llm_seconds", harcama.sure)
+    say("improve.niyet.tokens", harcama.token)
+    say("improve.niyet.score_gain", new_score - old)
+
     # Değişim yüzdesi
     change = ((new_score - old) / max(old, 1e-8)) * 100 if old > 0 else 0.0
-    
-    print(f"[SONUÇ] Eski: {old:.6f}, Yeni: {new_score:.6f}, Değişim: {change:.2f}%")
-    
-    rows.append({
+
+    print(f"{etiket}[SONUÇ] Eski: {old:.6f}, Yeni: {new_score:.6f}, Değişim: {change:.2f}%")
+
+    return {
         "Kullanıcı Niyeti": intent,
         "Mevcut İçerik": current,
         "Geliştirilmiş İçerik": cand,
@@ -143,14 +239,87 @@ for _, r in work.iterrows():
         "Eski Skor": round(old, 6),
         "Yeni Skor": round(float(new_score), 6),
         "Yüzde Değişim": round(change, 2),
-    })
-
-out = pd.DataFrame(rows, columns=[
-    "Kullanıcı Niyeti", "Mevcut İçerik", "Geliştirilmiş İçerik",
-    "HTML Bölümü", "Eski Skor", "Yeni Skor", "Yüzde Değişim"
-])
-print("\n" + "="*80)
-print(out.to_string(index=False))
-print("="*80)
-out.to_csv(OUTPUT_PATH, index=False, encoding="utf-8")
-print(f"\nTamamlandı. Çıktı: {OUTPUT_PATH}")
\ No newline at end of file
+    }
+
+async def _process_all(items, calisma: Butce) -> list:
+    """Satırlar LLM_CONCURRENCY sınırıyla eşzamanlı işlenir; sonuçlar girdi sırasını korur."""
+    async with LLMScheduler(model=OLLAMA_MODEL, concurrency=LLM_CONCURRENCY, timeout=TIMEOUT_SEC) as llm:
+        rows = await llm.map(lambda it: _process_row(llm, calisma, *it), items)
+    print(f"\nLLM istatistikleri: {llm.stats}")
+    calisma.kazanc += sum(r["Yeni Skor"] - r["Eski Skor"] for r in rows)
+    oran = calisma.kazanc / calisma.sure if calisma.sure > 0 else 0.0
+    ayarla("improve.niyet.gain_per_llm_sec", oran)
+    print(f"İyileştirme: toplam skor artışı {calisma.kazanc:.6f}, LLM süresi {calisma.sure:.2f} sn, "
+          f"{calisma.token} token, LLM saniyesi başına artış {oran:.6f}")
+    if get_llm_cache() is not None:
+        print(f"LLM önbelleği: {get_llm_cache().stats()}")
+    return rows
+
+# ======= Satır seçimi / iyileştirme =======
+def secili_satirlar(df: pd.DataFrame) -> pd.DataFrame:
+    """Uyumlu içerikler ve skoru 0.65-0.85 arasında olan satırlar (skor kolonu tipli değilse çevrilir)."""
+    df2 = df.copy()
+    uyum = df2["Uyum Durumu"].astype(str).str.strip().str.lower().str.replace(r"\s+", " ", regex=True)
+    if not pd.api.types.is_numeric_dtype(df2["Benzerlik Skoru"]):
+        df2["Benzerlik Skoru"] = sayisal(df2["Benzerlik Skoru"])
+
+    # Tüm uyumlu içerikleri ve 0.65-0.85 arası skorları işle
+    return df2.loc[
+        (uyum.eq("uyumlu")) | 
+        (df2["Benzerlik Skoru"].between(0.65, 0.85, inclusive="both"))
+    ].copy()
+
+def iyilestir(work: pd.DataFrame, start: int = 1, onceki: Optional[pd.DataFrame] = None,
+              butce: Optional[Butce] = None) -> pd.DataFrame:
+    """Seçili satırları LLM ile iyileştirir; `start` log etiketlerindeki ilk satır numarasıdır.
+    `onceki` verilirse aynı (Blok İzi, niyet) satırları LLM'e gönderilmez (bkz. incremental).
+    `butce` çalışma bütçesidir; parça parça çağıran (pipeline) tüm parçalar için aynısını verir."""
+    if butce is None:
+        butce = Butce(RUN_TIME_BUDGET, RUN_TOKEN_BUDGET)
+    if onceki is not None:
+        return yeniden_kullanarak(work, onceki, "Kullanıcı Niyeti", lambda d: iyilestir(d, start, butce=butce))
+    # Niyetler tek seferde, tekrarsız encode edilir (adaylar LLM çıktısı olduğundan sonradan gelir)
+    engine.add(work["Kullanıcı Niyeti"].fillna("").astype(str).tolist())
+
+    items = []
+    for i, (_, r) in enumerate(work.iterrows(), start):
+        intent = str(r["Kullanıcı Niyeti"]) if pd.notna(r["Kullanıcı Niyeti"]) else ""
+        current = str(r["İçerik"]) if pd.notna(r["İçerik"]) else ""
+        tag = (str(r["HTML Bölümü"]) if pd.notna(r["HTML Bölümü"]) else "p").lower()
+        old = float(r["Benzerlik Skoru"]) if pd.notna(r["Benzerlik Skoru"]) else 0.0
+        items.append((i, intent, current, tag, old))
+
+    rows = asyncio.run(_process_all(items, butce))
+
+    out = pd.DataFrame(rows, columns=[
+        "Kullanıcı Niyeti", "Mevcut İçerik", "Geliştirilmiş İçerik",
+        "HTML Bölümü", "Eski Skor", "Yeni Skor", "Yüzde Değişim"
+    ])
+    if IZ_KOLONU in work.columns:
+        out[IZ_KOLONU] = work[IZ_KOLONU].tolist()
+    return out
+
+# ======= Çalıştırma =======
+def main() -> None:
+    if ST_PREWARM:
+        prewarm()  # model, CSV okuma ve ilk LLM çağrısı sırasında arka planda yüklenir
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    df = tablo_oku(CSV_PATH)  # varsa Parquet (tipli skorlar), yoksa CSV
+    need = {"HTML Bölümü", "İçerik", "Kullanıcı Niyeti", "Benzerlik Skoru", "Uyum Durumu"}
+    miss = need - set(df.columns)
+    if miss:
+        raise KeyError(f"Eksik kolonlar: {miss}")
+
+    out = iyilestir(secili_satirlar(df), onceki=onceki_cikti(OUTPUT_PATH) if INCREMENTAL else None)
+    print("\n" + "="*80)
+    print(out.to_string(index=False))
+    print("="*80)
+    tablo_yaz(out, OUTPUT_PATH)
+    print(f"\nTamamlandı. Çıktı: {OUTPUT_PATH}")
+    if engine.cache is not None:
+        print(f"Embedding önbelleği: {engine.cache.stats()}")
+
+if __name__ == "__main__":
+    baslat("niyet_iyilestirme")
+    main()
@@ -10,22 +10,29 @@
 - li: Niyet odaklı çok kısa TAM cümle ("... anlatılır." / yoksa "... özetlenir.").
 - Uzunluk sınırları: p/div +%10, li +1; h1/h2 için kalıp sabitleri (Nasıl Yapılır?/Kılavuzu) asla kesilmez.
 - "..." asla kullanılmaz.
-Girdi: html_icerik_sorgu_uyumu.csv
-Çıktı: output/icerik_sorgu_uyumu_sonuc.csv
+Girdi: html_icerik_sorgu_uyumu.parquet (yoksa .csv)
+Çıktı: output/icerik_sorgu_uyumu_sonuc.parquet + .csv
 """
 
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer, util
+from columnar_store import tablo_oku, tablo_yaz
+from incremental import INCREMENTAL, IZ_KOLONU, onceki_cikti, yeniden_kullanarak
+from model_registry import ST_PREWARM, get_engine, prewarm
 
 # ====== IO ======
 INPUT_CSV  = os.getenv("INPUT_CSV",  "html_icerik_sorgu_uyumu.csv")
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")
 OUTPUT_CSV = os.path.join(OUTPUT_DIR, "icerik_sorgu_uyumu_sonuc.csv")
+# Aday üretimi için süreç sayısı: 1 = aynı süreçte, 0 = CPU sayısı kadar
+CAND_WORKERS = int(os.getenv("CAND_WORKERS", "1"))
 
 # ====== Model ======
-st_model = SentenceTransformer("emrecan/bert-base-turkish-cased-mean-nli-stsb-tr")
+# Model ilk encode'da yüklenir ve süreç içinde paylaşılır (bkz. model_registry).
+# Modül düzeyinde oluşturulmaz: aday üreten alt süreçler önbelleği açmaz.
 
 # ====== Kurallar / Yardımcılar ======
 CONJ_TAILS = {"ve","veya","ya","ya da","ile","ama","ancak","fakat","çünkü","ki"}
@@ -37,9 +44,13 @@ _BANNED = [
 
 def sim(a: str, b: str) -> float:
     if not a or not b: return 0.0
-    a_emb = st_model.encode(a, convert_to_tensor=True, normalize_embeddings=True)
-    b_emb = st_model.encode(b, convert_to_tensor=True, normalize_embeddings=True)
-    return float(util.cos_sim(a_emb, b_emb).item())
+    return get_engine().score(a, b)
+
+def sim_batch(a, b) -> np.ndarray:
+    """sim() ile aynı sonuçlar, çiftler tek embedding batch'inde skorlanır."""
+    scores = get_engine().pair_scores(a, b)
+    valid = np.fromiter((bool(x) and bool(y) for x, y in zip(a, b)), dtype=bool, count=len(a))
+    return np.where(valid, scores, np.float32(0.0))
 
 def to_title_tr(text: str) -> str:
     t = " ".join((text or "").split())
@@ -188,66 +199,99 @@ def short_answer_from_query(q: str, tag: str) -> str:
         text = to_title_tr(L)
     return finalize(text, tag)
 
+# ---- İki deterministik aday ----
+def build_candidates(item):
+    """(sorgu, mevcut metin, etiket) → (kural adayı, kısa cevap adayı). Süreç havuzunda da çalışır."""
+    q, cur, tag = item
+    # Aday 1: deterministik kural
+    if tag in ("h1","h2"):
+        det = format_heading_from_query(q)
+    elif tag in ("p","div"):
+        det = summarize_from_old(cur, q)   # << q parametresi ile sorgu odaklı özet
+    elif tag=="li":
+        det = li_from_query(q, cur)
+    else:
+        det = micro_edit_paragraph(cur)
+
+    det = enforce_delta(cur, finalize(det, tag), tag)
+
+    # Aday 2: sorgu tabanlı kısa cevap
+    qans = enforce_delta(cur, short_answer_from_query(q, tag), tag)
+    return det, qans
+
+# ====== Satır seçimi / iyileştirme ======
+def secili_satirlar(df: pd.DataFrame) -> pd.DataFrame:
+    """İyileştirilecek satırlar: "Uyumlu" ve skoru 0.65–0.85 arasında olanlar."""
+    norm = df["Uyum Durumu"].astype(str).str.strip().str.lower().str.replace(r"\s+"," ",regex=True)
+    return df.loc[norm.eq("uyumlu") & df["Benzerlik Skoru"].between(0.65,0.85, inclusive="both")].copy()
+
+def iyilestir(cand_df: pd.DataFrame, workers: int = CAND_WORKERS, onceki: pd.DataFrame = None) -> pd.DataFrame:
+    """Seçili satırların adaylarını üretir, skorlar ve sonuç tablosunu döndürür.
+    `onceki` verilirse aynı (Blok İzi, sorgu) satırları yeniden hesaplanmaz (bkz. incremental)."""
+    if onceki is not None:
+        return yeniden_kullanarak(cand_df, onceki, "Kullanıcı Sorgusu", lambda d: iyilestir(d, workers))
+    qs   = [str(v or "") for v in cand_df["Kullanıcı Sorgusu"]]
+    curs = [str(v or "") for v in cand_df["İçerik"]]
+    tags = [str(v or "").lower() for v in cand_df["HTML Bölümü"]]
+    olds = [float(v or 0.0) for v in cand_df["Benzerlik Skoru"]]
+
+    # 1) Tüm satırların adaylarını üret (isteğe bağlı süreç havuzunda)
+    items = list(zip(qs, curs, tags))
+    if workers != 1 and len(items) > 1:
+        with ProcessPoolExecutor(max_workers=workers or None) as ex:
+            cands = list(ex.map(build_candidates, items, chunksize=256))
+    else:
+        cands = [build_candidates(it) for it in items]
+    dets  = [c[0] for c in cands]
+    qanss = [c[1] for c in cands]
+
+    # 2) Tüm (sorgu, aday) çiftleri tek embedding batch'inde skorlanır
+    get_engine().add(qs + dets + qanss)
+    s1 = sim_batch(qs, dets)
+    s2 = sim_batch(qs, qanss)
+
+    # 3) Kazananlar dizi işlemleriyle seçilir
+    improved = np.where(s1 >= s2, np.array(dets, dtype=object), np.array(qanss, dtype=object))
+    new = np.maximum(s1, s2).astype(np.float64).tolist()
+
+    # Yuvarlama Python float + round() ile yapılır (np.round sınır değerlerde farklı yuvarlayabilir; çıktı bayt bayt aynı kalır)
+    out = pd.DataFrame({
+        "HTML Bölümü": tags,
+        "Kullanıcı Sorgusu": qs,
+        "Eski Metin": curs,
+        "Geliştirilmiş Metin": improved,
+        "Eski Skor": [round(o,6) for o in olds],
+        "Yeni Skor": [round(n,6) for n in new],
+        "Yüzde Değişim": [round(((n - o)/max(o,1e-8))*100, 2) if o>0 else 0.0 for n, o in zip(new, olds)],
+    }, columns=[
+        "HTML Bölümü","Kullanıcı Sorgusu","Eski Metin","Geliştirilmiş Metin",
+        "Eski Skor","Yeni Skor","Yüzde Değişim"
+    ])
+    if IZ_KOLONU in cand_df.columns:
+        out[IZ_KOLONU] = cand_df[IZ_KOLONU].tolist()
+    return out
+
 # ====== Çalıştırma ======
 if __name__ == "__main__":
-    if not os.path.exists(INPUT_CSV):
-        raise FileNotFoundError(f"Girdi bulunamadı: {INPUT_CSV}")
+    from metrics import baslat
+    baslat("sorgu_iyilestirme")
+    if ST_PREWARM:
+        prewarm()  # model, CSV okuma ve aday üretimi sırasında arka planda yüklenir
 
-    df = pd.read_csv(INPUT_CSV, encoding="utf-8")
+    df = tablo_oku(INPUT_CSV)  # varsa Parquet (tipli skorlar), yoksa CSV
 
     need = {"HTML Bölümü","İçerik","Kullanıcı Sorgusu","Benzerlik Skoru","Uyum Durumu"}
     miss = need - set(df.columns)
     if miss:
         raise KeyError(f"Eksik kolonlar: {miss}. Mevcut: {list(df.columns)}")
 
-    norm = df["Uyum Durumu"].astype(str).str.strip().str.lower().str.replace(r"\s+"," ",regex=True)
-    cand_df = df.loc[norm.eq("uyumlu") & df["Benzerlik Skoru"].between(0.65,0.85, inclusive="both")].copy()
+    cand_df = secili_satirlar(df)
 
-    rows=[]
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    for _, row in cand_df.iterrows():
-        q   = str(row["Kullanıcı Sorgusu"] or "")
-        cur = str(row["İçerik"] or "")
-        tag = (str(row["HTML Bölümü"] or "")).lower()
-        old = float(row["Benzerlik Skoru"] or 0.0)
-
-        # Aday 1: deterministik kural
-        if tag in ("h1","h2"):
-            det = format_heading_from_query(q)
-        elif tag in ("p","div"):
-            det = summarize_from_old(cur, q)   # << q parametresi ile sorgu odaklı özet
-        elif tag=="li":
-            det = li_from_query(q, cur)
-        else:
-            det = micro_edit_paragraph(cur)
-
-        det = enforce_delta(cur, finalize(det, tag), tag)
-
-        # Aday 2: sorgu tabanlı kısa cevap
-        qans = enforce_delta(cur, short_answer_from_query(q, tag), tag)
-
-        # En iyi skoru seç
-        s1 = sim(q, det)
-        s2 = sim(q, qans)
-        improved = det if s1 >= s2 else qans
-        new = max(s1, s2)
-        change = round(((new - old)/max(old,1e-8))*100, 2) if old>0 else 0.0
-
-        rows.append({
-            "HTML Bölümü": tag,
-            "Kullanıcı Sorgusu": q,
-            "Eski Metin": cur,
-            "Geliştirilmiş Metin": improved,
-            "Eski Skor": round(old,6),
-            "Yeni Skor": round(float(new),6),
-            "Yüzde Değişim": change
-        })
-
-    out = pd.DataFrame(rows, columns=[
-        "HTML Bölümü","Kullanıcı Sorgusu","Eski Metin","Geliştirilmiş Metin",
-        "Eski Skor","Yeni Skor","Yüzde Değişim"
-    ])
+    out = iyilestir(cand_df, onceki=onceki_cikti(OUTPUT_CSV) if INCREMENTAL else None)
     print(out.head())
-    out.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
+    tablo_yaz(out, OUTPUT_CSV)
     print(f"Tamamlandı. Çıktı: {OUTPUT_CSV}")
+    if get_engine().cache is not None:
+        print(f"Embedding önbelleği: {get_engine().cache.stats()}")
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Artımlı yeniden analiz: aynı URL'nin tekrar denetiminde yalnızca değişen bloklar skorlanır.
+- Her blok için parmak izi: sha1(etiket + DOM yolu + normalize metin) → "Blok İzi" kolonu.
+- Her çalıştırmada URL başına durum kaydedilir (INCR_STATE_DIR/<url-hash>/):
+    bloklar.parquet  : Blok İzi, etiket, yol, metin + embedding vektörü
+    skorlar.parquet  : Blok İzi × hedef (sorgu/niyet) skorları (float32)
+    durum.json       : model kimliği (ad + backend + dosya), zaman, son fark özeti
+- Fark adımı: aynı kalan bloklar × önceki hedefler için skorlar ve vektörler diskten alınır;
+  yalnızca yeni/değişen bloklar ve yeni sorgu/niyetler embedding modeline gider.
+- İyileştirme betikleri "Blok İzi" olan satırlarda önceki sonuçları yeniden_kullan() ile alır;
+  böylece değişmeyen bloklar için LLM'e tekrar gidilmez.
+Niyetler sorgu bazında zaten LLM önbelleğindedir (llm_cache): yalnızca yeni sorgular Ollama'ya gider.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import tablo_oku, tablo_yaz, vektorler
+from matrix_matcher import content_blocks, durum_etiketleri
+from model_registry import get_engine, model_kimligi
+
+# INCREMENTAL=1: main.py önceki durumu kullanır, iyileştirme betikleri önceki çıktıları yeniden kullanır
+INCREMENTAL = os.getenv("INCREMENTAL", "0") == "1"
+INCR_STATE_DIR = os.getenv("INCR_STATE_DIR", os.path.join("output", "artimli"))
+IZ_KOLONU = "Blok İzi"
+
+
+def blok_izi(tag: str, path: str, text: str) -> str:
+    norm = " ".join((text or "").split())
+    return hashlib.sha1("\0".join((tag, path, norm)).encode("utf-8")).hexdigest()[:20]
+
+
+def izli_bloklar(content: dict) -> List[Tuple[str, str, str, str]]:
+    """content_blocks() sırasıyla (etiket, yol, metin, iz); yol content["blocks"]'tan alınır."""
+    paths: Dict[Tuple[str, str], str] = {}
+    for b in content.get("blocks") or []:
+        paths.setdefault((b["tag"], b["text"]), b["path"])
+    seen: Dict[str, int] = {}
+    out = []
+    for k, (tag, text) in enumerate(content_blocks(content)):
+        if k == 0:
+            path = "title"
+        elif k == 1 and tag == "meta":
+            path = "meta"
+        else:
+            n = seen[tag] = seen.get(tag, 0) + 1
+            path = paths.get((tag, text), f"{tag}[{n}]")  # blok yolu yoksa aynı etiketteki sıra
+        out.append((tag, path, text, blok_izi(tag, path, text)))
+    return out
+
+
+class AnalizDurumu:
+    """Bir URL'nin önceki çalıştırmasından kalan bloklar, vektörler ve skorlar."""
+
+    def __init__(self, url: str, state_dir: str = INCR_STATE_DIR):
+        self.url = url
+        self.dir = os.path.join(state_dir, hashlib.sha1(url.encode("utf-8")).hexdigest()[:16])
+        self.bloklar = pd.DataFrame(columns=[IZ_KOLONU, "HTML Bölümü", "Yol", "İçerik"])
+        self.vektorler: Optional[np.ndarray] = None
+        self.skorlar = pd.DataFrame(columns=[IZ_KOLONU, "Hedef Türü", "Hedef", "Benzerlik Skoru"])
+        self.meta: dict = {}
+        self._yukle()
+
+    def _yol(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def _yukle(self) -> None:
+        meta_path = self._yol("durum.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("model") != model_kimligi():
+            return  # farklı modelin skorları yeniden kullanılamaz
+        self.meta = meta
+        bloklar, skorlar = onceki_cikti(self._yol("bloklar.csv")), onceki_cikti(self._yol("skorlar.csv"))
+        if bloklar is not None and skorlar is not None:
+            self.bloklar, self.skorlar = bloklar, skorlar
+            self.vektorler = vektorler(self._yol("bloklar.csv"))
+
+    def kaydet(self, bloklar: pd.DataFrame, vecs: np.ndarray, skorlar: pd.DataFrame, fark: dict) -> None:
+        os.makedirs(self.dir, exist_ok=True)
+        tablo_yaz(bloklar, self._yol("bloklar.csv"), vectors=vecs, csv_export=False)
+        tablo_yaz(skorlar, self._yol("skorlar.csv"), csv_export=False)
+        with open(self._yol("durum.json"), "w", encoding="utf-8") as f:
+            json.dump({"url": self.url, "model": model_kimligi(), "zaman": time.time(), "fark": fark},
+                      f, ensure_ascii=False, indent=2)
+
+
+def blok_farki(onceki: pd.DataFrame, guncel: List[Tuple[str, str, str, str]]) -> dict:
+    """Yeni / değişen (aynı etiket+yol, farklı metin) / silinen / aynı blok sayıları."""
+    eski_iz = set(onceki[IZ_KOLONU])
+    eski_yol = set(zip(onceki["HTML Bölümü"], onceki["Yol"]))
+    yeni_iz = {fp for *_, fp in guncel}
+    degisen = sum(1 for tag, path, _, fp in guncel if fp not in eski_iz and (tag, path) in eski_yol)
+    eklenen = sum(1 for *_, fp in guncel if fp not in eski_iz) - degisen
+    return {"ayni": len(yeni_iz & eski_iz), "degisen": degisen, "yeni": eklenen,
+            "silinen": len(eski_iz - yeni_iz)}
+
+
+def _skor_matrisi(onceki: pd.DataFrame, tur: str, targets: Sequence[str], izler: Sequence[str]) -> np.ndarray:
+    """Önceki skorlardan (hedef × blok) matrisi; bulunmayan hücreler NaN."""
+    prev = onceki[onceki["Hedef Türü"] == tur]
+    if prev.empty:
+        return np.full((len(targets), len(izler)), np.nan, dtype=np.float32)
+    pivot = prev.drop_duplicates([IZ_KOLONU, "Hedef"]).pivot(index="Hedef", columns=IZ_KOLONU, values="Benzerlik Skoru")
+    return np.array(pivot.reindex(index=list(targets), columns=list(izler)), dtype=np.float32)
+
+
+def _tamamla(S: np.ndarray, tv: np.ndarray, bv: np.ndarray) -> int:
+    """NaN hücreleri doldurur: yeni hedefler tüm bloklarla, yeni/değişen bloklar tüm hedeflerle."""
+    eksik = int(np.isnan(S).sum())
+    if not eksik:
+        return 0
+    yeni_hedef = np.isnan(S).all(axis=1)
+    if yeni_hedef.any():
+        S[yeni_hedef] = tv[yeni_hedef] @ bv.T
+    yeni_blok = np.isnan(S).any(axis=0)
+    if yeni_blok.any():
+        S[:, yeni_blok] = tv @ bv[yeni_blok].T
+    return eksik
+
+
+def _uzun_tablo(bloklar, targets: Sequence[str], S: np.ndarray, target_col: str) -> pd.DataFrame:
+    """matrix_matcher._long_form ile aynı düzen (hedef dış, blok iç döngü) + Blok İzi kolonu."""
+    nt, nb = S.shape
+    flat = S.ravel().astype(np.float64)
+    return pd.DataFrame({
+        "HTML Bölümü": np.tile(np.array([b[0] for b in bloklar], dtype=object), nt),
+        "İçerik": np.tile(np.array([b[2] for b in bloklar], dtype=object), nt),
+        target_col: np.repeat(np.array(list(targets), dtype=object), nb),
+        "Benzerlik Skoru": flat,
+        "Uyum Durumu": durum_etiketleri(flat),
+        IZ_KOLONU: np.tile(np.array([b[3] for b in bloklar], dtype=object), nt),
+    })
+
+
+def artimli_uyum_tablolari(url: str, content: dict, sorgular: Sequence[str], niyetler: Sequence[str],
+                           engine=None, state_dir: str = INCR_STATE_DIR) -> Tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    tam_sorgu_uyum_tablosu / tam_niyet_uyum_tablosu ile aynı tablolar (+ Blok İzi);
+    önceki çalıştırmada skorlanmış (blok, hedef) çiftleri yeniden hesaplanmaz.
+    """
+    engine = engine or get_engine()
+    durum = AnalizDurumu(url, state_dir)
+    bloklar = izli_bloklar(content)
+    izler = [b[3] for b in bloklar]
+    fark = blok_farki(durum.bloklar, bloklar)
+
+    # Blok vektörleri: aynı kalanlar durumdan, yeni/değişenler encode edilir
+    eski = {}
+    if durum.vektorler is not None and len(durum.vektorler) == len(durum.bloklar):
+        eski = {fp: i for i, fp in enumerate(durum.bloklar[IZ_KOLONU])}
+    yeni_metinler = [b[2] for b in bloklar if b[3] not in eski]
+    yeni_vek = engine.encode(yeni_metinler) if yeni_metinler else None
+    bv_list, j = [], 0
+    for _, _, _, fp in bloklar:
+        if fp in eski:
+            bv_list.append(durum.vektorler[eski[fp]])
+        else:
+            bv_list.append(yeni_vek[j])
+            j += 1
+    bv = np.stack(bv_list).astype(np.float32) if bv_list else np.zeros((0, 0), np.float32)
+
+    tablolar, skorlar, hesaplanan = [], [], 0
+    for tur, targets, col in (("sorgu", sorgular, "Kullanıcı Sorgusu"), ("niyet", niyetler, "Kullanıcı Niyeti")):
+        S = _skor_matrisi(durum.skorlar, tur, targets, izler)
+        if len(targets) and len(bloklar):
+            hesaplanan += _tamamla(S, engine.vectors(list(targets)), bv)
+        tablolar.append(_uzun_tablo(bloklar, targets, S, col))
+        skorlar.append(pd.DataFrame({
+            IZ_KOLONU: np.tile(np.array(izler, dtype=object), len(targets)),
+            "Hedef Türü": tur,
+            "Hedef": np.repeat(np.array(list(targets), dtype=object), len(izler)),
+            "Benzerlik Skoru": S.ravel(),
+        }))
+
+    fark["hesaplanan_skor"] = hesaplanan
+    fark["yeniden_kullanilan_skor"] = int(sum(len(s) for s in skorlar)) - hesaplanan
+    blok_df = pd.DataFrame([(fp, tag, path, text) for tag, path, text, fp in bloklar],
+                           columns=[IZ_KOLONU, "HTML Bölümü", "Yol", "İçerik"])
+    durum.kaydet(blok_df, bv, pd.concat(skorlar, ignore_index=True).drop_duplicates([IZ_KOLONU, "Hedef Türü", "Hedef"]), fark)
+    return tablolar[0], tablolar[1], fark
+
+
+def yeniden_kullan(work: pd.DataFrame, onceki: Optional[pd.DataFrame], target_col: str) -> List[Optional[dict]]:
+    """
+    work satırlarıyla hizalı liste: önceki çıktıda aynı (Blok İzi, hedef) varsa o satır, yoksa None.
+    Blok İzi kolonu olmayan girdilerde her şey yeniden hesaplanır.
+    """
+    if onceki is None or IZ_KOLONU not in work.columns or IZ_KOLONU not in onceki.columns:
+        return [None] * len(work)
+    prev = {(r[IZ_KOLONU], r[target_col]): r for r in onceki.to_dict("records")}
+    return [prev.get((fp, t)) for fp, t in zip(work[IZ_KOLONU], work[target_col])]
+
+
+def onceki_cikti(csv_path: str) -> Optional[pd.DataFrame]:
+    """Önceki iyileştirme çıktısı (Parquet/CSV); yoksa None."""
+    try:
+        return tablo_oku(csv_path)
+    except FileNotFoundError:
+        return None
+
+
+def yeniden_kullanarak(work: pd.DataFrame, onceki: Optional[pd.DataFrame], target_col: str,
+                       hesapla: Callable[[pd.DataFrame], pd.DataFrame]) -> pd.DataFrame:
+    """Yalnızca önceki çıktıda karşılığı olmayan satırlar için hesapla() çağrılır; sıra korunur."""
+    reuse = yeniden_kullan(work, onceki, target_col)
+    todo = np.array([r is None for r in reuse], dtype=bool)
+    if todo.all():
+        return hesapla(work)
+    yeni = hesapla(work[todo]) if todo.any() else None
+    cols = list(yeni.columns) if yeni is not None else list(onceki.columns)
+    yeni_rows = iter(yeni.to_dict("records") if yeni is not None else [])
+    print(f"♻️ {int((~todo).sum())}/{len(work)} satır önceki çalıştırmadan alındı.")
+    return pd.DataFrame([next(yeni_rows) if r is None else r for r in reuse], columns=cols)
@@ -1,11 +1,24 @@
 from ollama import Client
 import pandas as pd
-from kullanici_sorgusu import sorgular
+import os
 import re
+from llm_cache import get_llm_cache
+from metrics import span
+from llm_scheduler import LLM_KEEP_ALIVE
 
-ollama_client = Client(host='http://localhost:11434')  # Ollama arka planda çalışmalı
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+NIYET_MODEL = os.getenv("NIYET_MODEL", "gemma3:4b")
+NIYET_PROMPT_VERSION = "1"  # Prompt metni değişirse artırın (önbellekteki eski cevaplar kullanılmaz)
+
+ollama_client = Client(host=OLLAMA_HOST)  # Ollama arka planda çalışmalı
 
 def niyet_belirle(sorgu):
+    cache = get_llm_cache()
+    if cache is not None:
+        cached = cache.get(NIYET_MODEL, NIYET_PROMPT_VERSION, sorgu)
+        if cached is not None:
+            return cached
+
     prompt = f"""
 Bir kullanıcı şu arama sorgusunu yazdı: "{sorgu}"
 
@@ -14,19 +27,43 @@ Bu sorgunun özünde hangi amaç yatıyor?
 Lütfen yalnızca 3–5 kelimelik, sade ve tematik bir niyet ifadesi ver.
 Bir etiket ya da başlık gibi düşün. Nokta veya açıklama yazma.
 """
-    response = ollama_client.chat(
-        model='gemma3:4b',
-        messages=[{'role': 'user', 'content': prompt}]
-    )
-    return response['message']['content'].strip().lower()
-
-# Tüm sorgular için çalıştır
-sonuclar = []
-for sorgu in sorgular:
-    niyet = niyet_belirle(sorgu)
-    print(f"{sorgu} → {niyet}")
-    sonuclar.append({"Sorgu": sorgu, "Kısa Niyet Teması": niyet})
-
-# CSV'ye yaz
-df = pd.DataFrame(sonuclar)
-df.to_csv("sorgu_niyet_tema.csv", index=False)
+    with span("llm.intent"):
+        response = ollama_client.chat(
+            model=NIYET_MODEL,
+            messages=[{'role': 'user', 'content': prompt}],
+            keep_alive=LLM_KEEP_ALIVE,
+        )
+    niyet = response['message']['content'].strip().lower()
+    if cache is not None:
+        cache.put(NIYET_MODEL, NIYET_PROMPT_VERSION, sorgu, niyet)
+    return niyet
+
+def temizle_niyet(text):
+    if not text:
+        return ""
+    
+    text = text.lower().strip()
+    text = re.sub(r"[.?!,:;]+$", "", text)
+    text = re.sub(r"\s+", " ", text)
+    text = text.replace('"', '').replace("'", '')
+    return text
+
+def niyet_haritasi(sorgular, kumeler=None):
+    """{sorgu: temiz niyet}; niyet_belirle yalnızca küme temsilcileri için çağrılır (bkz. query_clusters)."""
+    from query_clusters import kumele
+    kumeler = kumeler or kumele(sorgular)
+    return kumeler.yay_sozluk({t: temizle_niyet(niyet_belirle(t)) for t in kumeler.temsilciler})
+
+if __name__ == "__main__":
+    from kullanici_sorgusu import sorgular
+
+    # Tüm sorgular için çalıştır
+    sonuclar = []
+    for sorgu in sorgular:
+        niyet = niyet_belirle(sorgu)
+        print(f"{sorgu} → {niyet}")
+        sonuclar.append({"Sorgu": sorgu, "Kısa Niyet Teması": niyet})
+
+    # CSV'ye yaz
+    df = pd.DataFrame(sonuclar)
+    df.to_csv("sorgu_niyet_tema.csv", index=False)
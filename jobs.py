@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Sunucudan başlatılan analiz işleri (server.py → POST /api/jobs).
+- İşler JOB_WORKERS thread'lik havuzda çalışır; FastAPI olay döngüsü bloklanmaz, birden çok URL
+  aynı anda analiz edilebilir.
+- Her iş akışlı hattı (pipeline.calistir) kendi klasöründe (JOB_DIR/<iş-id>/) çalıştırır;
+  eşzamanlı işler birbirinin dosyalarını ezmez.
+- İlerleme olayları (started, intents, scraped, embedded, matched, improved, done, error) iş
+  nesnesinde sıralı tutulur; SSE uç noktası bunları olay numarasıyla (Last-Event-ID) akıtır.
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from metrics import say, span
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_DIR = os.getenv("JOB_DIR", os.path.join("output", "jobs"))
+JOB_MAX_EVENTS = int(os.getenv("JOB_MAX_EVENTS", "5000"))
+
+BITMIS = ("done", "error")
+
+
+class Job:
+    def __init__(self, url: str, crawl: bool = False, llm: bool = False,
+                 sorgular: Optional[Sequence[str]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.url = url
+        self.crawl = crawl
+        self.llm = llm
+        self.sorgular = list(sorgular) if sorgular else None
+        self.dir = os.path.join(JOB_DIR, self.id)
+        self.status = "queued"
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.error: Optional[str] = None
+        self.result: Optional[dict] = None
+        self.counts: Dict[str, int] = {}
+        self._events: List[dict] = []
+        self._dropped = 0  # JOB_MAX_EVENTS aşılınca en eski olaylar atılır
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, data: Optional[dict] = None) -> None:
+        """Hat aşamalarının thread'lerinden çağrılabilir."""
+        with self._lock:
+            self.counts[event] = self.counts.get(event, 0) + 1
+            self._events.append({"id": self._dropped + len(self._events), "event": event,
+                                 "data": data or {}, "time": time.time()})
+            if len(self._events) > JOB_MAX_EVENTS:
+                drop = len(self._events) - JOB_MAX_EVENTS
+                del self._events[:drop]
+                self._dropped += drop
+
+    def events_since(self, first_id: int) -> List[dict]:
+        with self._lock:
+            return self._events[max(0, first_id - self._dropped):]
+
+    @property
+    def done(self) -> bool:
+        return self.status in BITMIS
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        return {
+            "id": self.id, "url": self.url, "crawl": self.crawl, "llm": self.llm,
+            "status": self.status, "created": self.created, "finished": self.finished,
+            "error": self.error, "result": self.result, "progress": counts,
+        }
+
+
+def _varsayilan_sorgular() -> List[str]:
+    from kullanici_sorgusu import sorgular
+    return list(sorgular)
+
+
+class JobManager:
+    def __init__(self, workers: int = JOB_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analiz")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, url: str, crawl: bool = False, llm: bool = False,
+               sorgular: Optional[Sequence[str]] = None) -> Job:
+        job = Job(url, crawl=crawl, llm=llm, sorgular=sorgular)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created, reverse=True)
+
+    def _run(self, job: Job) -> None:
+        from intent_classifier import niyet_haritasi
+        from pipeline import calistir
+        from query_clusters import kumele
+
+        job.status = "running"
+        job.emit("started", {"url": job.url})
+        try:
+            sorgular = job.sorgular or _varsayilan_sorgular()
+            kumeler = kumele(sorgular)
+            niyetler = list(dict.fromkeys(niyet_haritasi(sorgular, kumeler).values()))
+            job.emit("intents", {"queries": len(sorgular), "clusters": len(kumeler), "intents": len(niyetler)})
+            checkpoint = os.path.join(job.dir, "crawl_checkpoint.json") if job.crawl else None
+            os.makedirs(job.dir, exist_ok=True)
+            with span("job.run"):
+                job.result = calistir(job.url, sorgular, niyetler, crawl_mode=job.crawl, checkpoint=checkpoint,
+                                      llm=job.llm, kok=job.dir, ilerleme=job.emit, kumeler=kumeler)
+            say("jobs.done")
+            job.finished = time.time()
+            job.emit("done", job.result)
+            job.status = "done"  # durum son olaydan sonra değişir: SSE akışı hiçbir olayı kaçırmaz
+        except Exception as e:
+            say("jobs.error")
+            job.error = f"{type(e).__name__}: {e}"
+            job.finished = time.time()
+            job.emit("error", {"message": job.error})
+            job.status = "error"
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
@@ -1,21 +1,18 @@
-import pandas as pd # type: ignore
+"""
+Analizde kullanılan öncelikli sorgular.
+`from kullanici_sorgusu import sorgular` ilk erişimde query_store'dan yüklenir (import anında
+Excel okunmaz, çıktı basılmaz); seçim QUERY_STRATEGY / QUERY_EXPORTS ile ayarlanır.
+"""
 
-# Excel dosyasını oku
-df = pd.read_excel("1hafta.xlsx")
+from query_store import sorgulari_getir
 
-# Boş olan sorguları ayıkla
-df = df.dropna(subset=["En çok yapılan sorgular"])
 
-# Tıklamalara göre en çok 5 sorgu
-ilk5_tiklama = df.sort_values(by="Tıklamalar", ascending=False).head(5)
+def __getattr__(name):
+    # PEP 562: modül özniteliği ilk istendiğinde hesaplanır
+    if name == "sorgular":
+        return sorgulari_getir()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Gösterimlere göre en çok 5 sorgu
-ilk5_gosterim = df.sort_values(by="Gösterimler", ascending=False).head(5)
 
-# İkisini birleştir ve tekrar edenleri çıkar
-birlesik_sorgular = pd.concat([ilk5_tiklama, ilk5_gosterim]).drop_duplicates(subset=["En çok yapılan sorgular"])
-
-# Nihai sorgu listesi
-sorgular = birlesik_sorgular["En çok yapılan sorgular"].tolist()
-
-print("Öncelikli sorgular:", sorgular)
+if __name__ == "__main__":
+    print("Öncelikli sorgular:", sorgulari_getir())
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+LLM cevapları için kalıcı (SQLite) önbellek.
+- Anahtar: model + prompt şablon sürümü + girdi (sha256).
+- LLM_CACHE_TTL_DAYS'ten eski kayıtlar geçersizdir; kayıt sayısı LLM_CACHE_MAX ile sınırlıdır
+  (aşılınca en uzun süredir kullanılmayanlar silinir).
+- Süreç içindeki thread'ler ve asyncio görevleri aynı bağlantıyı kilitle paylaşır.
+Tekrarlanan denetimlerde yalnızca yeni sorgular ve değişen içerikler LLM'e gider.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from metrics import say
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite"))
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+LLM_CACHE_MAX = int(os.getenv("LLM_CACHE_MAX", "50000"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key        TEXT PRIMARY KEY,
+    model      TEXT NOT NULL,
+    version    TEXT NOT NULL,
+    response   TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    used_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_used_at ON llm_cache(used_at);
+"""
+
+
+def cache_key(model: str, version: str, text: str) -> str:
+    return hashlib.sha256("\0".join((model, version, text)).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_days: float = LLM_CACHE_TTL_DAYS,
+                 max_entries: int = LLM_CACHE_MAX):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._puts = 0
+
+    def get(self, model: str, version: str, text: str) -> Optional[str]:
+        key = cache_key(model, version, text)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND created_at >= ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                say("llm_cache.misses")
+                return None
+            self._conn.execute("UPDATE llm_cache SET used_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            say("llm_cache.hits")
+            return row[0]
+
+    def put(self, model: str, version: str, text: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, version, response, created_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key(model, version, text), model, version, response, now, now),
+            )
+            self._puts += 1
+            if self._puts % 100 == 1:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            " SELECT key FROM llm_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (n,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        return {"entries": n, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_shared: Optional[LLMCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Süreç genelinde tek önbellek; LLM_CACHE=0 ise None."""
+    global _shared
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            _shared = LLMCache()
+        return _shared
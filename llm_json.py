@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+LLM JSON çıktıları: artımlı ayrıştırma, onarım ve şema doğrulama.
+- ArtimliJSON: akış parçalarını alır; ilk üst düzey nesne kapanınca True döner, böylece akış
+  erken kesilebilir. Dizgi içindeki süslü parantez ve kaçışları doğru izler.
+- ilk_json(): metindeki ilk geçerli JSON nesnesi (iç içe nesnelerde de çalışır).
+- onar(): kod bloğu çitleri, ön/arka açıklama, sondaki virgül, yarıda kesilmiş nesne ve anahtar
+  yazım varyantları ("Gelistirilmis Icerik") için yeniden üretmek yerine onarım. Hedef alanın
+  (ör. "Geliştirilmiş İçerik") dizgisi yarıda kesilmişse onarılmaz: kesik metin aday sayılmaz.
+- cozumle(metin, sema, varsayilan, hedef): (nesne | None, durum); durum "ok" | "onarildi" |
+  "gecersiz", llm.json.<durum> sayacına yazılır (kesik hedef ayrıca llm.json.truncated_target).
+Şemalar JSON Schema'nın küçük bir alt kümesidir (object, properties, required, string/number,
+minLength); aynı sözlük Ollama'ya `format` olarak gönderilir.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from metrics import say
+from turkce_metin import katla
+
+_DECODER = json.JSONDecoder()
+_CIT = re.compile(r"```(?:json)?", flags=re.I)
+_SONDAKI_VIRGUL = re.compile(r",\s*([}\]])")
+_YARIM_ANAHTAR = re.compile(r'(?:,\s*)?"(?:[^"\\]|\\.)*"\s*:?\s*$')
+_ACIK_DEGER = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*"(?:[^"\\]|\\.)*$')
+_TIPLER = {"string": str, "number": (int, float), "integer": int, "boolean": bool,
+           "object": dict, "array": list}
+
+
+class ArtimliJSON:
+    """İlk üst düzey JSON nesnesini parça parça izler (tam ayrıştırma yapmaz, yalnızca sınırları bulur)."""
+
+    def __init__(self):
+        self.metin = ""        # ilk '{' dahil, nesne kapandıysa kapanışa kadar
+        self.tamam = False
+        self.yigin: List[str] = []
+        self.dizgide = False
+        self._kacis = False
+        self.acik_anahtar: Optional[str] = None  # kapat(): yarıda kalan değer dizgisinin anahtarı
+
+    def besle(self, parca: str) -> bool:
+        if self.tamam:
+            return True
+        for ch in parca:
+            if not self.yigin:
+                if ch != "{":
+                    continue  # nesneden önceki açıklama/çit
+                self.metin = ""
+            if self.dizgide:
+                if self._kacis:
+                    self._kacis = False
+                elif ch == "\\":
+                    self._kacis = True
+                elif ch == '"':
+                    self.dizgide = False
+            elif ch == '"':
+                self.dizgide = True
+            elif ch in "{[":
+                self.yigin.append("}" if ch == "{" else "]")
+            elif ch in "}]":
+                if self.yigin and self.yigin[-1] == ch:
+                    self.yigin.pop()
+                if not self.yigin:
+                    self.metin += ch
+                    self.tamam = True
+                    return True
+            self.metin += ch
+        return False
+
+    def kapat(self) -> Optional[str]:
+        """Yarıda kalmış nesneyi kapatılmış haliyle döndürür (açık dizgi, yarım anahtar ve parantezler)."""
+        if self.tamam:
+            return self.metin
+        if not self.yigin:
+            return None
+        if self.dizgide:
+            m = _ACIK_DEGER.search(self.metin)
+            self.acik_anahtar = json.loads(f'"{m.group(1)}"') if m else None
+        t = self.metin + ('"' if self.dizgide else "")
+        t = t.rstrip()
+        if t.endswith(":") or (t.endswith('"') and self.yigin[-1] == "}" and _anahtar_mi(t)):
+            t = _YARIM_ANAHTAR.sub("", t)
+        t = t.rstrip().rstrip(",")
+        return t + "".join(reversed(self.yigin))
+
+
+def _anahtar_mi(t: str) -> bool:
+    """Sondaki dizgi bir nesne anahtarı mı (öncesinde '{' ya da ',' var mı)?"""
+    m = re.search(r'([{,])\s*"(?:[^"\\]|\\.)*"$', t)
+    return m is not None
+
+
+def ilk_json(metin: str) -> Optional[dict]:
+    """Metindeki ilk geçerli JSON nesnesi; iç içe nesne ve dizgi içindeki '}' karakterleriyle doğru çalışır."""
+    i = metin.find("{")
+    while i != -1:
+        try:
+            obj, _ = _DECODER.raw_decode(metin, i)
+            if isinstance(obj, dict):
+                return obj
+        except ValueError:
+            pass
+        i = metin.find("{", i + 1)
+    return None
+
+
+def _anahtar(k: str) -> str:
+    return re.sub(r"[\s_]", "", katla(k))
+
+
+def dogrula(obj, sema: Optional[dict]) -> List[str]:
+    """Şema hatalarının listesi (boş liste = geçerli)."""
+    if not sema:
+        return []
+    if not isinstance(obj, _TIPLER.get(sema.get("type", "object"), object)):
+        return [f"tip {sema.get('type')} bekleniyordu"]
+    hatalar = [f"eksik alan: {k}" for k in sema.get("required", []) if k not in obj]
+    for k, alt in (sema.get("properties") or {}).items():
+        if k not in obj:
+            continue
+        tip = _TIPLER.get(alt.get("type"))
+        v = obj[k]
+        if tip is not None and (not isinstance(v, tip) or (tip is not bool and isinstance(v, bool))):
+            hatalar.append(f"{k}: tip {alt.get('type')} bekleniyordu")
+        elif isinstance(v, str) and len(v.strip()) < alt.get("minLength", 0):
+            hatalar.append(f"{k}: boş")
+    return hatalar
+
+
+def _semaya_uydur(obj: dict, sema: Optional[dict], varsayilan: Optional[Dict]) -> Optional[dict]:
+    """Anahtar varyantlarını şemadaki adlara eşler, eksik alanları `varsayilan`dan tamamlar, basit tip çevirir."""
+    if not isinstance(obj, dict):
+        return None
+    if not sema:
+        return obj
+    props = sema.get("properties") or {}
+    adlar = {_anahtar(k): k for k in props}
+    out = {}
+    for k, v in obj.items():
+        out[k if k in props else adlar.get(_anahtar(k), k)] = v
+    for k in sema.get("required", []):
+        if k not in out and varsayilan and k in varsayilan:
+            out[k] = varsayilan[k]
+    for k, alt in props.items():
+        if alt.get("type") == "string" and isinstance(out.get(k), (int, float)) and not isinstance(out[k], bool):
+            out[k] = str(out[k])
+    return out if not dogrula(out, sema) else None
+
+
+def onar(metin: str, sema: Optional[dict] = None, varsayilan: Optional[Dict] = None,
+         hedef: Optional[str] = None) -> Optional[dict]:
+    """Yeniden üretim yerine onarım; kurtarılamazsa ya da `hedef` alanı yarıda kesilmişse None."""
+    t = _CIT.sub("", metin or "")
+    obj = ilk_json(t)
+    if obj is None:
+        t = _SONDAKI_VIRGUL.sub(r"\1", t)
+        obj = ilk_json(t)
+    if obj is None:
+        ayr = ArtimliJSON()
+        ayr.besle(t)
+        kapali = ayr.kapat()
+        if kapali is not None and hedef and ayr.acik_anahtar is not None \
+                and _anahtar(ayr.acik_anahtar) == _anahtar(hedef):
+            say("llm.json.truncated_target")
+            return None
+        if kapali is not None:
+            try:
+                obj = json.loads(_SONDAKI_VIRGUL.sub(r"\1", kapali))
+            except ValueError:
+                obj = None
+    return _semaya_uydur(obj, sema, varsayilan) if obj is not None else None
+
+
+def cozumle(metin: str, sema: Optional[dict] = None, varsayilan: Optional[Dict] = None,
+            hedef: Optional[str] = None) -> Tuple[Optional[dict], str]:
+    obj = ilk_json(metin or "")
+    if obj is not None and not dogrula(obj, sema):
+        durum = "ok"
+    else:
+        obj = onar(metin, sema, varsayilan, hedef)
+        durum = "onarildi" if obj is not None else "gecersiz"
+    say("llm.json." + durum)
+    return obj, durum
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Ollama HTTP API için asenkron iş zamanlayıcı.
+- Her deneme için yeni `ollama run` süreci yerine tek, bağlantı havuzlu ollama.AsyncClient kullanılır.
+- Eşzamanlı istek sayısı LLM_CONCURRENCY ile sınırlıdır (asyncio.Semaphore).
+- İstek başına zaman aşımı (LLM_TIMEOUT) ve üstel geri çekilme + jitter ile yeniden deneme.
+- map(): işleri eşzamanlı çalıştırır, sonuçları girdi sırasıyla döndürür.
+- generate_with_usage(): metinle birlikte harcanan token (prompt + üretim) ve LLM süresini döndürür.
+- generate_json(): Ollama `format` (JSON şeması) ile akışlı üretim; nesne kapanınca akış kesilir.
+- Her isteğe keep_alive (LLM_KEEP_ALIVE) eklenir: model istekler arasında bellekten atılmaz, sabit
+  sistem prompt'u (`system=`) ile başlayan istekler sunucudaki önek önbelleğinden yararlanır.
+OLLAMA_HOST ile sunucu değiştirilebilir (örn. yerel bir stub sunucu ile test).
+"""
+
+import asyncio
+import logging
+import os
+import random
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+import httpx  # type: ignore
+from ollama import AsyncClient, ResponseError  # type: ignore
+
+from llm_json import ArtimliJSON
+from metrics import gozlem, say
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3:4b")
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+LLM_KEEP_ALIVE = os.getenv("LLM_KEEP_ALIVE", "30m")  # Ollama süre biçimi ("5m", "1h", "-1" = süresiz)
+
+def _loop_time() -> float:
+    return asyncio.get_running_loop().time()
+
+
+def _tokens(resp) -> int:
+    return int(resp.get("prompt_eval_count") or 0) + int(resp.get("eval_count") or 0)
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Yeniden denemeye değer (geçici) hatalar; 4xx (model yok vb.) tekrar denenmez
+_RETRYABLE = (httpx.TransportError, asyncio.TimeoutError, ConnectionError)
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        model: str = OLLAMA_MODEL,
+        host: str = OLLAMA_HOST,
+        concurrency: int = LLM_CONCURRENCY,
+        timeout: float = LLM_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        keep_alive: Optional[str] = LLM_KEEP_ALIVE,
+    ):
+        self.model = model
+        self.host = host
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.keep_alive = keep_alive
+        self._client: Optional[AsyncClient] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self.stats: Dict[str, int] = {"calls": 0, "retries": 0, "timeouts": 0, "failures": 0, "tokens": 0}
+
+    async def __aenter__(self) -> "LLMScheduler":
+        self._client = AsyncClient(host=self.host, timeout=self.timeout)
+        self._sem = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.close()  # havuzdaki bağlantıları kapat
+
+    def _count(self, key: str) -> None:
+        self.stats[key] += 1
+        say("llm." + key)
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(LLM_BACKOFF_MAX, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    @staticmethod
+    def _retryable(e: Exception) -> bool:
+        if isinstance(e, _RETRYABLE):
+            return True
+        return isinstance(e, ResponseError) and (e.status_code >= 500 or e.status_code == 429)
+
+    async def generate(self, prompt: str, **kwargs: Any) -> str:
+        """Tek bir /api/generate isteği; geçici hatalarda üstel geri çekilme ile yeniden dener."""
+        text, _, _ = await self.generate_with_usage(prompt, **kwargs)
+        return text
+
+    async def generate_with_usage(self, prompt: str, **kwargs: Any) -> Tuple[str, int, float]:
+        """generate() gibi; (metin, token sayısı, LLM süresi sn) döndürür. Süre yeniden denemeleri de kapsar."""
+        kwargs.setdefault("keep_alive", self.keep_alive)
+
+        async def tek() -> Tuple[str, int]:
+            resp = await self._client.generate(model=self.model, prompt=prompt, stream=False, **kwargs)
+            return (resp["response"] or "").strip(), _tokens(resp)
+        return await self._dene(tek)
+
+    async def generate_json(self, prompt: str, schema: Optional[dict] = None,
+                            **kwargs: Any) -> Tuple[str, int, float]:
+        """Şema kısıtlı (format=schema, yoksa "json") akışlı üretim; (metin, token, süre) döndürür.
+        Üst düzey JSON nesnesi kapanınca akış kesilir, model sonrasında üretmeye devam etse bile
+        beklenmez. Erken kesilen akışta token sayısı alınan parça sayısıdır (prompt hariç)."""
+        kwargs.setdefault("keep_alive", self.keep_alive)
+
+        async def tek() -> Tuple[str, int]:
+            ayr = ArtimliJSON()
+            ham: List[str] = []
+            tokens = None
+            it = await self._client.generate(model=self.model, prompt=prompt, stream=True,
+                                             format=schema or "json", **kwargs)
+            try:
+                async for part in it:
+                    ham.append(part.get("response") or "")
+                    if part.get("done"):
+                        tokens = _tokens(part)
+                    if ayr.besle(ham[-1]):
+                        if not part.get("done"):
+                            say("llm.json.early_stops")
+                        break
+            finally:
+                await it.aclose()  # bağlantı kapanınca sunucu üretimi durdurur
+            # Nesne tamamlanmadıysa ham metin döner; onarım çağıranın işidir (bkz. llm_json.cozumle)
+            return (ayr.metin if ayr.tamam else "".join(ham)), len(ham) if tokens is None else tokens
+        return await self._dene(tek)
+
+    async def _dene(self, tek: Callable[[], Awaitable[Tuple[R, int]]]) -> Tuple[R, int, float]:
+        """tek() isteğini eşzamanlılık sınırı, zaman aşımı ve üstel geri çekilmeyle çalıştırır."""
+        if self._client is None:
+            raise RuntimeError("LLMScheduler 'async with' içinde kullanılmalı")
+        sure = 0.0
+        for attempt in range(self.max_retries + 1):
+            t_wait = _loop_time()
+            async with self._sem:
+                gozlem("llm.queue_wait", _loop_time() - t_wait)  # eşzamanlılık sınırında bekleme
+                self._count("calls")
+                t0 = _loop_time()
+                try:
+                    sonuc, tokens = await asyncio.wait_for(tek(), timeout=self.timeout)
+                    sure += _loop_time() - t0
+                    gozlem("llm.generate", _loop_time() - t0)
+                    self.stats["tokens"] += tokens
+                    say("llm.tokens", tokens)
+                    return sonuc, tokens, sure
+                except Exception as e:
+                    sure += _loop_time() - t0
+                    gozlem("llm.generate", _loop_time() - t0)
+                    if isinstance(e, asyncio.TimeoutError):
+                        self._count("timeouts")
+                    if not self._retryable(e) or attempt == self.max_retries:
+                        self._count("failures")
+                        raise
+                    err = e
+            self._count("retries")
+            delay = self._backoff(attempt)
+            logging.warning(f"LLM isteği başarısız ({type(err).__name__}), {delay:.1f} sn sonra tekrar "
+                            f"({attempt + 1}/{self.max_retries}).")
+            await asyncio.sleep(delay)  # bekleme sırasında semafor serbest, diğer işler ilerler
+        raise RuntimeError("unreachable")
+
+    async def map(self, fn: Callable[[T], Awaitable[R]], items: Iterable[T]) -> List[R]:
+        """fn(item) işlerini eşzamanlı çalıştırır; sonuçlar girdi sırasıyla döner."""
+        return await asyncio.gather(*(fn(item) for item in items))
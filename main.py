@@ -1,21 +1,34 @@
-from anlamsal_eslestirme import anlamsal_eslestirme, tam_niyet_uyum_tablosu, tam_sorgu_uyum_tablosu # type: ignore
-from intent_classifier import niyet_belirle
-from anlamsal_eslestirme import title_description_uyumu   # type: ignore
-from anlamsal_eslestirme import title_description_birbirine_uyum # type: ignore
+from anlamsal_eslestirme import anlamsal_eslestirme # type: ignore
+from intent_classifier import niyet_haritasi
+from matrix_matcher import tam_niyet_uyum_tablosu, tam_sorgu_uyum_tablosu, best_matches
+from matrix_matcher import title_description_uyumu, title_description_birbirine_uyum
 from kullanici_sorgusu import sorgular
-from webScraping import get_structured_web_content_selenium
+from webScraping import get_structured_web_content
+from crawler import Onay, crawl, tamamlananlar
+from content_normalizer import normalize_content
+from ann_index import BlockIndex
+from columnar_store import TabloYazici, satir_ayikla, tablo_yaz
+from incremental import INCREMENTAL, artimli_uyum_tablolari
+from metrics import baslat, span
+from query_clusters import kumele
 import pandas as pd # type: ignore
-import re
-
-def temizle_niyet(text):
-    if not text:
-        return ""
-    
-    text = text.lower().strip()
-    text = re.sub(r"[.?!,:;]+$", "", text)
-    text = re.sub(r"\s+", " ", text)
-    text = text.replace('"', '').replace("'", '')
-    return text
+import os
+
+# CRAWL_MODE=1: başlangıç URL'sinden iç linkler izlenerek tüm site analiz edilir
+CRAWL_MODE = os.getenv("CRAWL_MODE", "0") == "1"
+CRAWL_CHECKPOINT = os.getenv("CRAWL_CHECKPOINT", os.path.join("output", "crawl_checkpoint.json"))
+# LONG_FORM_CSV=0: her (blok, sorgu/niyet) çifti için satır yazılmaz, yalnızca özet tablo üretilir
+LONG_FORM_CSV = os.getenv("LONG_FORM_CSV", "1") == "1"
+# Site taramasında bloklar bu ANN indeksine eklenir; sorgu başına en iyi TOP_K bölüm raporlanır
+ANN_INDEX_PATH = os.getenv("ANN_INDEX_PATH", os.path.join("output", "blok_indeksi"))
+TOP_K = int(os.getenv("TOP_K", "5"))
+# İndeks her sayfada değil ANN_SAVE_EVERY sayfada bir (ve taramanın sonunda) diske yazılır
+ANN_SAVE_EVERY = int(os.getenv("ANN_SAVE_EVERY", "25"))
+# PIPELINE_MODE=1: bloklar parça parça akar, eşleştirme + iyileştirme sonuçları dosyalara eklenerek yazılır
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "0") == "1"
+
+# Çıkışta output/raporlar/ altına JSON çalıştırma raporu; PROFILE=cprofile|pyinstrument ile profil
+baslat("main")
 
 # ----------------------------- #
 # 1. URL input
@@ -26,50 +39,142 @@ url = input("Analiz edilecek web sayfası URL'si: ").strip()
 # 2. Anlamsal eşleşmeler
 # ----------------------------- #
 print("\n🔍 Anlamsal eşleşmeler yapılıyor...")
-eslesme_df = anlamsal_eslestirme(url)
+with span("main.anlamsal_eslestirme"):
+    eslesme_df = anlamsal_eslestirme(url)
 
 # ----------------------------- #
 # 3. Kullanıcı niyeti tahmini
 # ----------------------------- #
 print("\n🧠 Kullanıcı niyetleri çıkarılıyor...")
-niyetler = []
-for sorgu in eslesme_df["Sorgu"]:
-    niyet = niyet_belirle(sorgu)
+with span("main.niyetler"):
+    # Yakın varyant sorgular kümelenir; LLM'e yalnızca küme temsilcileri gider
+    niyet_kumeleri = kumele(eslesme_df["Sorgu"].tolist())
+    niyet_map = niyet_haritasi(eslesme_df["Sorgu"].tolist(), niyet_kumeleri)
+for sorgu, niyet in niyet_map.items():
     print(f"{sorgu} → {niyet}")
-    niyetler.append(niyet)
+print(f"✅ Sorgu kümeleri: {niyet_kumeleri.ozet()}")
 
-eslesme_df["Kullanıcı Niyeti"] = [temizle_niyet(n) for n in niyetler]
+eslesme_df["Kullanıcı Niyeti"] = eslesme_df["Sorgu"].astype(str).map(niyet_map)
 
-# ----------------------------- #
-# 5. Sayfa içeriğini getir
-# ----------------------------- #
-content = get_structured_web_content_selenium(url)
 niyet_listesi = eslesme_df["Kullanıcı Niyeti"].unique().tolist()
 
+# Eşleştirme de küme temsilcileriyle yapılır; sorgu satırları üye sorgulara yayılır
+sorgu_kumeleri = kumele(sorgular)
+temsilciler = sorgu_kumeleri.temsilciler
+
+if PIPELINE_MODE:
+    from pipeline import calistir
+    print("\n🚰 Akışlı hat çalışıyor...")
+    satirlar = calistir(url, sorgular, niyet_listesi, crawl_mode=CRAWL_MODE,
+                        checkpoint=CRAWL_CHECKPOINT if CRAWL_MODE else None, kumeler=sorgu_kumeleri)
+    print(f"\n✅ Akışlı analiz tamamlandı: {satirlar}")
+    raise SystemExit(0)
+
+if CRAWL_MODE:
+    # ----------------------------- #
+    # 5-9. Site geneli: her sayfa tarandıkça eşleştirilip dosyalara eklenir
+    # ----------------------------- #
+    print("\n🕸️ Site taranıyor (iç linkler izleniyor)...")
+    # Kontrol noktası bu URL'ye aitse ve tamamlanmış sayfa varsa dosyalara eklenerek devam edilir
+    tamam = tamamlananlar(CRAWL_CHECKPOINT, url)
+    ilk = not tamam
+    blok_indeksi = BlockIndex() if ilk else BlockIndex.load(ANN_INDEX_PATH)
+    yazicilar = {path: TabloYazici(path, yeni=ilk) for path in (
+        "html_icerik_niyet_uyumu.csv", "html_icerik_sorgu_uyumu.csv",
+        "title_description_uyum.csv", "title_description_kendi_uyumu.csv")}
+    if not ilk:
+        # Yarıda kalan sayfaların satırları atılır; bu sayfalar yeniden taranıp baştan yazılır
+        for path in yazicilar:
+            satir_ayikla(path, "URL", tamam)
+    indekste = {b["URL"] for b in blok_indeksi.blocks}  # indeks kaydından sonra, onaydan önce kesilmiş olabilir
+    # Sayfalar ancak blokları indeksle birlikte diske yazılınca tamamlanır; devamda kaydedilmemişler yeniden taranır
+    onay = Onay()
+    kaydedilmemis = []
+    for sayfa_url, content in crawl(url, checkpoint=CRAWL_CHECKPOINT, onay=onay):
+        content = normalize_content(content)
+        if sayfa_url not in indekste:
+            blok_indeksi.add_page(sayfa_url, content)
+        tam_niyet_df = tam_niyet_uyum_tablosu(content, niyet_listesi)
+        tam_sorgu_df = sorgu_kumeleri.yay(tam_sorgu_uyum_tablosu(content, temsilciler))
+        title_desc_df = sorgu_kumeleri.yay(title_description_uyumu(content, temsilciler))
+        title_meta_df = title_description_birbirine_uyum(content)
+        for df_, path in [
+            (tam_niyet_df, "html_icerik_niyet_uyumu.csv"),
+            (tam_sorgu_df, "html_icerik_sorgu_uyumu.csv"),
+            (title_desc_df, "title_description_uyum.csv"),
+            (title_meta_df, "title_description_kendi_uyumu.csv"),
+        ]:
+            df_.insert(0, "URL", sayfa_url)
+            yazicilar[path].yaz(df_)
+        kaydedilmemis.append(sayfa_url)
+        if len(kaydedilmemis) >= ANN_SAVE_EVERY:
+            blok_indeksi.save(ANN_INDEX_PATH)
+            for u in kaydedilmemis:
+                onay(u)
+            kaydedilmemis.clear()
+        print(f"✅ {sayfa_url}: {len(tam_sorgu_df)} içerik-sorgu, {len(tam_niyet_df)} içerik-niyet satırı eklendi.")
+    blok_indeksi.save(ANN_INDEX_PATH)
+    os.remove(CRAWL_CHECKPOINT)  # tamamlanan tarama bir sonraki çalıştırmada sıfırdan başlar
+    top_k_df = sorgu_kumeleri.yay(blok_indeksi.top_k(temsilciler, k=TOP_K))
+    top_k_df.to_csv("sorgu_top_k_bolumler.csv", index=False)
+    print(f"✅ Sorgu başına en uyumlu {TOP_K} bölüm 'sorgu_top_k_bolumler.csv' dosyasına yazıldı.")
+    print("\n✅ Site taraması tamamlandı.")
+    raise SystemExit(0)
+
 # ----------------------------- #
-# 6. Tüm içerik × niyet analizi
+# 5. Sayfa içeriğini getir
 # ----------------------------- #
-print("\n📊 Tüm içerik ve niyetler ayrıntılı olarak eşleştiriliyor...")
-tam_niyet_df = tam_niyet_uyum_tablosu(content, niyet_listesi)
-tam_niyet_df.to_csv("html_icerik_niyet_uyumu.csv", index=False)
-print("✅ Detaylı içerik-niyet eşleşme sonucu 'html_icerik_niyet_uyumu.csv' dosyasına kaydedildi.")
-print(tam_niyet_df.head())
+with span("main.scrape"):
+    content = get_structured_web_content(url)
+# İç içe div tekrarları ve neredeyse aynı bloklar eşleştirmeden önce ayıklanır
+with span("main.normalize"):
+    content = normalize_content(content)
 
 # ----------------------------- #
-# 7. Tüm içerik × sorgu analizi
+# 6. Sorgu başına en uyumlu bölüm (matris özeti)
 # ----------------------------- #
-print("\n📊 Tüm içerik ve sorgular ayrıntılı olarak eşleştiriliyor...")
-tam_sorgu_df = tam_sorgu_uyum_tablosu(content, sorgular)
-tam_sorgu_df.to_csv("html_icerik_sorgu_uyumu.csv", index=False)
-print("✅ Detaylı içerik-sorgu eşleşme sonucu 'html_icerik_sorgu_uyumu.csv' dosyasına kaydedildi.")
-print(tam_sorgu_df.head())
+print("\n📊 Sorgular için en uyumlu bölümler hesaplanıyor...")
+with span("main.best_matches"):
+    ozet_df = sorgu_kumeleri.yay(best_matches(content, temsilciler))
+ozet_df.to_csv("sorgu_en_uyumlu_bolum.csv", index=False)
+print("✅ 'sorgu_en_uyumlu_bolum.csv' dosyasına yazıldı.")
+print(ozet_df.head())
+
+if LONG_FORM_CSV and INCREMENTAL:
+    # ----------------------------- #
+    # 7. Artımlı analiz: yalnızca yeni/değişen bloklar ve yeni sorgu/niyetler skorlanır
+    # ----------------------------- #
+    print("\n♻️ Önceki çalıştırmayla fark alınıyor...")
+    tam_sorgu_df, tam_niyet_df, fark = artimli_uyum_tablolari(url, content, temsilciler, niyet_listesi)
+    tam_sorgu_df = sorgu_kumeleri.yay(tam_sorgu_df)
+    print(f"✅ Blok farkı: {fark}")
+    tablo_yaz(tam_niyet_df, "html_icerik_niyet_uyumu.csv")
+    tablo_yaz(tam_sorgu_df, "html_icerik_sorgu_uyumu.csv")
+elif LONG_FORM_CSV:
+    # ----------------------------- #
+    # 7a. Tüm içerik × niyet analizi
+    # ----------------------------- #
+    print("\n📊 Tüm içerik ve niyetler ayrıntılı olarak eşleştiriliyor...")
+    tam_niyet_df = tam_niyet_uyum_tablosu(content, niyet_listesi)
+    tablo_yaz(tam_niyet_df, "html_icerik_niyet_uyumu.csv")
+    print("✅ Detaylı içerik-niyet eşleşme sonucu 'html_icerik_niyet_uyumu.csv' dosyasına kaydedildi.")
+    print(tam_niyet_df.head())
+
+    # ----------------------------- #
+    # 7b. Tüm içerik × sorgu analizi
+    # ----------------------------- #
+    print("\n📊 Tüm içerik ve sorgular ayrıntılı olarak eşleştiriliyor...")
+    tam_sorgu_df = sorgu_kumeleri.yay(tam_sorgu_uyum_tablosu(content, temsilciler))
+    tablo_yaz(tam_sorgu_df, "html_icerik_sorgu_uyumu.csv")
+    print("✅ Detaylı içerik-sorgu eşleşme sonucu 'html_icerik_sorgu_uyumu.csv' dosyasına kaydedildi.")
+    print(tam_sorgu_df.head())
 
 # ----------------------------- #
 # 8. Title ve Description Kullanıcı Sorgusuna Göre Uyumu
 # ----------------------------- #
 print("\n📝 Başlık ve açıklama alanları sorgularla karşılaştırılıyor...")
-title_desc_df = title_description_uyumu(content, sorgular)
-title_desc_df.to_csv("title_description_uyum.csv", index=False)
+title_desc_df = sorgu_kumeleri.yay(title_description_uyumu(content, temsilciler))
+tablo_yaz(title_desc_df, "title_description_uyum.csv")
 print("✅ 'title_description_uyum.csv' dosyasına yazıldı.")
 print(title_desc_df.head())
 
@@ -79,6 +184,6 @@ print(title_desc_df.head())
 # ----------------------------- #
 print("\n📊 Başlık ve açıklamanın birbirine göre anlamsal uyumu ölçülüyor...")
 title_meta_df = title_description_birbirine_uyum(content)
-title_meta_df.to_csv("title_description_kendi_uyumu.csv", index=False)
+tablo_yaz(title_meta_df, "title_description_kendi_uyumu.csv")
 print("✅ 'title_description_kendi_uyumu.csv' dosyasına yazıldı.")
 print(title_meta_df)
\ No newline at end of file
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Matris tabanlı içerik × sorgu / içerik × niyet eşleştirici.
+- Sayfa blokları bir kez, sorgular/niyetler bir kez embed edilir (EmbeddingEngine + kalıcı önbellek).
+- Tüm benzerlikler tek matris çarpımıyla hesaplanır; eşikler ve "Uyum Durumu" etiketleri vektörel uygulanır.
+- Çok büyük sitelerde bellek, bloklar MATCH_CHUNK_SIZE'lık parçalar halinde işlenerek sınırlı tutulur.
+- Uzun biçimli (her (blok, hedef) çifti bir satır) tablo yalnızca istenirse üretilir:
+  tam_sorgu_uyum_tablosu / tam_niyet_uyum_tablosu / title_description_uyumu aynı kolonları üretir.
+Eşikler mevcut çıktılarla aynıdır: < 0.65 Düşük Uyum, 0.65–0.85 Uyumlu, ≥ 0.85 Yüksek Uyum.
+"""
+
+import os
+from typing import Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from model_registry import get_engine
+
+UYUM_ESIGI = float(os.getenv("UYUM_ESIGI", "0.65"))
+YUKSEK_UYUM_ESIGI = float(os.getenv("YUKSEK_UYUM_ESIGI", "0.85"))
+MATCH_CHUNK_SIZE = int(os.getenv("MATCH_CHUNK_SIZE", "4096"))
+
+DURUMLAR = np.array(["Düşük Uyum", "Uyumlu", "Yüksek Uyum"], dtype=object)
+
+
+def content_blocks(content: dict) -> List[Tuple[str, str]]:
+    """Sayfa içeriğini (etiket, metin) bloklarına açar; sıra mevcut CSV çıktılarıyla aynıdır."""
+    blocks = [("h1", content.get("title") or ""), ("meta", content.get("meta_description") or "")]
+    headings = content.get("headings", {})
+    for tag in ("h1", "h2", "h3"):
+        blocks += [(tag, t) for t in headings.get(tag, [])]
+    blocks += [("p", t) for t in content.get("paragraphs", [])]
+    blocks += [("div", t) for t in content.get("div_texts", [])]
+    blocks += [("li", t) for t in content.get("lists", [])]
+    blocks += [("strong", t) for t in content.get("emphasis", {}).get("strong", [])]
+    return [(tag, t) for tag, t in blocks if t and t.strip()]
+
+
+def durum_etiketleri(scores: np.ndarray) -> np.ndarray:
+    """Skor dizisine karşılık gelen "Uyum Durumu" etiketleri (vektörel)."""
+    return DURUMLAR[np.digitize(scores, [UYUM_ESIGI, YUKSEK_UYUM_ESIGI])]
+
+
+def iter_score_chunks(targets: Sequence[str], texts: Sequence[str], engine=None,
+                      chunk_size: int = MATCH_CHUNK_SIZE) -> Iterator[Tuple[int, np.ndarray]]:
+    """(başlangıç, skorlar[len(targets), parça]) üretir; aynı anda yalnızca bir parça bellekte olur."""
+    engine = engine or get_engine()
+    tv = engine.vectors(list(targets))
+    for start in range(0, len(texts), chunk_size):
+        yield start, tv @ engine.vectors(list(texts[start:start + chunk_size])).T
+
+
+def similarity_matrix(targets: Sequence[str], texts: Sequence[str], engine=None,
+                      chunk_size: int = MATCH_CHUNK_SIZE) -> np.ndarray:
+    """Tüm (hedef × metin) skorları, float32 (len(targets), len(texts))."""
+    out = np.empty((len(targets), len(texts)), dtype=np.float32)
+    for start, chunk in iter_score_chunks(targets, texts, engine, chunk_size):
+        out[:, start:start + chunk.shape[1]] = chunk
+    return out
+
+
+def best_matches(content: dict, targets: Sequence[str], target_col: str = "Kullanıcı Sorgusu",
+                 engine=None, chunk_size: int = MATCH_CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Her hedef için en uyumlu bölüm ve etiket dağılımı; tam matris tutulmadan parça parça hesaplanır.
+    """
+    blocks = content_blocks(content)
+    texts = [t for _, t in blocks]
+    n = len(targets)
+    best = np.full(n, -np.inf, dtype=np.float32)
+    arg = np.zeros(n, dtype=np.int64)
+    counts = np.zeros((n, len(DURUMLAR)), dtype=np.int64)
+    for start, chunk in iter_score_chunks(targets, texts, engine, chunk_size):
+        i = chunk.argmax(axis=1)
+        m = chunk[np.arange(n), i]
+        better = m > best
+        best[better], arg[better] = m[better], start + i[better]
+        bins = np.digitize(chunk, [UYUM_ESIGI, YUKSEK_UYUM_ESIGI])
+        for k in range(len(DURUMLAR)):
+            counts[:, k] += (bins == k).sum(axis=1)
+    df = pd.DataFrame({
+        target_col: list(targets),
+        "HTML Bölümü": [blocks[j][0] for j in arg] if texts else None,
+        "En Uyumlu İçerik": [blocks[j][1] for j in arg] if texts else None,
+        "Benzerlik Skoru": best if texts else np.nan,
+        "Uyum Durumu": durum_etiketleri(best) if texts else None,
+    })
+    for k, name in enumerate(DURUMLAR):
+        df[f"{name} Sayısı"] = counts[:, k]
+    return df
+
+
+def _long_form(blocks: List[Tuple[str, str]], targets: Sequence[str], target_col: str,
+               first_cols: Tuple[str, str], engine=None) -> pd.DataFrame:
+    """Hedef dış döngü, blok iç döngü olacak şekilde uzun biçimli tablo (eski CSV düzeni)."""
+    cols = [first_cols[0], first_cols[1], target_col, "Benzerlik Skoru", "Uyum Durumu"]
+    if not blocks or not len(targets):
+        return pd.DataFrame(columns=cols)
+    tags = np.array([b[0] for b in blocks], dtype=object)
+    texts = np.array([b[1] for b in blocks], dtype=object)
+    scores = similarity_matrix(targets, list(texts), engine)
+    nt, nb = scores.shape
+    flat = scores.ravel().astype(np.float64)
+    return pd.DataFrame({
+        cols[0]: np.tile(tags, nt),
+        cols[1]: np.tile(texts, nt),
+        cols[2]: np.repeat(np.array(list(targets), dtype=object), nb),
+        cols[3]: flat,
+        cols[4]: durum_etiketleri(flat),
+    }, columns=cols)
+
+
+def tam_sorgu_uyum_tablosu(content: dict, sorgular: Sequence[str], engine=None) -> pd.DataFrame:
+    return _long_form(content_blocks(content), sorgular, "Kullanıcı Sorgusu", ("HTML Bölümü", "İçerik"), engine)
+
+
+def tam_niyet_uyum_tablosu(content: dict, niyetler: Sequence[str], engine=None) -> pd.DataFrame:
+    return _long_form(content_blocks(content), niyetler, "Kullanıcı Niyeti", ("HTML Bölümü", "İçerik"), engine)
+
+
+def title_description_uyumu(content: dict, sorgular: Sequence[str], engine=None) -> pd.DataFrame:
+    blocks = [("title", content.get("title") or ""), ("meta", content.get("meta_description") or "")]
+    return _long_form([b for b in blocks if b[1].strip()], sorgular, "Kullanıcı Sorgusu", ("Alan", "Metin"), engine)
+
+
+def title_description_birbirine_uyum(content: dict, engine=None) -> pd.DataFrame:
+    title = content.get("title") or ""
+    meta = content.get("meta_description") or ""
+    score = (engine or get_engine()).score(title, meta) if title and meta else np.nan
+    return pd.DataFrame([{
+        "Title": title,
+        "Meta Description": meta,
+        "Benzerlik Skoru": score,
+        "Uyum Durumu": durum_etiketleri(np.array([score]))[0] if title and meta else None,
+    }])
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Süreç geneli ölçüm katmanı: aşama süreleri (span), sayaçlar ve gecikme histogramları.
+- span("embed.encode"): süre aynı adlı histograma yazılır; iç içe span'ler üst span'i ile kaydedilir
+  (son METRICS_MAX_SPANS kayıt rapora girer).
+- say("scrape.elements", n): sayaç; gozlem("llm.wait", sn): histograma tek ölçüm;
+  ayarla("improve.niyet.gain_per_llm_sec", x): son değeri tutulan gösterge (oranlar için).
+- rapor(): JSON çalıştırma raporu; prometheus_metni(): server.py /metrics çıktısı.
+- baslat("main"): giriş noktalarında çağrılır. Süreç bitince rapor RUN_REPORT_DIR'e yazılır;
+  PROFILE=cprofile|pyinstrument ise tüm çalıştırmanın profili de alınır. cprofile, baslat()'tan sonra
+  açılan thread'leri de (hat aşamaları, kazıma/iş havuzları) thread başına profiler ile kapsar ve tek
+  .prof dosyasında birleştirir; pyinstrument yalnızca baslat()'ı çağıran thread'i örnekler.
+Tüm fonksiyonlar thread'ler arasında güvenle çağrılabilir.
+"""
+
+import atexit
+import bisect
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+METRICS_ENABLED = os.getenv("METRICS", "1") != "0"
+METRICS_MAX_SPANS = int(os.getenv("METRICS_MAX_SPANS", "2000"))
+RUN_REPORT_DIR = os.getenv("RUN_REPORT_DIR", os.path.join("output", "raporlar"))
+# PROFILE=cprofile (.prof, snakeviz/pstats ile açılır) ya da pyinstrument (.html)
+PROFILE = os.getenv("PROFILE", "").strip().lower()
+
+# Saniye cinsinden histogram üst sınırları (Selenium beklemesinden tek encode batch'ine kadar)
+KOVALAR = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Histogram:
+    def __init__(self, kovalar=KOVALAR):
+        self.kovalar = kovalar
+        self.sayilar = [0] * (len(kovalar) + 1)  # son kova: +Inf
+        self.adet = 0
+        self.toplam = 0.0
+        self.en_az = float("inf")
+        self.en_cok = 0.0
+
+    def ekle(self, deger: float) -> None:
+        self.sayilar[bisect.bisect_left(self.kovalar, deger)] += 1
+        self.adet += 1
+        self.toplam += deger
+        self.en_az = min(self.en_az, deger)
+        self.en_cok = max(self.en_cok, deger)
+
+    def yuzdelik(self, q: float) -> Optional[float]:
+        """Kova sınırlarından doğrusal aradeğerlemeyle yaklaşık yüzdelik."""
+        if not self.adet:
+            return None
+        hedef = q * self.adet
+        birikmis = 0
+        for i, n in enumerate(self.sayilar):
+            if n and birikmis + n >= hedef:
+                alt = self.kovalar[i - 1] if i else 0.0
+                ust = self.kovalar[i] if i < len(self.kovalar) else self.en_cok
+                deger = alt + (ust - alt) * (hedef - birikmis) / n
+                return min(max(deger, self.en_az), self.en_cok)
+            birikmis += n
+        return self.en_cok
+
+    def ozet(self) -> dict:
+        yuz = {f"p{int(q * 100)}": self.yuzdelik(q) for q in (0.5, 0.95, 0.99)}
+        return {
+            "count": self.adet,
+            "sum": round(self.toplam, 6),
+            "min": round(self.en_az, 6) if self.adet else None,
+            "max": round(self.en_cok, 6) if self.adet else None,
+            "mean": round(self.toplam / self.adet, 6) if self.adet else None,
+            **{k: None if v is None else round(v, 6) for k, v in yuz.items()},
+        }
+
+
+class Metrics:
+    def __init__(self, max_spans: int = METRICS_MAX_SPANS):
+        self.baslangic = time.time()
+        self.sayaclar: Dict[str, float] = {}
+        self.gostergeler: Dict[str, float] = {}
+        self.histogramlar: Dict[str, Histogram] = {}
+        self.spanlar: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._yigin = threading.local()  # thread başına açık span adları
+
+    def say(self, ad: str, n: float = 1) -> None:
+        with self._lock:
+            self.sayaclar[ad] = self.sayaclar.get(ad, 0) + n
+
+    def ayarla(self, ad: str, deger: float) -> None:
+        with self._lock:
+            self.gostergeler[ad] = deger
+
+    def gozlem(self, ad: str, saniye: float) -> None:
+        with self._lock:
+            h = self.histogramlar.get(ad)
+            if h is None:
+                h = self.histogramlar[ad] = Histogram()
+            h.ekle(saniye)
+
+    @contextmanager
+    def span(self, ad: str, **etiketler) -> Iterator[None]:
+        yigin: List[str] = self._yigin.__dict__.setdefault("adlar", [])
+        ust = yigin[-1] if yigin else None
+        yigin.append(ad)
+        t0 = time.perf_counter()
+        hata = None
+        try:
+            yield
+        except BaseException as e:
+            hata = type(e).__name__
+            raise
+        finally:
+            sure = time.perf_counter() - t0
+            yigin.pop()
+            self.gozlem(ad, sure)
+            kayit = {"name": ad, "parent": ust, "start": round(time.time() - sure - self.baslangic, 6),
+                     "duration": round(sure, 6), "thread": threading.current_thread().name}
+            if etiketler:
+                kayit["labels"] = etiketler
+            if hata:
+                kayit["error"] = hata
+                self.say(ad + ".errors")
+            with self._lock:
+                self.spanlar.append(kayit)
+
+    def rapor(self) -> dict:
+        with self._lock:
+            return {
+                "started": self.baslangic,
+                "elapsed": round(time.time() - self.baslangic, 3),
+                "counters": dict(sorted(self.sayaclar.items())),
+                "gauges": dict(sorted(self.gostergeler.items())),
+                "histograms": {ad: h.ozet() for ad, h in sorted(self.histogramlar.items())},
+                "spans": list(self.spanlar),
+            }
+
+    def prometheus_metni(self, onek: str = "muvera") -> str:
+        """Prometheus metin biçimi (sayaçlar *_total, histogramlar saniye cinsinden)."""
+        def ad_(ad: str) -> str:
+            return f"{onek}_" + re.sub(r"[^a-zA-Z0-9_]", "_", ad)
+
+        satirlar: List[str] = []
+        with self._lock:
+            for ad, v in sorted(self.sayaclar.items()):
+                satirlar += [f"# TYPE {ad_(ad)}_total counter", f"{ad_(ad)}_total {v:g}"]
+            for ad, v in sorted(self.gostergeler.items()):
+                satirlar += [f"# TYPE {ad_(ad)} gauge", f"{ad_(ad)} {v:g}"]
+            for ad, h in sorted(self.histogramlar.items()):
+                m = ad_(ad) + "_seconds"
+                satirlar.append(f"# TYPE {m} histogram")
+                birikmis = 0
+                for ust, n in zip(list(h.kovalar) + ["+Inf"], h.sayilar):
+                    birikmis += n
+                    satirlar.append(f'{m}_bucket{{le="{ust}"}} {birikmis}')
+                satirlar += [f"{m}_sum {h.toplam:.6f}", f"{m}_count {h.adet}"]
+        return "\n".join(satirlar) + "\n"
+
+    def sifirla(self) -> None:
+        with self._lock:
+            self.baslangic = time.time()
+            self.sayaclar.clear()
+            self.gostergeler.clear()
+            self.histogramlar.clear()
+            self.spanlar.clear()
+
+
+class _Kapali(Metrics):
+    """METRICS=0: çağrılar hiçbir şey yapmaz."""
+
+    def say(self, ad: str, n: float = 1) -> None:
+        pass
+
+    def ayarla(self, ad: str, deger: float) -> None:
+        pass
+
+    def gozlem(self, ad: str, saniye: float) -> None:
+        pass
+
+    @contextmanager
+    def span(self, ad: str, **etiketler) -> Iterator[None]:
+        yield
+
+
+METRICS: Metrics = Metrics() if METRICS_ENABLED else _Kapali()
+span = METRICS.span
+say = METRICS.say
+ayarla = METRICS.ayarla
+gozlem = METRICS.gozlem
+rapor = METRICS.rapor
+
+
+def rapor_yaz(path: str, ek: Optional[dict] = None) -> str:
+    veri = rapor()
+    if ek:
+        veri.update(ek)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(veri, f, ensure_ascii=False, indent=2)
+    return path
+
+
+# ----------------------------- #
+# Giriş noktaları: rapor + profil
+# ----------------------------- #
+_baslatildi: Optional[str] = None
+
+
+def _profil_baslat(ad: str, damga: str):
+    if PROFILE in ("", "0"):
+        return None
+    os.makedirs(RUN_REPORT_DIR, exist_ok=True)
+    if PROFILE == "pyinstrument":
+        try:
+            from pyinstrument import Profiler  # type: ignore
+        except ImportError:
+            logging.warning("pyinstrument kurulu değil, cProfile kullanılıyor.")
+        else:
+            p = Profiler()
+            p.start()
+
+            def bitir() -> str:
+                p.stop()
+                path = os.path.join(RUN_REPORT_DIR, f"{ad}-{damga}.html")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(p.output_html())
+                return path
+            return bitir
+    import cProfile
+    import pstats
+    profiller = [cProfile.Profile()]
+    kilit = threading.Lock()
+
+    def thread_kancasi(*_) -> None:
+        # Yeni thread'in ilk olayında çalışır: enable() bu thread'de kancanın yerine geçer
+        p = cProfile.Profile()
+        try:
+            p.enable()
+        except ValueError:  # Python 3.12+: tek profiler (sys.monitoring) tüm thread'leri zaten görür
+            sys.setprofile(None)
+            return
+        with kilit:
+            profiller.append(p)
+
+    threading.setprofile(thread_kancasi)
+    profiller[0].enable()
+
+    def bitir() -> str:
+        threading.setprofile(None)
+        profiller[0].disable()
+        with kilit:
+            stats = pstats.Stats(*profiller)
+        path = os.path.join(RUN_REPORT_DIR, f"{ad}-{damga}.prof")
+        stats.dump_stats(path)
+        return path
+    return bitir
+
+
+def baslat(ad: str) -> None:
+    """Giriş noktası başında çağrılır (bir kez); çıkışta rapor/profil dosyalarını yazar."""
+    global _baslatildi
+    if _baslatildi is not None:
+        return
+    _baslatildi = ad
+    damga = time.strftime("%Y%m%d-%H%M%S")
+    profil_bitir = _profil_baslat(ad, damga)
+
+    def bitir() -> None:
+        ek = {"entry_point": ad}
+        if profil_bitir is not None:
+            ek["profile"] = profil_bitir()
+        if METRICS_ENABLED:
+            path = rapor_yaz(os.path.join(RUN_REPORT_DIR, f"{ad}-{damga}.json"), ek)
+            print(f"📈 Çalıştırma raporu: {path}" + (f" (profil: {ek['profile']})" if "profile" in ek else ""))
+    atexit.register(bitir)
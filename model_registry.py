@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Süreç genelinde tek SentenceTransformer kaydı.
+- Model ilk kullanımda yüklenir (import anında değil); aynı ad için süreçte tek örnek paylaşılır.
+- prewarm(): modeli arka planda (daemon thread) önceden yükler.
+- ST_BACKEND=onnx|openvino ile CPU için hızlandırılmış backend seçilebilir;
+  ST_MODEL_FILE ile kuantize dosya verilebilir (örn. "onnx/model_qint8_avx512_vnni.onnx").
+  (sentence-transformers >= 3.2 ve `pip install sentence-transformers[onnx]` gerekir.)
+- model_kimligi(): ad + backend + model dosyası; embedding önbelleği ve artımlı durum bununla anahtarlanır
+  (kuantize bir backend'in vektörleri torch vektörleriyle karışmaz).
+"""
+
+import os
+import threading
+from typing import Dict, Optional
+
+from embedding_cache import open_cache
+from embedding_engine import EmbeddingEngine
+
+ST_MODEL_NAME = os.getenv("ST_MODEL_NAME", "emrecan/bert-base-turkish-cased-mean-nli-stsb-tr")
+ST_BACKEND = os.getenv("ST_BACKEND", "torch")
+ST_MODEL_FILE = os.getenv("ST_MODEL_FILE", "")
+ST_DEVICE = os.getenv("ST_DEVICE") or None
+ST_PREWARM = os.getenv("ST_PREWARM", "0") == "1"  # giriş noktalarında arka plan ön yüklemesi
+
+_lock = threading.Lock()
+_models: Dict[str, object] = {}
+_engines: Dict[str, EmbeddingEngine] = {}
+
+
+def _load(name: str):
+    from sentence_transformers import SentenceTransformer  # ağır import: yalnızca ilk kullanımda
+
+    kwargs = {}
+    if ST_BACKEND != "torch":
+        kwargs["backend"] = ST_BACKEND
+        if ST_MODEL_FILE:
+            kwargs["model_kwargs"] = {"file_name": ST_MODEL_FILE}
+    if ST_DEVICE:
+        kwargs["device"] = ST_DEVICE
+    return SentenceTransformer(name, **kwargs)
+
+
+def model_kimligi(name: Optional[str] = None) -> str:
+    """Vektörleri belirleyen model kimliği; torch için yalnızca ad (mevcut önbellekler geçerli kalır)."""
+    name = name or ST_MODEL_NAME
+    if ST_BACKEND == "torch":
+        return name
+    return f"{name}|{ST_BACKEND}|{ST_MODEL_FILE}" if ST_MODEL_FILE else f"{name}|{ST_BACKEND}"
+
+
+def get_model(name: Optional[str] = None):
+    """Paylaşılan modeli döndürür; gerekirse (tek sefer, thread-safe) yükler."""
+    name = name or ST_MODEL_NAME
+    model = _models.get(name)
+    if model is None:
+        with _lock:
+            model = _models.get(name)
+            if model is None:
+                model = _models[name] = _load(name)
+    return model
+
+
+def register_model(name: str, model) -> None:
+    """Hazır bir modeli ad altında kaydeder (örn. benchmark'ta yerel/sahte model); get_model onu döndürür."""
+    with _lock:
+        _models[name] = model
+
+
+def get_engine(name: Optional[str] = None) -> EmbeddingEngine:
+    """Model başına tek EmbeddingEngine; model yalnızca önbellekte olmayan bir metin encode edilirken yüklenir."""
+    name = name or ST_MODEL_NAME
+    engine = _engines.get(name)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = _engines[name] = EmbeddingEngine(loader=lambda: get_model(name),
+                                                          cache=open_cache(model_kimligi(name)))
+    return engine
+
+
+def prewarm(name: Optional[str] = None) -> threading.Thread:
+    """Modeli arka planda yüklemeye başlar; ilk encode çağrısı beklemeden hazır olur."""
+    t = threading.Thread(target=get_model, args=(name,), name="st-prewarm", daemon=True)
+    t.start()
+    return t
+
+
+def is_loaded(name: Optional[str] = None) -> bool:
+    return (name or ST_MODEL_NAME) in _models
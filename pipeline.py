@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+Akışlı (streaming) analiz hattı: kazıma → normalizasyon → embedding/eşleştirme → iyileştirme.
+- Her aşama bir üreteçtir; bloklar PIPELINE_CHUNK_SIZE'lık parçalar halinde akar.
+- Aşamalar ayrı thread'lerde çalışır ve PIPELINE_QUEUE_SIZE sınırlı kuyruklarla bağlanır:
+  alt aşama yavaşsa (ör. LLM) kuyruk dolar ve üst aşama bekler (geri basınç).
+- Sonuçlar her parçadan sonra tablolara (Parquet part dosyası + CSV dışa aktarımı, bkz. columnar_store)
+  eklenir; tablolar bütünüyle bellekte tutulmaz. STORE_EMBEDDINGS=1 ise blok vektörleri de yazılır.
+- Blok vektörleri bellekteki matrise eklenmez (EmbeddingEngine.encode), yalnızca sorgu/niyet
+  vektörleri kalıcıdır; tepe bellek blok sayısından bağımsızdır.
+İlerleme olayları (scraped / embedded / matched / improved) isteğe bağlı `ilerleme(olay, veri)`
+geri çağrısıyla bildirilir (bkz. jobs.py); geri çağrı aşama thread'lerinden çağrılır.
+Aşama süreleri "pipeline.*" span'leri, kuyruk bekleme süreleri "pipeline.<kuyruk>.put_wait"
+histogramlarıyla ölçülür (bkz. metrics.py): put_wait büyükse alt aşama darboğazdır.
+Site taramasında sayfa, tüm satırları yazıldıktan sonra yazan thread tarafından tamamlandı olarak
+onaylanır (crawler.Onay); kesintide kuyruklarda bekleyen sayfalar kontrol noktasında sıradadır.
+Kullanım:
+    python pipeline.py https://site.com            # tek sayfa
+    CRAWL_MODE=1 python pipeline.py https://site.com
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import STORE_EMBEDDINGS, TabloYazici
+from content_normalizer import normalize_content
+from metrics import baslat, gozlem, say, span
+from matrix_matcher import (DURUMLAR, UYUM_ESIGI, YUKSEK_UYUM_ESIGI, content_blocks, durum_etiketleri,
+                            title_description_birbirine_uyum, title_description_uyumu)
+from model_registry import get_engine
+from query_clusters import SorguKumeleri, kumele
+
+PIPELINE_CHUNK_SIZE = int(os.getenv("PIPELINE_CHUNK_SIZE", "256"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+# PIPELINE_LLM=1: içerik × niyet satırları da parça parça LLM ile iyileştirilir
+PIPELINE_LLM = os.getenv("PIPELINE_LLM", "0") == "1"
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")
+
+
+class Blok(NamedTuple):
+    url: str
+    tag: str
+    text: str
+
+
+class _Hata:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+_BITTI = object()
+
+Ilerleme = Callable[[str, dict], None]
+
+
+def _bildir(ilerleme: Optional[Ilerleme], olay: str, **veri) -> None:
+    if ilerleme is not None:
+        ilerleme(olay, veri)
+
+
+def arka_planda(it: Iterable, maxsize: int = PIPELINE_QUEUE_SIZE, ad: str = "kuyruk") -> Iterator:
+    """Üreteci ayrı thread'de çalıştırır; kuyruk doluysa üretici bekler. Hatalar tüketiciye taşınır."""
+    q: "queue.Queue" = queue.Queue(maxsize=maxsize)
+
+    def run() -> None:
+        try:
+            for x in it:
+                t0 = time.perf_counter()
+                q.put(x)
+                gozlem(f"pipeline.{ad}.put_wait", time.perf_counter() - t0)
+        except BaseException as e:  # tüketici thread'inde yeniden fırlatılır
+            q.put(_Hata(e))
+        q.put(_BITTI)
+
+    threading.Thread(target=run, daemon=True).start()
+    while True:
+        x = q.get()
+        if x is _BITTI:
+            return
+        if isinstance(x, _Hata):
+            raise x.exc
+        yield x
+
+
+# ----------------------------- #
+# Aşamalar
+# ----------------------------- #
+def sayfalar(url: str, crawl_mode: bool = False, checkpoint: Optional[str] = None,
+             onay=None) -> Iterator[Tuple[str, dict]]:
+    if crawl_mode:
+        from crawler import crawl
+        yield from crawl(url, checkpoint=checkpoint, onay=onay)
+    else:
+        from webScraping import get_structured_web_content
+        yield url, get_structured_web_content(url)
+
+
+def normalize(pages: Iterable[Tuple[str, dict]]) -> Iterator[Tuple[str, dict]]:
+    for url, content in pages:
+        with span("pipeline.normalize"):
+            content = normalize_content(content)
+        yield url, content
+
+
+def bloklar(pages: Iterable[Tuple[str, dict]]) -> Iterator[Blok]:
+    for url, content in pages:
+        for tag, text in content_blocks(content):
+            yield Blok(url, tag, text)
+
+
+def parcala(it: Iterable, size: int = PIPELINE_CHUNK_SIZE) -> Iterator[List]:
+    it = iter(it)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _uzun_tablo(chunk: Sequence[Blok], targets: Sequence[str], scores: np.ndarray, target_col: str) -> pd.DataFrame:
+    """Parça için (URL + eski CSV kolonları) uzun biçimli tablo; hedef dış, blok iç döngü."""
+    nt, nb = scores.shape
+    flat = scores.ravel().astype(np.float64)
+    return pd.DataFrame({
+        "URL": np.tile(np.array([b.url for b in chunk], dtype=object), nt),
+        "HTML Bölümü": np.tile(np.array([b.tag for b in chunk], dtype=object), nt),
+        "İçerik": np.tile(np.array([b.text for b in chunk], dtype=object), nt),
+        target_col: np.repeat(np.array(list(targets), dtype=object), nb),
+        "Benzerlik Skoru": flat,
+        "Uyum Durumu": durum_etiketleri(flat),
+    })
+
+
+class EnIyiEslesme:
+    """Sorgu başına en uyumlu blok ve etiket dağılımı; parçalar geldikçe güncellenir."""
+
+    def __init__(self, targets: Sequence[str], target_col: str = "Kullanıcı Sorgusu"):
+        self.targets = list(targets)
+        self.target_col = target_col
+        n = len(self.targets)
+        self.best = np.full(n, -np.inf, dtype=np.float32)
+        self.blok: List[Optional[Blok]] = [None] * n
+        self.counts = np.zeros((n, len(DURUMLAR)), dtype=np.int64)
+
+    def guncelle(self, chunk: Sequence[Blok], scores: np.ndarray) -> None:
+        n = len(self.targets)
+        i = scores.argmax(axis=1)
+        m = scores[np.arange(n), i]
+        for t in np.flatnonzero(m > self.best):
+            self.best[t], self.blok[t] = m[t], chunk[i[t]]
+        bins = np.digitize(scores, [UYUM_ESIGI, YUKSEK_UYUM_ESIGI])
+        for k in range(len(DURUMLAR)):
+            self.counts[:, k] += (bins == k).sum(axis=1)
+
+    def tablo(self) -> pd.DataFrame:
+        found = np.array([b is not None for b in self.blok], dtype=bool)
+        df = pd.DataFrame({
+            self.target_col: self.targets,
+            "URL": [b.url if b else None for b in self.blok],
+            "HTML Bölümü": [b.tag if b else None for b in self.blok],
+            "En Uyumlu İçerik": [b.text if b else None for b in self.blok],
+            "Benzerlik Skoru": np.where(found, self.best, np.nan),
+            "Uyum Durumu": np.where(found, durum_etiketleri(self.best), None),
+        })
+        for k, name in enumerate(DURUMLAR):
+            df[f"{name} Sayısı"] = self.counts[:, k]
+        return df
+
+
+def eslestir(chunks: Iterable[List[Blok]], sorgular: Sequence[str], niyetler: Sequence[str],
+             ozet: Optional[EnIyiEslesme] = None, engine=None,
+             bloklar_yazici: Optional[TabloYazici] = None,
+             ilerleme: Optional[Ilerleme] = None) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Her parça için (içerik × sorgu, içerik × niyet) uzun tabloları; hedef vektörleri bir kez encode edilir."""
+    engine = engine or get_engine()
+    hedefler = list(sorgular) + list(niyetler)
+    sv, nv = engine.vectors(sorgular), engine.vectors(niyetler)
+    for chunk in chunks:
+        say("pipeline.blocks", len(chunk))
+        with span("pipeline.embed"):
+            bv = engine.encode([b.text for b in chunk])
+        _bildir(ilerleme, "embedded", blocks=len(chunk))
+        if bloklar_yazici is not None:
+            bloklar_yazici.yaz(pd.DataFrame(list(chunk), columns=["URL", "HTML Bölümü", "İçerik"]), vectors=bv)
+        with span("pipeline.match"):
+            s_scores = sv @ bv.T if len(sorgular) else np.zeros((0, len(chunk)), np.float32)
+            n_scores = nv @ bv.T if len(niyetler) else np.zeros((0, len(chunk)), np.float32)
+            if ozet is not None and len(sorgular):
+                ozet.guncelle(chunk, s_scores)
+            engine.retain(hedefler)  # iyileştirme aşamasının eklediği vektörler de bırakılır
+            tablolar = (_uzun_tablo(chunk, sorgular, s_scores, "Kullanıcı Sorgusu"),
+                        _uzun_tablo(chunk, niyetler, n_scores, "Kullanıcı Niyeti"))
+        _bildir(ilerleme, "matched", blocks=len(chunk), pairs=int(s_scores.size + n_scores.size))
+        yield tablolar
+
+
+def iyilestir(matches: Iterable[Tuple[pd.DataFrame, pd.DataFrame]], llm: bool = PIPELINE_LLM
+              ) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame, Optional[pd.DataFrame], Optional[pd.DataFrame]]]:
+    """Eşleşme parçalarına deterministik (sorgu) ve isteğe bağlı LLM (niyet) iyileştirmesi uygular."""
+    import icerik_sorgu_uyumu_iylestirme as sorgu_iyi
+    niyet_iyi = None
+    if llm:
+        import icerik_niyet_iylestirme as niyet_iyi
+    sira = 1
+    butce = niyet_iyi.Butce(niyet_iyi.RUN_TIME_BUDGET, niyet_iyi.RUN_TOKEN_BUDGET) if niyet_iyi else None
+    for sorgu_df, niyet_df in matches:
+        with span("pipeline.improve.sorgu"):
+            cand = sorgu_iyi.secili_satirlar(sorgu_df)
+            sorgu_sonuc = sorgu_iyi.iyilestir(cand, workers=1) if len(cand) else None
+        niyet_sonuc = None
+        if niyet_iyi is not None:
+            with span("pipeline.improve.niyet"):
+                work = niyet_iyi.secili_satirlar(niyet_df)
+                niyet_sonuc = niyet_iyi.iyilestir(work, start=sira, butce=butce) if len(work) else None
+            sira += len(work)
+        yield sorgu_df, niyet_df, sorgu_sonuc, niyet_sonuc
+
+
+# ----------------------------- #
+# Çalıştırma
+# ----------------------------- #
+def calistir(url: str, sorgular: Sequence[str], niyetler: Sequence[str], crawl_mode: bool = False,
+             checkpoint: Optional[str] = None, llm: bool = PIPELINE_LLM,
+             chunk_size: int = PIPELINE_CHUNK_SIZE, embeddings: bool = STORE_EMBEDDINGS,
+             kok: str = "", ilerleme: Optional[Ilerleme] = None,
+             kumeler: Optional[SorguKumeleri] = None) -> dict:
+    """
+    Hattı çalıştırır; yazılan satır sayılarını döndürür.
+    Dosyalar `kok` klasörüne (varsayılan: çalışma dizini) yazılır; eşzamanlı işler ayrı kök kullanır.
+    Eşleştirme ve deterministik iyileştirme yalnızca sorgu kümelerinin temsilcileriyle yapılır;
+    skor ve sonuç satırları üye sorgulara yayılır.
+    """
+    def yol(*parts: str) -> str:
+        return os.path.join(kok, *parts)
+
+    yeni = True  # kontrol noktası bu URL'ye aitse ve tamamlanmış sayfa varsa dosyalara eklenir
+    if crawl_mode and checkpoint:
+        from crawler import tamamlananlar
+        yeni = not tamamlananlar(checkpoint, url)
+    yazicilar = {
+        "sorgu": TabloYazici(yol("html_icerik_sorgu_uyumu.csv"), yeni),
+        "niyet": TabloYazici(yol("html_icerik_niyet_uyumu.csv"), yeni),
+        "title_desc": TabloYazici(yol("title_description_uyum.csv"), yeni),
+        "title_meta": TabloYazici(yol("title_description_kendi_uyumu.csv"), yeni),
+        "sorgu_sonuc": TabloYazici(yol(OUTPUT_DIR, "icerik_sorgu_uyumu_sonuc.csv"), yeni),
+        "niyet_sonuc": TabloYazici(yol(OUTPUT_DIR, "niyet_iyilestirme_sonuc.csv"), yeni),
+    }
+    if embeddings:  # vektörler yalnızca Parquet'e yazılır
+        yazicilar["bloklar"] = TabloYazici(yol(OUTPUT_DIR, "icerik_bloklari.csv"), yeni, csv_export=False)
+    kumeler = kumeler or kumele(sorgular)
+    temsilciler = kumeler.temsilciler
+    ozet = EnIyiEslesme(temsilciler)
+    # Sayfalar, satırları yazan bu thread tarafından onaylanır (üretici thread crawl'ı ilerletse de)
+    onay = None
+    if crawl_mode and checkpoint:
+        from crawler import Onay
+        onay = Onay()
+    sirada: "deque[str]" = deque()  # title/meta'sı yazılmış, blok satırları henüz bitmemiş sayfalar
+
+    def tamamla(son_url: Optional[str]) -> None:
+        """`son_url`den önceki sayfaların tüm satırları yazıldı (None: akış bitti, hepsi)."""
+        while sirada and sirada[0] != son_url:
+            u = sirada.popleft()
+            if onay is not None:
+                onay(u)
+
+    def sayfa_tablolari(pages: Iterable[Tuple[str, dict]]) -> Iterator[Tuple[str, dict]]:
+        # Sayfa başına küçük tablolar (title/meta) yazılır, sayfa bloklara açılmak üzere aktarılır
+        for sayfa_url, content in pages:
+            say("pipeline.pages")
+            with span("pipeline.title_meta"):
+                for key, df_ in (("title_desc", kumeler.yay(title_description_uyumu(content, temsilciler))),
+                                 ("title_meta", title_description_birbirine_uyum(content))):
+                    df_.insert(0, "URL", sayfa_url)
+                    yazicilar[key].yaz(df_)
+            print(f"📄 {sayfa_url} işleniyor...")
+            _bildir(ilerleme, "scraped", url=sayfa_url)
+            sirada.append(sayfa_url)
+            yield sayfa_url, content
+
+    pages = sayfa_tablolari(arka_planda(normalize(sayfalar(url, crawl_mode, checkpoint, onay)), ad="sayfa"))
+    chunks = parcala(bloklar(pages), chunk_size)
+    matches = arka_planda(eslestir(chunks, temsilciler, niyetler, ozet, bloklar_yazici=yazicilar.get("bloklar"),
+                                   ilerleme=ilerleme), ad="eslesme")
+    for n, (sorgu_df, niyet_df, sorgu_sonuc, niyet_sonuc) in enumerate(iyilestir(matches, llm), 1):
+        # İyileştirme temsilci satırlarında (kendi skorlarıyla) yapılır; tablo ve sonuç satırları üyelere yayılır
+        sorgu_df = kumeler.yay(sorgu_df)
+        if sorgu_sonuc is not None:
+            sorgu_sonuc = kumeler.yay(sorgu_sonuc)
+        with span("pipeline.write"):
+            yazicilar["sorgu"].yaz(sorgu_df)
+            yazicilar["niyet"].yaz(niyet_df)
+            for key, df_ in (("sorgu_sonuc", sorgu_sonuc), ("niyet_sonuc", niyet_sonuc)):
+                if df_ is not None:
+                    yazicilar[key].yaz(df_)
+        # Bloklar sayfa sırasında akar: parçanın son bloğundan önceki sayfalar tamamen yazıldı
+        son_url = next((d["URL"].iloc[-1] for d in (sorgu_df, niyet_df) if len(d)), None)
+        if son_url is not None:
+            tamamla(son_url)
+        say("pipeline.chunks")
+        print(f"✅ Parça {n}: {len(sorgu_df)} içerik-sorgu, {len(niyet_df)} içerik-niyet satırı eklendi.")
+        _bildir(ilerleme, "improved", chunk=n,
+                rows=sum(len(d) for d in (sorgu_sonuc, niyet_sonuc) if d is not None))
+
+    tamamla(None)
+    kumeler.yay(ozet.tablo()).to_csv(yol("sorgu_en_uyumlu_bolum.csv"), index=False)
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)  # tamamlanan tarama bir sonraki çalıştırmada sıfırdan başlar
+    return {key: y.satir for key, y in yazicilar.items()}
+
+
+if __name__ == "__main__":
+    baslat("pipeline")
+    from intent_classifier import niyet_haritasi
+    from kullanici_sorgusu import sorgular
+
+    url = sys.argv[1] if len(sys.argv) > 1 else input("Analiz edilecek web sayfası URL'si: ").strip()
+    crawl_mode = os.getenv("CRAWL_MODE", "0") == "1"
+    checkpoint = os.getenv("CRAWL_CHECKPOINT", os.path.join(OUTPUT_DIR, "crawl_checkpoint.json")) if crawl_mode else None
+    kumeler = kumele(sorgular)
+    niyetler = list(dict.fromkeys(niyet_haritasi(sorgular, kumeler).values()))
+    print(calistir(url, sorgular, niyetler, crawl_mode=crawl_mode, checkpoint=checkpoint, kumeler=kumeler))
@@ -1,13 +1,33 @@
-from langchain_core.prompts import ChatPromptTemplate
+"""
+İçerik niyet iyileştirme prompt'u.
+Sistem prompt'u sabittir ve ayrı gönderilir (Ollama `system`): tüm satırlar aynı önekle başladığından
+sunucu, keep_alive ile yüklü kalan modelde bu öneki önbellekten kullanabilir.
+Kullanıcı şablonu import anında bir kez derlenir (bkz. sablon.Sablon).
+"""
 
-def build_prompt(kullanici_niyeti: str, mevcut_icerik: str, html_bolumu: str, eski_skor: float) -> str:
-    """
-    LLM'ye, metni küçük dokunuşlarla geliştirmesi için net talimat verir.
-    Hedef çıktı: JSON formatında eksiksiz döndürülmesi.
-    """
-    
-    # System Template
-    system_template = """
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+from sablon import Sablon  # type: ignore
+
+# Şablon metni değiştiğinde artırın: LLM önbelleğindeki (llm_cache) eski cevaplar geçersiz olur
+PROMPT_VERSION = "2"
+
+# Beklenen çıktı; Ollama'ya `format` olarak gönderilir ve llm_json ile doğrulanır
+HEDEF_ALAN = "Geliştirilmiş İçerik"
+OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "Kullanıcı Niyeti": {"type": "string"},
+        "Mevcut İçerik": {"type": "string"},
+        HEDEF_ALAN: {"type": "string", "minLength": 1},
+        "HTML Bölümü": {"type": "string"},
+    },
+    "required": ["Kullanıcı Niyeti", "Mevcut İçerik", HEDEF_ALAN, "HTML Bölümü"],
+}
+
+SYSTEM_PROMPT = """
 Sen bir SEO ve içerik geliştirme uzmanısın.
 Görevin, kullanıcı niyetine (intent) göre mevcut metni küçük dokunuşlarla iyileştirmektir.
 
@@ -30,9 +50,8 @@ Kurallar:
 7. KRİTİK KURAL: Mevcut metin mutlaka korunmalı, sadece küçük eklemeler yapılmalı. Metni kısaltma veya özetleme yapma!
 8. ÖNEMLİ: Kullanıcı niyetini doğrudan karşılayan ifadeler ekle (örn: "google reklam verme nasıl" için "nasıl yapılır" ifadesi mutlaka geçmeli).
 """
-    
-    # Human Template
-    human_template = """
+
+HUMAN_TEMPLATE = Sablon("""
 Girdi:
 Kullanıcı Niyeti: "{kullanici_niyeti}"
 Mevcut İçerik: "{mevcut_icerik}"
@@ -48,20 +67,24 @@ Beklenen çıktı formatı (JSON):
 }}
 
 Sadece bu JSON'u döndür, başka açıklama veya metin ekleme.
-"""
-    
-    # ChatPromptTemplate oluştur
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_template),
-        ("human", human_template)
-    ])
-    
-    # Formatla ve döndür
-    formatted_prompt = prompt.format(
+""")
+
+
+def build_user_prompt(kullanici_niyeti: str, mevcut_icerik: str, html_bolumu: str, eski_skor: float) -> str:
+    """
+    Satıra özgü kullanıcı mesajı; SYSTEM_PROMPT ile birlikte `system` parametresiyle gönderilir.
+    Hedef çıktı: JSON formatında eksiksiz döndürülmesi.
+    """
+    return HUMAN_TEMPLATE(
         kullanici_niyeti=kullanici_niyeti,
         mevcut_icerik=mevcut_icerik,
         html_bolumu=html_bolumu,
-        eski_skor=eski_skor
+        eski_skor=eski_skor,
     )
-    
-    return formatted_prompt
\ No newline at end of file
+
+
+def build_prompt(kullanici_niyeti: str, mevcut_icerik: str, html_bolumu: str, eski_skor: float) -> str:
+    """
+    Sistem + kullanıcı mesajı tek metin halinde (`system` parametresi kullanılamayan istemciler için).
+    """
+    return f"System: {SYSTEM_PROMPT}\nHuman: {build_user_prompt(kullanici_niyeti, mevcut_icerik, html_bolumu, eski_skor)}"
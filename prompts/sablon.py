@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+Önceden derlenmiş prompt şablonları (LangChain'siz).
+Şablon str.format sözdizimindedir ({alan}, kaçış için {{ }}); import anında bir kez ayrıştırılır,
+satır başına render yalnızca parçaların birleştirilmesidir.
+"""
+
+from string import Formatter
+from typing import List, Optional, Tuple
+
+
+class Sablon:
+    def __init__(self, metin: str):
+        self.metin = metin
+        self.parcalar: List[Tuple[str, Optional[str]]] = []
+        for sabit, alan, bicim, donusum in Formatter().parse(metin):
+            if bicim or donusum:
+                raise ValueError(f"Şablonda biçim/dönüşüm desteklenmez: {{{alan}!{donusum}:{bicim}}}")
+            self.parcalar.append((sabit, alan))
+        self.alanlar = frozenset(a for _, a in self.parcalar if a is not None)
+
+    def __call__(self, **degerler) -> str:
+        out = []
+        for sabit, alan in self.parcalar:
+            out.append(sabit)
+            if alan is not None:
+                out.append(str(degerler[alan]))
+        return "".join(out)
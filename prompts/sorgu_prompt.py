@@ -30,6 +30,18 @@ Eski Skor: {eski_skor}
 Lütfen SADECE geçerli bir JSON döndür.
 """.strip()
 
+# Beklenen çıktı; Ollama'ya `format` olarak gönderilir ve llm_json ile doğrulanır
+HEDEF_ALAN = "kisa_duzenleme"
+OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "kullanici_sorgusu": {"type": "string"},
+        "eski_metin": {"type": "string"},
+        HEDEF_ALAN: {"type": "string", "minLength": 1},
+    },
+    "required": ["kullanici_sorgusu", "eski_metin", HEDEF_ALAN],
+}
+
 def build_prompt(kullanici_sorgusu: str, eski_metin: str, html_bolumu: str, eski_skor: float) -> str:
     system = f"<|system|>\n{SYSTEM_TEMPLATE}"
     user = f"<|user|>\n" + HUMAN_TEMPLATE.format(
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Sorgu kanonikleştirme ve kümeleme: yakın varyantlar ("reklam ver", "reklam vermek",
+"reklam verme", "google reklam vermek" ...) tek temsilciyle niyet çıkarımı ve eşleştirmeden geçer,
+sonuçlar kümenin tüm üyelerine yayılır.
+1) Türkçe küçük harf (I→ı, İ→i) + ASCII katlama (reklamları = reklamlari) + hafif ek budama
+   (-mek/-mak, -me/-ma, -ler/-lar, iyelik/hal ekleri) ile kanonik anahtar; aynı anahtarlı
+   sorgular doğrudan aynı kümededir.
+2) Anahtar kümelerinin temsilcileri embedding benzerliği QUERY_CLUSTER_THRESHOLD üstündeyse ve
+   kök kümelerinden biri diğerini kapsıyorsa (QUERY_CLUSTER_MIN_OVERLAP) birleştirilir:
+   "google reklam" ile "reklam" birleşir, "facebook reklam" ile "instagram reklam" birleşmez.
+Temsilci, kümenin en öncelikli (verilen sırada ilk; query_store'da en çok gösterimli) sorgusudur.
+QUERY_CLUSTERING=0 ile kapatılır (her sorgu kendi kümesidir).
+Kullanım:
+    kumeler = kumele(sorgular)
+    df = tam_sorgu_uyum_tablosu(content, kumeler.temsilciler)
+    df = kumeler.yay(df)                      # her üye sorgu için satırlar
+"""
+
+import os
+from typing import Dict, FrozenSet, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from metrics import say
+from turkce_metin import katla, turkce_kucuk  # noqa: F401  (turkce_kucuk: geriye dönük dışa aktarım)
+
+QUERY_CLUSTERING = os.getenv("QUERY_CLUSTERING", "1") == "1"
+QUERY_CLUSTER_THRESHOLD = float(os.getenv("QUERY_CLUSTER_THRESHOLD", "0.9"))
+# Kök kümelerinin örtüşme katsayısı |A∩B| / min(|A|,|B|); 1.0 = biri diğerini kapsamalı
+QUERY_CLUSTER_MIN_OVERLAP = float(os.getenv("QUERY_CLUSTER_MIN_OVERLAP", "1.0"))
+
+# Uzun ekler önce denenir; kök en az 3 harf kalır (ASCII katlanmış biçimde)
+_EKLER = sorted([
+    "mek", "mak", "me", "ma", "ler", "lar", "leri", "lari", "si", "su", "i", "u",
+    "de", "da", "den", "dan", "te", "ta", "ten", "tan", "e", "a", "in", "un", "nin", "nun",
+    "yi", "yu", "ye", "ya", "ci", "cu",
+], key=len, reverse=True)
+_DOLGU = {"ve", "ile", "icin", "bir", "en", "de", "da"}
+
+
+def kok(kelime: str) -> str:
+    """Hafif Türkçe ek budama (katlanmış kelime üzerinde; tam bir morfolojik çözümleyici değildir)."""
+    degisti = True
+    while degisti:
+        degisti = False
+        for ek in _EKLER:
+            if kelime.endswith(ek) and len(kelime) - len(ek) >= 3:
+                kelime = kelime[:-len(ek)]
+                degisti = True
+                break
+    return kelime
+
+
+def kokler(sorgu: str) -> FrozenSet[str]:
+    return frozenset(kok(w) for w in katla(sorgu).split() if w not in _DOLGU)
+
+
+def kanonik(sorgu: str) -> str:
+    return " ".join(sorted(kokler(sorgu))) or katla(sorgu)
+
+
+class SorguKumeleri:
+    def __init__(self, sorgular: Sequence[str], temsilci: Dict[str, str]):
+        self.sorgular = list(sorgular)
+        self.temsilci = temsilci                       # sorgu -> temsilci
+        self.temsilciler = list(dict.fromkeys(temsilci[s] for s in self.sorgular))
+        self.uyeler: Dict[str, List[str]] = {t: [] for t in self.temsilciler}
+        for s in self.sorgular:
+            self.uyeler[temsilci[s]].append(s)
+
+    def __len__(self) -> int:
+        return len(self.temsilciler)
+
+    def ozet(self) -> dict:
+        n, k = len(self.sorgular), len(self.temsilciler)
+        return {"sorgu": n, "kume": k, "kazanc": round(n / k, 2) if k else None}
+
+    def tablo(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "Sorgu": self.sorgular,
+            "Temsilci": [self.temsilci[s] for s in self.sorgular],
+            "Kanonik": [kanonik(s) for s in self.sorgular],
+        })
+
+    def yay(self, df: pd.DataFrame, kolon: str = "Kullanıcı Sorgusu") -> pd.DataFrame:
+        """
+        Temsilci satırlarını her üye için çoğaltır; satırlar üye sorgu sırasında, temsilci içi sıra korunur.
+        Üye satırları temsilcinin skorlarını taşır: skora göre satır seçen/karşılaştıran adımlar
+        (ör. iyileştirme) yayılmadan önce temsilci satırlarında çalıştırılmalı, sonuçları yayılmalıdır.
+        """
+        if len(self.temsilciler) == len(self.sorgular) or df.empty:
+            return df
+        harita = pd.DataFrame({"_t": [self.temsilci[s] for s in self.sorgular], kolon: self.sorgular,
+                               "_sira": np.arange(len(self.sorgular))})
+        out = df.rename(columns={kolon: "_t"}).assign(_satir=np.arange(len(df)))
+        out = out.merge(harita, on="_t", how="inner")
+        out = out.sort_values(["_sira", "_satir"], kind="stable")
+        return out[list(df.columns)].reset_index(drop=True)
+
+    def yay_sozluk(self, deger: Dict[str, str]) -> Dict[str, str]:
+        """{temsilci: değer} -> {sorgu: değer}"""
+        return {s: deger[self.temsilci[s]] for s in self.sorgular if self.temsilci[s] in deger}
+
+
+def kumele(sorgular: Sequence[str], esik: float = QUERY_CLUSTER_THRESHOLD,
+           min_ortusme: float = QUERY_CLUSTER_MIN_OVERLAP, engine=None,
+           etkin: bool = QUERY_CLUSTERING) -> SorguKumeleri:
+    """Sorguları kümeler; `sorgular` öncelik sırasında olmalıdır (ilk gelen temsilci olur)."""
+    sorgular = list(dict.fromkeys(str(s) for s in sorgular))
+    if not etkin or len(sorgular) < 2:
+        return SorguKumeleri(sorgular, {s: s for s in sorgular})
+
+    # 1) Kanonik anahtar
+    anahtar_temsilci: Dict[str, str] = {}
+    for s in sorgular:
+        anahtar_temsilci.setdefault(kanonik(s), s)
+    adaylar = list(anahtar_temsilci.values())       # öncelik sırasında
+    lider = {a: a for a in adaylar}
+
+    # 2) Embedding benzerliği + kök kapsama (açgözlü lider kümeleme)
+    if esik < 1.0 and len(adaylar) > 1:
+        if engine is None:
+            from model_registry import get_engine
+            engine = get_engine()
+        sim = engine.similarity_matrix(adaylar, adaylar)
+        kk = [kokler(a) for a in adaylar]
+        liderler: List[int] = []
+        for i, a in enumerate(adaylar):
+            secilen = None
+            if liderler:
+                L = np.asarray(liderler)
+                for j in L[np.argsort(-sim[i, L], kind="stable")]:
+                    if sim[i, j] < esik:
+                        break
+                    ortak = len(kk[i] & kk[j]) / max(1, min(len(kk[i]), len(kk[j])))
+                    if ortak >= min_ortusme:
+                        secilen = adaylar[j]
+                        break
+            if secilen is None:
+                liderler.append(i)
+            else:
+                lider[a] = secilen
+
+    kumeler = SorguKumeleri(sorgular, {s: lider[anahtar_temsilci[kanonik(s)]] for s in sorgular})
+    say("query_clusters.queries", len(sorgular))
+    say("query_clusters.clusters", len(kumeler))
+    return kumeler
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Search Console sorgu dışa aktarımlarının (1hafta.xlsx, 3ay.xlsx, ...) okunması ve sorgu seçimi.
+- Her Excel dosyası bir kez ayrıştırılır ve QUERY_CACHE_DIR altında Parquet olarak saklanır;
+  kaynağın mtime/boyutu değişince önbellek yeniden üretilir (Excel ayrıştırması yalnızca o zaman).
+  python-calamine kuruluysa Excel onunla (openpyxl'den çok daha hızlı) okunur.
+- QUERY_EXPORTS birden fazla dosya verirse dönemler sorgu bazında birleştirilir: dönem başına tıklama/gösterim kolonları, toplam Tıklamalar /
+  Gösterimler, toplamlardan TO (CTR) ve gösterim ağırlıklı Pozisyon.
+  Not: dönemler örtüşebilir (1 hafta ⊂ 3 ay); toplamlar sıralama içindir, tekil trafik değildir.
+- Seçim stratejileri (QUERY_STRATEGY):
+    top_n             tıklamaya göre ilk N ∪ gösterime göre ilk N (eski kullanici_sorgusu davranışı)
+    impression_share  gösterimlerin QUERY_SHARE oranını kapsayan en az sorgu (en fazla QUERY_MAX)
+    long_tail         QUERY_MIN_WORDS+ kelimeli, QUERY_MIN_IMPRESSIONS+ gösterimli sorgulardan ilk N
+Modül import edildiğinde dosya okumaz.
+Kullanım:
+    from query_store import sorgulari_getir, sorgu_tablosu
+    sorgular = sorgulari_getir()                              # ortam değişkenlerindeki strateji
+    sorgular = sorgulari_getir("impression_share", pay=0.5)
+"""
+
+import hashlib
+import importlib.util
+import os
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Varsayılan tek dönem (eski kullanici_sorgusu girdisi); dönem birleştirme isteğe bağlıdır:
+# QUERY_EXPORTS=1hafta.xlsx,3ay.xlsx
+QUERY_EXPORTS = [p.strip() for p in os.getenv("QUERY_EXPORTS", "1hafta.xlsx").split(",") if p.strip()]
+QUERY_CACHE_DIR = os.getenv("QUERY_CACHE_DIR", os.path.join(".cache", "sorgular"))
+QUERY_STRATEGY = os.getenv("QUERY_STRATEGY", "top_n")
+QUERY_TOP_N = int(os.getenv("QUERY_TOP_N", "5"))
+QUERY_SHARE = float(os.getenv("QUERY_SHARE", "0.8"))
+QUERY_MAX = int(os.getenv("QUERY_MAX", "50"))
+QUERY_MIN_WORDS = int(os.getenv("QUERY_MIN_WORDS", "3"))
+QUERY_MIN_IMPRESSIONS = int(os.getenv("QUERY_MIN_IMPRESSIONS", "10"))
+
+# Search Console dışa aktarım kolonları -> tablo kolonları
+KOLONLAR = {
+    "En çok yapılan sorgular": "Sorgu",
+    "Tıklamalar": "Tıklamalar",
+    "Gösterimler": "Gösterimler",
+    "TO": "TO",
+    "Pozisyon": "Pozisyon",
+}
+_SURUM = b"1"  # önbellek biçimi değişirse artırın
+_EXCEL_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+
+
+def donem_adi(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _onbellek_yolu(path: str) -> str:
+    h = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:10]
+    return os.path.join(QUERY_CACHE_DIR, f"{donem_adi(path)}-{h}.parquet")
+
+
+def _kaynak_izi(path: str) -> bytes:
+    st = os.stat(path)
+    return b"%s-%d-%d" % (_SURUM, st.st_mtime_ns, st.st_size)
+
+
+def _ayristir(path: str) -> pd.DataFrame:
+    df = pd.read_excel(path, engine=_EXCEL_ENGINE)
+    eksik = set(KOLONLAR) - set(df.columns)
+    if eksik:
+        raise KeyError(f"{path}: eksik kolonlar {eksik}")
+    df = df[list(KOLONLAR)].rename(columns=KOLONLAR)
+    df["Sorgu"] = df["Sorgu"].astype("string").str.strip().str.replace(r"\s+", " ", regex=True)
+    df = df[df["Sorgu"].notna() & (df["Sorgu"] != "")]
+    for col in ("Tıklamalar", "Gösterimler"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(np.int64)
+    for col in ("TO", "Pozisyon"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype(np.float32)
+    return df.reset_index(drop=True)
+
+
+def export_oku(path: str) -> pd.DataFrame:
+    """Tek dönemin sorgu tablosu; Parquet önbelleği kaynak dosyayla güncelse Excel açılmaz."""
+    cache = _onbellek_yolu(path)
+    iz = _kaynak_izi(path)
+    if os.path.exists(cache):
+        meta = pq.read_schema(cache).metadata or {}
+        if meta.get(b"kaynak") == iz:
+            return pq.read_table(cache, memory_map=True).to_pandas()
+    df = _ayristir(path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"kaynak": iz})
+    os.makedirs(QUERY_CACHE_DIR, exist_ok=True)
+    tmp = cache + ".tmp"
+    pq.write_table(table, tmp)
+    os.replace(tmp, cache)
+    return df
+
+
+def sorgu_tablosu(paths: Sequence[str] = QUERY_EXPORTS) -> pd.DataFrame:
+    """Dönemleri sorgu bazında birleştirir (gösterime göre azalan sırada)."""
+    parcalar = []
+    for path in paths:
+        df = export_oku(path)
+        df["Dönem"] = donem_adi(path)
+        parcalar.append(df)
+    if not parcalar:
+        return pd.DataFrame(columns=["Sorgu", "Tıklamalar", "Gösterimler", "TO", "Pozisyon", "Dönem Sayısı"])
+    uzun = pd.concat(parcalar, ignore_index=True)
+    uzun["_poz_x_gos"] = uzun["Pozisyon"].astype(np.float64) * uzun["Gösterimler"]
+    g = uzun.groupby("Sorgu", sort=False)
+    out = g.agg(**{"Tıklamalar": ("Tıklamalar", "sum"), "Gösterimler": ("Gösterimler", "sum"),
+                   "_poz_x_gos": ("_poz_x_gos", "sum"), "Dönem Sayısı": ("Dönem", "nunique")})
+    gos = out["Gösterimler"].to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["TO"] = np.where(gos > 0, out["Tıklamalar"] / gos, np.nan).astype(np.float32)
+        out["Pozisyon"] = np.where(gos > 0, out.pop("_poz_x_gos") / gos, np.nan).astype(np.float32)
+    donemsel = uzun.pivot_table(index="Sorgu", columns="Dönem", values=["Tıklamalar", "Gösterimler"],
+                                aggfunc="sum", fill_value=0)
+    donemsel.columns = [f"{olcu} ({donem})" for olcu, donem in donemsel.columns]
+    out = out.join(donemsel)
+    out = out[["Tıklamalar", "Gösterimler", "TO", "Pozisyon", "Dönem Sayısı"] + list(donemsel.columns)]
+    out = out.reset_index().sort_values(["Gösterimler", "Tıklamalar"], ascending=False, kind="stable")
+    return out.reset_index(drop=True)
+
+
+# ----------------------------- #
+# Seçim stratejileri: tablo -> sorgu listesi (öncelik sırasında)
+# ----------------------------- #
+def top_n(df: pd.DataFrame, n: int = QUERY_TOP_N) -> List[str]:
+    tik = df.sort_values("Tıklamalar", ascending=False, kind="stable").head(n)["Sorgu"]
+    gos = df.sort_values("Gösterimler", ascending=False, kind="stable").head(n)["Sorgu"]
+    return list(dict.fromkeys(list(tik) + list(gos)))
+
+
+def impression_share(df: pd.DataFrame, pay: float = QUERY_SHARE, max_n: int = QUERY_MAX) -> List[str]:
+    d = df.sort_values("Gösterimler", ascending=False, kind="stable")
+    gos = d["Gösterimler"].to_numpy(dtype=np.float64)
+    if not len(gos) or gos.sum() <= 0:
+        return []
+    kapsam = np.cumsum(gos) / gos.sum()
+    n = int(np.searchsorted(kapsam, pay)) + 1  # payı ilk aşan sorgu dahil
+    return d["Sorgu"].head(min(n, max_n)).tolist()
+
+
+def long_tail(df: pd.DataFrame, n: int = QUERY_MAX, min_kelime: int = QUERY_MIN_WORDS,
+              min_gosterim: int = QUERY_MIN_IMPRESSIONS) -> List[str]:
+    kelime = df["Sorgu"].str.split().str.len()
+    d = df[(kelime >= min_kelime) & (df["Gösterimler"] >= min_gosterim)]
+    return d.sort_values(["Gösterimler", "Tıklamalar"], ascending=False, kind="stable")["Sorgu"].head(n).tolist()
+
+
+STRATEJILER: Dict[str, Callable[..., List[str]]] = {
+    "top_n": top_n,
+    "impression_share": impression_share,
+    "long_tail": long_tail,
+}
+
+_secim_onbellegi: Dict[Tuple, Tuple[Tuple[bytes, ...], List[str]]] = {}
+
+
+def sorgulari_getir(strateji: str = QUERY_STRATEGY, paths: Optional[Sequence[str]] = None, **kw) -> List[str]:
+    """Seçilen stratejiye göre sorgular; kaynaklar değişmedikçe süreç içinde yeniden hesaplanmaz."""
+    if strateji not in STRATEJILER:
+        raise ValueError(f"Bilinmeyen strateji: {strateji} (seçenekler: {', '.join(STRATEJILER)})")
+    paths = tuple(paths or QUERY_EXPORTS)
+    izler = tuple(_kaynak_izi(p) for p in paths)
+    key = (strateji, paths, tuple(sorted(kw.items())))
+    hit = _secim_onbellegi.get(key)
+    if hit is not None and hit[0] == izler:
+        return list(hit[1])
+    secim = [str(s) for s in STRATEJILER[strateji](sorgu_tablosu(paths), **kw)]
+    _secim_onbellegi[key] = (izler, secim)
+    return list(secim)
+
+
+def _arguman(deger: str):
+    """CLI'daki anahtar=değer argümanı için int/float/str."""
+    for tip in (int, float):
+        try:
+            return tip(deger)
+        except ValueError:
+            pass
+    return deger
+
+
+if __name__ == "__main__":
+    import sys
+    strateji = sys.argv[1] if len(sys.argv) > 1 else QUERY_STRATEGY
+    kw = dict(a.split("=", 1) for a in sys.argv[2:] if re.match(r"^\w+=", a))
+    print(sorgu_tablosu().head(20).to_string(index=False))
+    print(f"\n{strateji}:", sorgulari_getir(strateji, **{k: _arguman(v) for k, v in kw.items()}))
@@ -1,46 +1,297 @@
 # server.py (veya FastAPI dosyan)
-from fastapi import FastAPI # type: ignore
+from fastapi import FastAPI, HTTPException, Query, Request, Response # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
+from fastapi.middleware.gzip import GZipMiddleware # type: ignore
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse # type: ignore
+from pydantic import BaseModel # type: ignore
+from typing import List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
 import pandas as pd
-import re
+from columnar_store import tablo_oku, tablo_surumu
+from jobs import get_job_manager
+from metrics import METRICS, gozlem, say
 
 app = FastAPI()
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]
+    allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "5000"))
+SSE_POLL_SEC = float(os.getenv("SSE_POLL_SEC", "0.25"))
+SSE_KEEPALIVE_SEC = float(os.getenv("SSE_KEEPALIVE_SEC", "15"))
+# Bitmiş işlerin bellekteki sonuç tabloları bu kadar sn istenmezse bırakılır (sonraki istek diskten yükler)
+API_JOB_TABLE_TTL = float(os.getenv("API_JOB_TABLE_TTL", "600"))
+
+# Sonuç tabloları: API alanı -> dosya kolonu
+RESULT_SOURCES = {
+    "niyet": ("output/niyet_iyilestirme_sonuc.csv", {
+        "html": "HTML Bölümü", "context": "Kullanıcı Niyeti",      # İÇERİK × NİYET görünümü
+        "oldText": "Mevcut İçerik", "newText": "Geliştirilmiş İçerik",
+        "oldScore": "Eski Skor", "newScore": "Yeni Skor", "delta": "Yüzde Değişim",
+    }),
+    "sorgu": ("output/icerik_sorgu_uyumu_sonuc.csv", {
+        "html": "HTML Bölümü", "context": "Kullanıcı Sorgusu",     # İÇERİK × SORGU görünümü
+        "oldText": "Eski Metin", "newText": "Geliştirilmiş Metin",
+        "oldScore": "Eski Skor", "newScore": "Yeni Skor", "delta": "Yüzde Değişim",
+    }),
+}
+SORT_PATTERN = r"^-?(html|context|oldScore|newScore|delta)$"
 
 def _num(x):
-    if x is None: return None
-    s = str(x).strip()
-    s = s.replace("%","").replace(",", ".")
-    m = re.search(r"[-+]?\d*\.?\d+", s)
-    return float(m.group(0)) if m else None
+    # Skor kolonları tablo_oku'dan float32 gelir; JSON için 6 haneye yuvarlanmış Python float
+    return None if pd.isna(x) else round(float(x), 6)
+
+class ResultTable:
+    """Sonuç dosyası bir kez tipli tabloya yüklenir; dosya değişince (mtime) yeniden yüklenir."""
+
+    def __init__(self, path: str, columns: dict):
+        self.path = path
+        self.columns = columns
+        self.version: Optional[str] = None
+        self.error: Optional[str] = None
+        self.records: list = []
+        self.cols: dict = {}
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+
+    def refresh(self) -> "ResultTable":
+        version = tablo_surumu(self.path)
+        with self._lock:
+            if version != self.version:
+                self._load(version)
+        return self
+
+    def _load(self, version: Optional[str]) -> None:
+        """Yeni tablo yerellerde kurulur ve tek seferde yerine konur; `version` en son ve yalnızca
+        başarıda güncellenir (okuma hatasında sonraki istek yeniden dener)."""
+        if version is None:
+            self.error = f"Sonuç dosyası yok: {self.path}"
+            self.version = version
+            return
+        try:
+            df = tablo_oku(self.path)
+        except Exception as e:
+            logging.warning(f"Sonuç dosyası okunamadı: {self.path} ({e})")
+            if not self.cols:  # sunulacak önceki tablo yoksa hata döner
+                self.error = f"Sonuç dosyası okunamadı: {type(e).__name__}"
+            return
+        missing = set(self.columns.values()) - set(df.columns)
+        if missing:
+            self.error = f"CSV kolonları eksik: {missing}"
+            self.version = version
+            return
+        cols: dict = {}
+        for key, col in self.columns.items():
+            s = df[col]
+            if key in ("oldScore", "newScore", "delta"):
+                cols[key] = s.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                cols[key] = s.fillna("").astype(str).to_numpy(dtype=object)
+        cols["_html"] = np.array([v.lower() for v in cols["html"]], dtype=object)
+        cols["_context"] = np.array([v.lower() for v in cols["context"]], dtype=object)
+        records = [{
+            "html": cols["html"][i], "context": cols["context"][i],
+            "oldText": cols["oldText"][i], "newText": cols["newText"][i],
+            "oldScore": _num(cols["oldScore"][i]), "newScore": _num(cols["newScore"][i]),
+            "delta": _num(cols["delta"][i]),
+        } for i in range(len(df))]
+        self.records, self.cols = records, cols
+        self.error = None
+        self.version = version
+
+    def snapshot(self) -> tuple:
+        """(version, error, records, cols) tutarlı bir arada; istek boyunca bu kopya kullanılır."""
+        with self._lock:
+            return self.version, self.error, self.records, self.cols
+
+    @staticmethod
+    def select(c: dict, tag: Optional[str], q: Optional[str], min_delta: Optional[float],
+               sort: Optional[str]) -> np.ndarray:
+        """`c` (snapshot kolonları) üzerinde filtrelenmiş (ve istenirse sıralanmış) satır numaraları."""
+        mask = np.ones(len(c["html"]), dtype=bool)
+        if tag:
+            mask &= np.isin(c["_html"], [t.strip().lower() for t in tag.split(",") if t.strip()])
+        if q:
+            ql = q.strip().lower()
+            mask &= np.fromiter((ql in v for v in c["_context"]), dtype=bool, count=len(mask))
+        if min_delta is not None:
+            with np.errstate(invalid="ignore"):
+                mask &= c["delta"] > min_delta
+        idx = np.flatnonzero(mask)
+        if sort:
+            field = sort.lstrip("-")
+            vals = pd.Series(c["_" + field] if field in ("html", "context") else c[field])[idx]
+            # kararlı sıralama: eşit değerler dosya sırasında kalır, NaN her zaman sonda
+            idx = vals.sort_values(ascending=not sort.startswith("-"), kind="stable", na_position="last").index.to_numpy()
+        return idx
+
+
+_tables = {(kind, None): ResultTable(path, cols) for kind, (path, cols) in RESULT_SOURCES.items()}
+_tables_lock = threading.Lock()
+
+def _evict_tables(now: float) -> None:
+    """Bitmiş (ya da artık bilinmeyen) ve API_JOB_TABLE_TTL sn'dir istenmeyen işlerin tabloları bırakılır."""
+    for key in [k for k, t in _tables.items() if k[1] is not None and now - t.last_used > API_JOB_TABLE_TTL]:
+        j = get_job_manager().get(key[1])
+        if j is None or j.done:
+            del _tables[key]
+            say("api.job_tables_evicted")
+
+def _table(kind: str, job: Optional[str]) -> ResultTable:
+    """Varsayılan sonuç tablosu ya da bir işin kendi klasöründeki (JOB_DIR/<id>/output/...) tablosu."""
+    key = (kind, job)
+    now = time.monotonic()
+    with _tables_lock:
+        _evict_tables(now)
+        if key not in _tables:
+            j = get_job_manager().get(job)
+            if j is None:
+                raise HTTPException(404, f"İş bulunamadı: {job}")
+            path, cols = RESULT_SOURCES[kind]
+            _tables[key] = ResultTable(os.path.join(j.dir, path), cols)
+        _tables[key].last_used = now
+        return _tables[key]
+
+def _results(kind: str, request: Request, tag, q, min_delta, sort, page, page_size, job=None):
+    version, error, records, cols = _table(kind, job).refresh().snapshot()
+    params = json.dumps([tag, q, min_delta, sort, page, page_size])
+    etag = '"' + hashlib.sha1(f"{kind}|{job}|{version}|{params}".encode("utf-8")).hexdigest()[:24] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    if error:
+        return JSONResponse({"rows": [], "total": 0, "error": error}, headers=headers)
+
+    idx = ResultTable.select(cols, tag, q, min_delta, sort)
+    total = len(idx)
+    start = (page - 1) * page_size
+    page_idx = idx[start:start + page_size]
+    new = cols["newScore"][idx]
+    delta = cols["delta"][idx]
+    body = {
+        "rows": [records[i] for i in page_idx],
+        "total": total,
+        "page": page,
+        "pageSize": page_size,
+        "stats": {  # filtrelenmiş tüm satırlar üzerinden (yalnızca bu sayfa değil)
+            "avgNewScore": _num(np.nanmean(new)) if total and not np.isnan(new).all() else None,
+            "avgDelta": _num(np.nanmean(delta)) if total and not np.isnan(delta).all() else None,
+        },
+    }
+    return JSONResponse(body, headers=headers)
 
 @app.get("/api/results/niyet")
-def results_niyet():
-    path = "output/niyet_iyilestirme_sonuc.csv"
-    df = pd.read_csv(path)
-
-    need = {"HTML Bölümü","Kullanıcı Niyeti","Mevcut İçerik",
-            "Geliştirilmiş İçerik","Eski Skor","Yeni Skor","Yüzde Değişim"}
-    missing = need - set(df.columns)
-    if missing:
-        return {"rows": [], "error": f"CSV kolonları eksik: {missing}"}
-
-    rows = []
-    for _, r in df.iterrows():
-        row = {
-            "html":        str(r["HTML Bölümü"]),
-            "context":     str(r["Kullanıcı Niyeti"]),      # İÇERİK × NİYET görünümü
-            "oldText":     str(r["Mevcut İçerik"]),
-            "newText":     str(r["Geliştirilmiş İçerik"]),
-            "oldScore":    _num(r["Eski Skor"]),
-            "newScore":    _num(r["Yeni Skor"]),
-            "delta":       _num(r["Yüzde Değişim"]),        # yüzde işareti/virgül temizlendi
-        }
-        rows.append(row)
-
-    # İstersen buradaki eşik sunucuda da uygulanabilir (frontend zaten >0.001 filtreliyor)
-    rows = [r for r in rows if r["delta"] is not None and r["delta"] > 0.001]
-    return {"rows": rows}
+def results_niyet(
+    request: Request,
+    tag: Optional[str] = Query(None, description="HTML etiketleri, virgülle: h1,p"),
+    q: Optional[str] = Query(None, description="Niyet metninde arama (büyük/küçük harf duyarsız)"),
+    min_delta: Optional[float] = Query(0.001, description="Yüzde değişim alt sınırı (hariç)"),
+    sort: Optional[str] = Query(None, pattern=SORT_PATTERN, description="Alan; azalan için başına -"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    job: Optional[str] = Query(None, description="Yalnızca bu işin sonuçları (POST /api/jobs)"),
+):
+    return _results("niyet", request, tag, q, min_delta, sort, page, page_size, job)
+
+@app.get("/api/results/sorgu")
+def results_sorgu(
+    request: Request,
+    tag: Optional[str] = Query(None, description="HTML etiketleri, virgülle: h1,p"),
+    q: Optional[str] = Query(None, description="Sorgu metninde arama (büyük/küçük harf duyarsız)"),
+    min_delta: Optional[float] = Query(0.001, description="Yüzde değişim alt sınırı (hariç)"),
+    sort: Optional[str] = Query(None, pattern=SORT_PATTERN, description="Alan; azalan için başına -"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    job: Optional[str] = Query(None, description="Yalnızca bu işin sonuçları (POST /api/jobs)"),
+):
+    return _results("sorgu", request, tag, q, min_delta, sort, page, page_size, job)
+
+# ----------------------------- #
+# Ölçümler
+# ----------------------------- #
+@app.middleware("http")
+async def _istek_olcumu(request: Request, call_next):
+    # SSE akışlarında süre yanıtın başlamasına kadardır
+    t0 = asyncio.get_running_loop().time()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    ad = getattr(route, "path", "other").strip("/").replace("/", ".").replace("{", "").replace("}", "")
+    gozlem(f"http.{ad or 'root'}", asyncio.get_running_loop().time() - t0)
+    say(f"http.status.{response.status_code}")
+    return response
+
+@app.get("/metrics")
+def metrics(format: str = Query("prometheus", pattern="^(prometheus|json)$")):
+    """Süreç geneli sayaç ve histogramlar (kazıma, embedding, LLM, G/Ç, istekler)."""
+    if format == "json":
+        return METRICS.rapor()
+    return PlainTextResponse(METRICS.prometheus_metni(), media_type="text/plain; version=0.0.4")
+
+# ----------------------------- #
+# Analiz işleri
+# ----------------------------- #
+class JobRequest(BaseModel):
+    url: str
+    crawl: bool = False                   # iç linkler izlenerek site geneli analiz
+    llm: bool = False                     # içerik × niyet satırları LLM ile iyileştirilsin mi
+    queries: Optional[List[str]] = None   # boşsa kullanici_sorgusu'ndaki sorgular
+
+@app.post("/api/jobs", status_code=202)
+def create_job(req: JobRequest):
+    url = req.url.strip()
+    if not url.startswith(("http://", "https://")):
+        raise HTTPException(422, "url http:// ya da https:// ile başlamalı")
+    job = get_job_manager().submit(url, crawl=req.crawl, llm=req.llm, sorgular=req.queries)
+    return job.to_dict()
+
+@app.get("/api/jobs")
+def list_jobs():
+    return {"jobs": [j.to_dict() for j in get_job_manager().list()]}
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(404, f"İş bulunamadı: {job_id}")
+    return job.to_dict()
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """İlerleme olayları (SSE). Yeniden bağlanan istemci Last-Event-ID'den sonrasını alır."""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(404, f"İş bulunamadı: {job_id}")
+    try:
+        next_id = int(request.headers.get("last-event-id", "-1")) + 1
+    except ValueError:
+        next_id = 0
+
+    async def stream():
+        nonlocal next_id
+        idle = 0.0
+        while True:
+            done = job.done  # olaylardan önce okunur: bitişten sonra kalan olay kalmaz
+            for ev in job.events_since(next_id):
+                yield f"id: {ev['id']}\nevent: {ev['event']}\ndata: {json.dumps(ev['data'], ensure_ascii=False)}\n\n"
+                next_id = ev["id"] + 1
+                idle = 0.0
+            if done or await request.is_disconnected():
+                return
+            await asyncio.sleep(SSE_POLL_SEC)
+            idle += SSE_POLL_SEC
+            if idle >= SSE_KEEPALIVE_SEC:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Türkçe metin normalleştirme yardımcıları (bağımlılıksız).
+- turkce_kucuk(): Türkçe küçük harf (I→ı, İ→i; str.lower() "İ"yi "i̇" yapar).
+- katla(): küçük harf + ASCII katlama (reklamları = reklamlari) + noktalama/boşluk sadeleştirme.
+Sorgu kümeleme (query_clusters) ve LLM JSON anahtar eşleme (llm_json) tarafından kullanılır.
+"""
+
+import re
+
+_KATLAMA = str.maketrans("ıİşŞğĞüÜöÖçÇâÂîÎûÛ", "iisSgGuUoOcCaAiIuU")
+
+
+def turkce_kucuk(text: str) -> str:
+    return (text or "").replace("I", "ı").replace("İ", "i").lower()
+
+
+def katla(text: str) -> str:
+    """Türkçe küçük harf + ASCII katlama + noktalama/boşluk sadeleştirme."""
+    t = turkce_kucuk(text).translate(_KATLAMA)
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", t)).strip()
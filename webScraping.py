@@ -1,11 +1,14 @@
 import logging
-from selenium import webdriver # type: ignore
-from selenium.webdriver.chrome.options import Options # type: ignore
-from selenium.webdriver.common.by import By # type: ignore
-from selenium.webdriver.chrome.service import Service # type: ignore
-from urllib.parse import urlparse, urljoin
-from webdriver_manager.chrome import ChromeDriverManager # type: ignore
-import time
+import os
+from typing import Optional
+from selenium.webdriver.support.ui import WebDriverWait # type: ignore
+from selenium.common.exceptions import TimeoutException # type: ignore
+import requests # type: ignore
+from requests.adapters import HTTPAdapter # type: ignore
+
+from driver_pool import DriverPool, get_default_pool
+from html_extract import AYRISTIRMA_HATALARI, BLOCK_TAGS, build_result, extract_raw, looks_js_rendered
+from metrics import say, span
 
 # LOGGING AYARI
 logging.basicConfig(
@@ -13,108 +16,121 @@ logging.basicConfig(
     level=logging.INFO
 )
 
-def get_structured_web_content_selenium(url: str) -> dict:
-    logging.info(f"URL açılıyor: {url}")
-
-    options = Options()
-    options.add_argument("--headless")  # Arka planda çalıştır
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.get(url)
-    time.sleep(3)
-
-    domain = urlparse(url).netloc
+SCRAPE_READY_TIMEOUT = int(os.getenv("SCRAPE_READY_TIMEOUT", "15"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_USER_AGENT = os.getenv(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+)
 
-    def get_elements_text(by_tag):
-        elements = driver.find_elements(By.TAG_NAME, by_tag)
-        texts = [el.text.strip() for el in elements if el.text.strip()]
-        logging.info(f"<{by_tag}> etiketlerinden {len(texts)} adet içerik bulundu.")
-        return texts
+# Bağlantı havuzlu tek HTTP oturumu (aynı host'a yapılan istekler TCP/TLS bağlantısını yeniden kullanır)
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+_session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+_session.headers.update({"User-Agent": HTTP_USER_AGENT, "Accept-Language": "tr-TR,tr;q=0.9,en;q=0.8"})
 
-    result = {
-        "title": driver.title,
-        "meta_description": "",
-        "headings": {
-            "h1": get_elements_text("h1"),
-            "h2": get_elements_text("h2"),
-            "h3": get_elements_text("h3"),
-        },
-        "paragraphs": get_elements_text("p"),
-        "div_texts": get_elements_text("div"),
-        "lists": [],
-        "tables": [],
-        "emphasis": {
-            "strong": get_elements_text("strong"),
-            "em": get_elements_text("em")
-        },
-        "images_alt": [],
-        "links": {
-            "internal": [],
-            "external": []
-        }
+# Tüm yapısal içerik tek execute_script çağrısıyla toplanır (eleman başına WebDriver turu yok).
+# Görünürlük kontrolü Selenium'daki el.text davranışına yakındır: render edilmeyen eleman boş metin verir.
+_EXTRACT_JS = "const BLOCK_SELECTOR = %r;\n" % ",".join(BLOCK_TAGS) + r"""
+const txt = el => (el.getClientRects().length ? (el.innerText || "") : "").trim();
+const texts = sel => Array.from(document.querySelectorAll(sel)).map(txt).filter(Boolean);
+const lists = tag => Array.from(document.getElementsByTagName(tag))
+    .flatMap(l => Array.from(l.getElementsByTagName("li")).map(txt).filter(Boolean));
+const meta = document.querySelector("meta[name='description']");
+const xpath = el => {
+    const parts = [];
+    for (; el && el.nodeType === 1; el = el.parentElement) {
+        const tag = el.tagName.toLowerCase();
+        const same = el.parentElement ? Array.from(el.parentElement.children).filter(c => c.tagName === el.tagName) : [el];
+        parts.unshift(same.length > 1 ? `${tag}[${same.indexOf(el) + 1}]` : tag);
     }
+    return "/" + parts.join("/");
+};
+return {
+    title: document.title,
+    meta_description: meta ? meta.getAttribute("content") : null,
+    h1: texts("h1"), h2: texts("h2"), h3: texts("h3"),
+    p: texts("p"), div: texts("div"),
+    strong: texts("strong"), em: texts("em"),
+    ul: lists("ul"), ol: lists("ol"),
+    tables: Array.from(document.getElementsByTagName("table")).map(txt),
+    images_alt: Array.from(document.getElementsByTagName("img")).map(i => i.getAttribute("alt")),
+    links: Array.from(document.getElementsByTagName("a")).map(a => [a.getAttribute("href") ? a.href : null, txt(a)]),
+    blocks: Array.from(document.querySelectorAll(BLOCK_SELECTOR))
+        .map(el => [el.tagName.toLowerCase(), xpath(el), txt(el)]).filter(b => b[2]),
+};
+"""
 
-    # Meta description
+def _wait_until_ready(driver, timeout: int = SCRAPE_READY_TIMEOUT) -> None:
+    """Sabit bekleme yerine document.readyState == 'complete' olana kadar bekler."""
     try:
-        meta = driver.find_element(By.XPATH, "//meta[@name='description']")
-        result["meta_description"] = meta.get_attribute("content")
-        logging.info(f"Meta description bulundu: {result['meta_description'][:80]}...")
-    except:
-        logging.warning("Meta description bulunamadı.")
-
-    # Listeler
-    for tag in ["ul", "ol"]:
-        count = 0
-        for el in driver.find_elements(By.TAG_NAME, tag):
-            lis = el.find_elements(By.TAG_NAME, "li")
-            for li in lis:
-                text = li.text.strip()
-                if text:
-                    result["lists"].append(text)
-                    count += 1
-        logging.info(f"<{tag}> listelerinden toplam {count} madde bulundu.")
+        with span("scrape.selenium.wait"):
+            WebDriverWait(driver, timeout).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+    except TimeoutException:
+        say("scrape.selenium.wait_timeouts")
+        logging.warning(f"Sayfa {timeout} sn içinde hazır olmadı, mevcut DOM ile devam ediliyor.")
 
-    # Tablolar
-    tables = driver.find_elements(By.TAG_NAME, "table")
-    for table in tables:
-        content = table.text.strip()
-        if content:
-            result["tables"].append(content)
-    logging.info(f"{len(tables)} adet <table> bulundu, {len(result['tables'])} tanesi dolu.")
-
-    # Görsel alt metinleri
-    imgs = driver.find_elements(By.TAG_NAME, "img")
-    alt_count = 0
-    for img in imgs:
-        alt = img.get_attribute("alt")
-        if alt:
-            result["images_alt"].append(alt.strip())
-            alt_count += 1
-    logging.info(f"{alt_count} adet <img alt='...'> bulundu.")
-
-    # Linkler (internal vs external)
-    internal_count, external_count = 0, 0
-    for a in driver.find_elements(By.TAG_NAME, "a"):
-        href = a.get_attribute("href")
-        text = a.text.strip()
-        if href:
-            full_url = urljoin(url, href)
-            link_info = {"text": text, "url": full_url}
-            if domain in urlparse(full_url).netloc:
-                result["links"]["internal"].append(link_info)
-                internal_count += 1
-            else:
-                result["links"]["external"].append(link_info)
-                external_count += 1
-    logging.info(f"{internal_count} iç link, {external_count} dış link bulundu.")
+def get_structured_web_content_selenium(url: str, pool: Optional[DriverPool] = None) -> dict:
+    """Sayfayı havuzdaki (varsayılan: süreç geneli) bir headless Chrome ile açar ve çıkarır."""
+    logging.info(f"URL açılıyor: {url}")
 
-    driver.quit()
+    pool = pool or get_default_pool()
+    # scrape.selenium içinde havuzdan tarayıcı bekleme süresi de vardır (load + wait + extract dışı kalan)
+    with span("scrape.selenium"), pool.session() as driver:
+        with span("scrape.selenium.load"):
+            driver.get(url)
+        _wait_until_ready(driver)
+        with span("scrape.selenium.extract"):
+            result = build_result(driver.execute_script(_EXTRACT_JS), url)
+    say("scrape.pages.selenium")
+    say("scrape.elements", len(result["blocks"]))
     logging.info("Tarama tamamlandı.")
     return result
 
+def fetch_static_raw(url: str):
+    """Sayfayı düz HTTP ile çeker ve ayrıştırır; HTML alınamazsa None döner."""
+    try:
+        with span("scrape.http"):
+            resp = _session.get(url, timeout=HTTP_TIMEOUT)
+    except requests.RequestException as e:
+        say("scrape.http.failures")
+        logging.warning(f"HTTP isteği başarısız ({e}), tarayıcıya geçiliyor.")
+        return None
+    ctype = resp.headers.get("Content-Type", "")
+    if resp.status_code != 200 or "html" not in ctype.lower():
+        logging.warning(f"HTTP {resp.status_code} / {ctype or '?'}: statik içerik kullanılamadı.")
+        return None
+    # Header'da charset yoksa baytları lxml'e ver (<meta charset> okunur, Türkçe karakterler bozulmaz)
+    body = resp.text if "charset" in ctype.lower() else resp.content
+    try:
+        with span("scrape.parse"):
+            return extract_raw(body, resp.url or url)
+    except AYRISTIRMA_HATALARI as e:
+        say("scrape.parse.failures")
+        logging.warning(f"Statik HTML ayrıştırılamadı ({type(e).__name__}: {e}), tarayıcıya geçiliyor.")
+        return None
+
+def get_structured_web_content(url: str, pool: Optional[DriverPool] = None) -> dict:
+    """
+    Önce statik HTTP + lxml ile dener; içerik JS ile üretiliyor gibi görünüyorsa
+    (boş body / çok az metin) Selenium'a düşer. İki yol da aynı şemayı döndürür.
+    """
+    logging.info(f"URL açılıyor (statik): {url}")
+    raw = fetch_static_raw(url)
+    if raw is not None and not looks_js_rendered(raw):
+        result = build_result(raw, url)
+        say("scrape.pages.static")
+        say("scrape.elements", len(result["blocks"]))
+        logging.info("Tarama tamamlandı (statik).")
+        return result
+    if raw is not None:
+        say("scrape.js_fallbacks")
+        logging.info("Sayfa JS ile oluşturuluyor gibi görünüyor, tarayıcıya geçiliyor.")
+    return get_structured_web_content_selenium(url, pool=pool)
+
 # Örnek kullanım:
 # url = "https://www.ornekwebsitesi.com"
-# data = get_structured_web_content_selenium(url)
+# data = get_structured_web_content(url)   # statik, gerekirse Selenium
 # from pprint import pprint; pprint(data)